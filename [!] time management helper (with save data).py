@@ -1,5 +1,15 @@
-import pickle #file handling
+import sys
+import time
+from adaptive import learned_weights #the scoring weights learned from what gets ticked off
 from datetime import datetime #assigns a date & time to save data
+from planner import plan_tasks #picks the tasks that fit into the time available
+from profiles import DEFAULT_PROFILE, Profile, ProfileManager #named task lists, each with its own save
+from schedule import describe_due, repeat_name #deadlines and repeating tasks
+from storage import open_save_file #snapshot + journal save files (or an SQLite save)
+from task_store import Task, TaskStore #keeps the needs/wants lists sorted by priority score
+
+save_file=open_save_file() #$TMH_SAVE_FILE, else the SQLite or binary save if there is one, else the .pkl
+TOP_K=20 #only this many tasks per list are shown (and ranked) unless you ask to see them all
 
 def yes_no(): #reduces redundancy in code, as I use this exact loop many times
     while True:
@@ -13,60 +23,113 @@ def yes_no(): #reduces redundancy in code, as I use this exact loop many times
             print("\tEnter 'yes' or 'no'!")
     return choice
 
-def display_it_all_nicely(wants,needs):
-    if needs:
-        print("\nYou need to do:")
-        for task in needs:
-            text="\t"+str(task["name"])+" ~ "+str(task["time"])+" mins"#+"(score:"+str(task["score"])+")"
-            if task["priority"]:
-                text=text+"  (!)"
-            print(text)
-    if wants:
-        print("\nYou want to do:")
-        for task in wants:
-            text="\t"+str(task["name"])+" ~ "+str(task["time"])+" mins"#+"(score:"+str(task["score"])+")"
-            if task["priority"]:
+def display_it_all_nicely(wants,needs,limit=None):
+    #with a limit, only the top tasks of each list get sorted and shown
+    for heading,tasks in (("You need to do:",needs),("You want to do:",wants)):
+        if not tasks:
+            continue
+        print("\n"+heading)
+        shown=tasks.top(limit) if limit else tasks
+        for task in shown:
+            text="\t"+str(task.name)+" ~ "+str(task.time)+" mins"#+"(score:"+str(task.score)+")"
+            if task.priority:
                 text=text+"  (!)"
+            if task.due is not None: #e.g. [due tomorrow 09:00, weekly]
+                text=text+"  ["+describe_due(task.due,time.time())+(", "+repeat_name(task.repeat) if task.repeat else "")+"]"
             print(text)
+        if limit and len(tasks)>limit:
+            print(f"\t... and {len(tasks)-limit} more")
+
+def plan_free_time(store):
+    print("\nHow many minutes do you have free? I'll pick the best tasks to fit. ([ENTER] to skip)")
+    while True:
+        budget=input(">>>  ").strip()
+        if budget=="":
+            return
+        try:
+            budget=int(budget)
+            if budget<1:
+                raise ValueError
+            break
+        except ValueError:
+            print("\tPlease enter a whole number of minutes (or [ENTER] to skip)")
+
+    plan=plan_tasks(store.index.values(),budget) #every task, without ranking them all
+    if not plan.tasks:
+        print("Nothing fits in that time!")
+        return
+    print(f"\nIn {budget} mins you could do:")
+    for task in plan.tasks:
+        text="\t"+str(task.name)+" ~ "+str(task.time)+" mins"
+        if task.priority:
+            text=text+"  (!)"
+        print(text)
+    print(f"That's {plan.minutes} mins altogether.")
+
+def pick_profile(profiles):
+    #only asks when there's more than the default list
+    names=profiles.names()
+    if len(names)==1:
+        return DEFAULT_PROFILE
+    print("\nWhich task list? (number, a new name to start one, or [ENTER] for default)")
+    for number,name in enumerate(names,1):
+        print(f"\t{number}. {profiles.describe(name)}") #from the cached summaries, nothing is loaded
+    while True:
+        choice=input(">>>  ").strip()
+        if choice=="":
+            return DEFAULT_PROFILE
+        if choice.isdigit() and 1<=int(choice)<=len(names):
+            return names[int(choice)-1]
+        for name in names:
+            if name.lower()==choice.lower():
+                return name
+        try:
+            return profiles.create(choice).name
+        except ValueError as error:
+            print("\t"+str(error))
+        except Exception:
+            print("\tSorry, that list could not be created.")
 
 def get_save_data():
 
     print("Would you like to use previous data? (yes/no)")
     if yes_no()=="no":
         print("Proceeding without save data")
-        return [],[]
+        return [],[],False
 
     try:
-        with open("ProductivitySaveData.pkl", "rb") as file:
-            imported_data=pickle.load(file)
+        save_date=save_file.peek_date() #binary saves can tell us this without loading every task
 
-        if not imported_data: #checks if file is empty
+        if not save_date: #checks if file is empty
             print("No recovery data found.")
-            return [],[]
+            return [],[],False
         
     except FileNotFoundError:
         print("\nSorry, a problem was encountered locating the save data file.")
-        print("Please check that 'ProductivitySaveData.pkl' is saved in the same folder as this code!")
+        print(f"Please check that '{save_file.path}' is saved in the same folder as this code!")
         input("\n[ENTER] to proceed without save data.")
-        return [],[]
+        return [],[],False
     
     except Exception:
         print("\nSorry, it looks like the save data file is corrupted.")
         print("Retrieving your past data will not be possible.")
         input("[ENTER] to proceed without save data.")
-        return [],[]
+        return [],[],False
 
     #no file-related problem encountered    
-    print("Data found from",imported_data["date"])
+    print("Data found from",save_date)
     print("Would you like to import it and continue? (yes/no)")
     if yes_no()=="no":
         print("Proceeding without save data")
-        return [],[]
-    else:
-        wants=imported_data["wants_list"]
-        needs=imported_data["needs_list"]
-        display_it_all_nicely(wants,needs)
-        return wants, needs
+        return [],[],False
+
+    try:
+        imported_data=save_file.load() #the last snapshot with any later saves replayed on top
+    except Exception:
+        print("\nSorry, it looks like the save data file is corrupted.")
+        input("[ENTER] to proceed without save data.")
+        return [],[],False
+    return imported_data["wants_list"], imported_data["needs_list"], True
     
 
 def get_tasks(request):
@@ -100,7 +163,7 @@ def get_tasks(request):
             print(f"\tIs this a {request[1]}? (yes/no)")
             priority=(yes_no()=="yes") #called a "ternary conditional expression" wow so cool
             
-            arr.append({"time": int(task_time), "priority": priority, "name": task_name})
+            arr.append(Task(task_name, int(task_time), priority))
             print("\n\tTask added! Next:")
             
         except Exception:
@@ -110,62 +173,53 @@ def get_tasks(request):
     print(f"Great! You have successfully added all your {request[0]} tasks")
     return arr
 
-def priority_score(task):
-
-    priority_multiplier=5 if task["priority"] else 1  #this line can be changed to adjust preferences
-    #prioritised tasks are flagged as 5 times more important
-    #i.e. a priority task that takes 60mins has same score as non-priority task that takes 12 minutes
-    #the higher the score, the more important it is
-
-    dampener=5#this line can be changed to adjust preferences
-    #The dampener acts to smooth out the harsh logarithmic scaling of priority/time
-    #without it, short&easy tasks are aggressively favoured over others
-    #This results in longer tasks being pushed towards the bottom (despite being important)
-    #i.e. The dampener can be thought of as a 'minimum effective time' for all tasks
-    
-    time=task["time"]+dampener
-    score=round(priority_multiplier/time,3)
-    return score
-    
 ################################# main code #############################
 
-def main():
+def main(list_name=None):
 
+    global save_file
     print("\nThis is the TIME MANAGEMENT HELPER. Let's get started!")
-    wants,needs=get_save_data()
+    profiles=ProfileManager(save_file)
+    profile_name=list_name if list_name in profiles.names() else pick_profile(profiles)
+    save_file=profiles.save_file_for(profile_name)
+    wants,needs,from_save=get_save_data()
+    store=TaskStore(needs,wants,*learned_weights(save_file.path)) #scores each task once and keeps both lists sorted
+    if from_save:
+        store.mark_saved() #so saving only has to write what changes from here on
+        display_it_all_nicely(store.wants,store.needs,TOP_K)
 
     loop_response="*"
     while loop_response=="*":
 
-        needs.extend(get_tasks(["NEED to do","high priority task","chores, habits, to-dos,"]))
-        wants.extend(get_tasks(["WANT to do","task you want to complete more than others","hobbies, rewards, very low priority tasks,"]))
+        store.extend(get_tasks(["NEED to do","high priority task","chores, habits, to-dos,"]),"need")
+        store.extend(get_tasks(["WANT to do","task you want to complete more than others","hobbies, rewards, very low priority tasks,"]),"want")
 
-        #calculating priority score then sorting task items based on it:
-        for need in needs:
-            need["score"]=priority_score(need)
-        for want in wants:
-            want["score"]=priority_score(want)
-        needs.sort(key=lambda task: task["score"], reverse=True)
-        wants.sort(key=lambda task: task["score"], reverse=True)
+        display_it_all_nicely(store.wants,store.needs,TOP_K)
+        plan_free_time(store)
 
-        display_it_all_nicely(wants,needs)
-
-        print("Input (*) to add more tasks, or [ENTER] to exit/save.")
+        print("Input (*) to add more tasks, (+) to see every task, or [ENTER] to exit/save.")
         loop_response=input(">>>  ")
+        if loop_response=="+":
+            display_it_all_nicely(store.wants,store.needs)
+            print("Input (*) to add more tasks, or [ENTER] to exit/save.")
+            loop_response=input(">>>  ")
 
     #user exits main loop
     print("\n------------------------------------------------------------------")
     print("\nWould you like to save the above data? (yes/no)")
-    print("DISCLAIMER: THIS OVERWRITES PREVIOUS FILE DATA")
+    if from_save:
+        print("(Anything saved from another window since then is kept - the changes are merged.)")
+    else:
+        print("DISCLAIMER: THIS OVERWRITES PREVIOUS FILE DATA")
 
     if yes_no()=="yes":
         now=datetime.now()
         #dd/mm/yyyy format (because I say so)
         save_date= str(now.day) +"/"+ str(now.month) +"/"+ str(now.year) +" at "+ str(now.strftime("%H:%M"))
         try:
-            dump_data={"date":save_date,"wants_list":wants,"needs_list":needs}
-            pickle.dump(dump_data, open("ProductivitySaveData.pkl", "wb"))
+            save_file.save(store,save_date)
             print("Save successful!")
+            profiles.remember(Profile(profile_name,save_file,store)) #keeps the list summaries up to date
             
         except Exception:
             print("Sorry, a problem was encountered whilst saving to the file.")
@@ -178,5 +232,12 @@ def main():
     quit()
    
             
-main()
-
+if __name__=="__main__":
+    import commands #with a command it runs without prompts, e.g. add "Laundry" 45 (see commands.py)
+    parser=commands.command_parser()
+    args=parser.parse_args()
+    if args.command:
+        sys.exit(commands.main(sys.argv[1:],parser))
+    if args.save_file:
+        save_file=open_save_file(args.save_file)
+    main(args.list_name)
@@ -1,21 +1,32 @@
-import pickle
-from datetime import datetime
+import time
+STARTED = time.perf_counter() #startup is timed from here (see mark_startup)
+
+import sys
+import queue
+import threading
 import tkinter as tk
-from tkinter import messagebox, scrolledtext
-
-def priority_score(task):
-    """Calculates the priority score for a task."""
-    priority_multiplier = 5 if task["priority"] else 1
-    dampener = 5
-    time = task["time"] + dampener
-    score = round(priority_multiplier / time, 3)
-    return score
-
-def get_save_data():
-    """Attempts to load previous data from pickle file."""
+from collections import deque
+from tkinter import messagebox, ttk
+from autosave import POLL_MS, Autosaver
+from instrument import ENABLED, count, record, span, timed
+from profiles import DEFAULT_PROFILE, ProfileManager
+from schedule import format_due, parse_due, parse_repeat, repeat_name
+from storage import open_save_file
+from task_store import Task, TaskStore
+from task_view import TaskListView, convert_minutes_to_h_m
+from undo import Added, Completed, Edited, Replaced, UndoHistory
+#the planner, simpledialog, task_server, history and adaptive are imported when first used
+
+save_file = open_save_file() #$TMH_SAVE_FILE, else the SQLite or binary save if there is one, else the .pkl
+MAX_TIMER_MS = 60 * 60 * 1000 #longest wait before looking at the deadlines again (in case the clock jumps)
+REPEAT_CHOICES = ("", "daily", "weekly", "every 2 weeks") #others can be typed in, e.g. "every 3 days"
+
+def get_save_data(source=None):
+    """Attempts to load previous data from the save file (snapshot + journal).
+
+    `source` is the save file to read - the default list's if not given."""
     try:
-        with open("ProductivitySaveData.pkl", "rb") as file:
-            imported_data = pickle.load(file)
+        imported_data = (source or save_file).load()
             
         if not imported_data: #"No recovery data found."
             return [], [], []
@@ -28,18 +39,10 @@ def get_save_data():
     except Exception: #"Save data file is corrupted."
         return [], [], []
 
-def save_data(wants, needs):
-    """Saves the current wants and needs lists to a pickle file."""
-    now = datetime.now()
-    save_date = now.strftime("%d/%m/%Y at %H:%M")
-    
-    dump_data = {"date": save_date, "wants_list": wants, "needs_list": needs}
-    try:
-        with open("ProductivitySaveData.pkl", "wb") as file:
-            pickle.dump(dump_data, file)
-        return "Save successful!"
-    except Exception:
-        return "ERROR: Could not save data to file."
+def mark_startup(name):
+    """Records how long after launch `name` happened (shown with --profile)."""
+    if ENABLED:
+        record(name, time.perf_counter() - STARTED)
 
 
 # Tkinter GUI Class
@@ -48,22 +51,232 @@ class TimeManagementApp:
         self.master = root
         self.master.title("Time Management Helper")
         
-        self.master.minsize(900, 500)
-        self.master.geometry("1200x500")
+        self.master.minsize(900, 600)
+        self.master.geometry("1200x600")
+        self.master.protocol("WM_DELETE_WINDOW", self.exit_application) #closing the window also flushes saves
         
-        self.wants = initial_wants
-        self.needs = initial_needs
-        self.current_tasks = []
-        self.task_tags = {}
+        self.store = TaskStore(initial_needs, initial_wants)
+        # The starting lists belong to the default profile; others load when switched to
+        self.profiles = ProfileManager(save_file)
+        self.profile = self.profiles.adopt(DEFAULT_PROFILE, save_file, self.store)
+        self.undo_history = UndoHistory() # for the list showing - started again when the lists change under it
         
         self.create_widgets()
-        self.output_text.tag_config("completed", foreground="green", font="{Yu Gothic} 11 bold")
-        self.output_text.tag_config("heading_ul", underline=1)
-        self.sort_and_display()
+        self.view = TaskListView(self.list_canvas, self.time_summary_label)
+        # Saves run on a worker thread; changes are saved automatically once the
+        # session has been loaded from or saved to the save file
+        # (another window or the CLI saving meanwhile gets merged in - see storage.py)
+        self.autosaver = Autosaver(self.master, save_file, self.store, self._show_save_status,
+                                   on_merge=self._merged)
+        self._loading = None  # the thread loading the save at startup (see load_in_background)
+        self._loaded = None
+        self._edit_window = None  # built the first time a task is edited, then reused
+        self._stats = None  # HistoryStats for the list showing, kept so reopening the stats only reads new tick-offs
+        self.remote = None  # a TaskClient while the tasks are shared through task_server.py (see connect)
+        self._server_queue = deque()  # (handler, arg) from the client's thread, run on the Tk thread
+        self._deadline_timer = None  # (when, after id) for the next time a deadline moves a task up
+        self._plan = []  # the tasks of the time plan highlighted, if any
+        self.refresh_display()
+
+    def load_in_background(self):
+        """Loads the save on a worker thread, so the window can show while it loads.
+
+        Tasks added meanwhile are kept; anything that needs the saved tasks
+        (saving, importing, switching lists, exiting) waits for the load first.
+        The save is read through a SaveFile of its own and nothing is autosaved
+        until the loaded tasks are swapped in, so a save made meanwhile can't
+        write over the tasks still loading."""
+        source = open_save_file(self.profile.save_file.path)
+        self.autosaver.holding = True
+        self._loading = threading.Thread(target=self._load_worker, args=(source,), name="load", daemon=True)
+        self._show_save_status("Loading saved tasks...")
+        self._loading.start()
+        self.master.after(POLL_MS, self._check_loading)
+
+    def _load_worker(self, source):
+        # runs on the load thread - no Tk calls in here
+        store = None
+        try:
+            wants, needs, date = get_save_data(source)
+            if date:
+                from adaptive import learned_weights
+                #big lists are only partly sorted (see task_store.py)
+                store = TaskStore(needs, wants, *learned_weights(source.path)) #weights learned from past tick-offs
+                store.mark_saved()
+        finally:
+            self._loaded = (store, source)
+
+    def connect(self, address=None):
+        """Shows (and changes) the list held by a running task_server.py instead of the save.
+
+        Changes made by any client - this one included - come back as events. The
+        client's thread only queues them (Tk mustn't be called from other threads);
+        the Tk thread picks them up every POLL_MS while connected.
+        Anything not yet saved is saved first; if that fails, this stays on the save.
+        Raises OSError if the server can't be reached."""
+        self._finish_loading()
+        try:
+            self.autosaver.flush()
+        except Exception:
+            messagebox.showerror("Save Error", "ERROR: Could not save data to file.")
+            return
+        from task_server import TaskClient
+        self.remote = TaskClient(address, self._on_server_event)
+        try:
+            subscribed = self.remote.request("subscribe")
+        except Exception:
+            self.remote.close()
+            self.remote = None
+            raise
+        #keeps the server's IDs, and scores with the server's weights
+        self.profile.store = self.store = TaskStore(*self._server_lists(subscribed["tasks"]), *subscribed["weights"])
+        self.autosaver.switch_to(self.profile.save_file, self.store) #saving is the server's job now
+        self._forget_undo() #other clients change the shared list too, so there's no undo while connected
+        for widget in (self.profile_box, self.new_list_button, self.import_save_button):
+            widget.config(state=tk.DISABLED) #other lists and saves aren't shared
+        self.master.title("Time Management Helper (shared)")
+        self.refresh_display()
+        self._show_save_status(f"Connected to the task server - {len(self.store)} tasks")
+        self._poll_server_queue() #also takes anything that arrived while subscribing
+
+    def _on_server_event(self, event):
+        # runs on the client's thread - no Tk calls at all, just the queue
+        self._server_queue.append((self._apply_server_event, event))
+
+    def _on_server_reply(self, future, done):
+        # also on the client's thread
+        self._server_queue.append((done, future))
+
+    def _poll_server_queue(self):
+        while self._server_queue:
+            handler, arg = self._server_queue.popleft()
+            handler(arg)
+        if self.remote is not None: #the replies failed by a lost connection come before its "disconnected"
+            self.master.after(POLL_MS, self._poll_server_queue)
+
+    def _send(self, op, done=None, **fields):
+        """Sends a request to the task server; done(future) runs on the Tk thread when it's answered.
+
+        Without `done`, a request that's turned down pops up an error."""
+        try:
+            future = self.remote.send(op, **fields)
+        except OSError:
+            messagebox.showerror("Task Server", "Lost the connection to the task server.")
+            return
+        future.add_done_callback(lambda future: self._on_server_reply(future, done or self._check_reply))
+
+    def _check_reply(self, future):
+        error = future.exception()
+        if error is not None and not isinstance(error, ConnectionError): #a lost connection is reported once, below
+            messagebox.showerror("Task Server", f"The task server couldn't do that:\n{error}")
+
+    def _apply_server_event(self, event):
+        """Brings the screen up to date with a change made through the server."""
+        from task_server import task_from_json
+        kind = event["event"]
+        if kind == "added":
+            tasks = [task_from_json(record) for record in event["tasks"]]
+            if len(tasks) > 100: #an import - one sort and one redraw
+                for task_type in ("need", "want"):
+                    self.store.extend([task for task, of_type in tasks if of_type == task_type], task_type)
+                self.refresh_display()
+            else:
+                for task, task_type in tasks:
+                    self._insert_task(task, task_type)
+        elif kind == "completed":
+            for task_id in event["ids"]:
+                self._remove_task(task_id)
+        elif kind == "edited":
+            task, task_type = task_from_json(event["task"])
+            edited = self.store.edit(task.id, task, task_type)
+            if edited is None:
+                self._insert_task(task, task_type)
+            else:
+                old_type, old_rank, old_task, new_rank = edited
+                self.view.delete_row(old_type, old_rank, old_task)
+                self.view.insert_row(task_type, new_rank, task)
+        elif kind == "cleared":
+            self.store.clear()
+            self.refresh_display()
+        elif kind == "replaced":
+            self.store.replace(*self._server_lists(event["tasks"]))
+            self.refresh_display()
+        elif kind == "reweighted":
+            self.store.set_weights(*event["weights"])
+            self.refresh_display()
+        elif kind == "disconnected" and self.remote is not None:
+            self.remote = None
+            self.master.title("Time Management Helper")
+            self.new_list_button.config(state=tk.NORMAL)
+            self.import_save_button.config(state=tk.NORMAL)
+            self.profile_box.config(state="readonly")
+            self._update_undo_buttons()
+            self._show_save_status("Disconnected from the task server")
+            messagebox.showwarning("Task Server", "Lost the connection to the task server.\n"
+                                   "The tasks on screen are kept, but aren't shared any more - save them if you need to.")
+
+    def _server_lists(self, records):
+        """(needs, wants) from the tasks a server sent."""
+        from task_server import task_from_json
+        lists = {"need": [], "want": []}
+        for record in records:
+            task, kind = task_from_json(record)
+            lists[kind].append(task)
+        return lists["need"], lists["want"]
+
+    def _check_loading(self):
+        if self._loading is None:
+            return  # already waited for
+        if self._loading.is_alive():
+            self.master.after(POLL_MS, self._check_loading)
+            return
+        self._finish_loading()
+
+    def _finish_loading(self):
+        """Swaps the loaded tasks in, waiting for the load if it's still going."""
+        if self._loading is None:
+            return
+        self._loading.join()
+        self._loading = None
+        self.autosaver.holding = False
+        (loaded, source), self._loaded = self._loaded, None
+        if loaded is None:
+            from adaptive import apply_weights, learned_weights
+            if apply_weights(self.store, learned_weights(self.profile.save_file.path)): #a list with history but no save
+                self.refresh_display()
+            self._show_save_status("") #nothing saved yet (or the save couldn't be read)
+            return
+
+        with span("load.swap_in"): #the part of loading that holds up the window
+            added = list(self.store.index.values())
+            for task in added:
+                task.id = None #renumbered after the saved tasks
+                loaded.add(task, task.kind)
+            self.profile.store = self.store = loaded
+            self.profile.save_file.carry_on_from(source) #autosave can start now
+            self.autosaver.switch_to(self.profile.save_file, loaded)
+            self._forget_undo()
+            if added:
+                self.autosaver.mark_dirty()
+            self.refresh_display()
+        self._show_save_status(f"Loaded {len(loaded)} tasks")
+        mark_startup("startup.loaded")
 
     def exit_application(self):
         """Asks the user if they want to save before closing."""
-        
+        if self.remote is not None:
+            # the server saves the shared tasks
+            remote, self.remote = self.remote, None
+            remote.close()
+            self.master.destroy()
+            return
+        self._finish_loading()
+
+        if self.autosaver.enabled:
+            # Autosaving - just make sure the last changes are written
+            self._flush_and_close()
+            return
+
         response = messagebox.askyesnocancel(
             "Exit App", 
             "Do you want to save your current task list before exiting?"
@@ -71,12 +284,25 @@ class TimeManagementApp:
         
         if response is True:
             #User chose 'Yes' (save)
-            self.save_current_data()
-            self.master.destroy() 
+            self.autosaver.save_now()
+            self._flush_and_close()
         elif response is False:
             #User chose 'No' (don't save)
             self.master.destroy() 
         #If response is None (Cancel), the window stays open
+
+    def _flush_and_close(self):
+        """Writes any pending save (waiting for one in progress), then closes the app."""
+        try:
+            self.autosaver.flush()
+        except Exception:
+            messagebox.showerror("Save Error", "ERROR: Could not save data to file.")
+            return
+        self.profiles.close()
+        self.master.destroy()
+
+    def _show_save_status(self, message):
+        self.save_status_label.config(text=message)
         
     def create_widgets(self):
         """Tkinter GUI used for the application"""
@@ -92,26 +318,94 @@ class TimeManagementApp:
         self.task_time_entry = tk.Entry(input_frame, width=10)
         self.task_time_entry.grid(row=1, column=1, sticky="w", padx=5, pady=2)
         
+        # Optional deadline and repeat (see schedule.py for what can be typed)
+        tk.Label(input_frame, text="Due (optional):").grid(row=2, column=0, sticky="w", pady=2)
+        self.task_due_entry = tk.Entry(input_frame, width=18)
+        self.task_due_entry.grid(row=2, column=1, sticky="w", padx=5, pady=2)
+
+        tk.Label(input_frame, text="Repeat:").grid(row=3, column=0, sticky="w", pady=2)
+        self.repeat_var = tk.StringVar()
+        ttk.Combobox(input_frame, textvariable=self.repeat_var, values=REPEAT_CHOICES, width=15).grid(row=3, column=1, sticky="w", padx=5, pady=2)
+
         self.priority_var = tk.BooleanVar()
-        tk.Checkbutton(input_frame, text="High Priority?", variable=self.priority_var).grid(row=2, column=0, sticky="w", pady=5)
+        tk.Checkbutton(input_frame, text="High Priority?", variable=self.priority_var).grid(row=4, column=0, sticky="w", pady=5)
         
         self.type_var = tk.StringVar(value="need")
-        tk.Radiobutton(input_frame, text="Need to do", variable=self.type_var, value="need").grid(row=3, column=0, sticky="w")
-        tk.Radiobutton(input_frame, text="Want to do", variable=self.type_var, value="want").grid(row=3, column=1, sticky="w")
+        tk.Radiobutton(input_frame, text="Need to do", variable=self.type_var, value="need").grid(row=5, column=0, sticky="w")
+        tk.Radiobutton(input_frame, text="Want to do", variable=self.type_var, value="want").grid(row=5, column=1, sticky="w")
         
-        tk.Button(input_frame, text="Add Task", command=self.add_task, bg="#0C8F96",fg="white").grid(row=4, column=0, columnspan=2, pady=10)
+        tk.Button(input_frame, text="Add Task", command=self.add_task, bg="#0C8F96",fg="white").grid(row=6, column=0, columnspan=2, pady=10)
 
         # Frame for Task Display
         display_frame = tk.LabelFrame(self.master, text="  Task List  ", padx=10, pady=10)
         display_frame.grid(row=0, column=1, rowspan=2, padx=10, pady=10, sticky="nsew")
         
-        self.output_text = tk.Text(display_frame, width=65, height=20, wrap=tk.WORD)
-        self.output_text.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
-        self.output_text.config(state=tk.DISABLED)
+        # Which task list (profile) is showing
+        profile_frame = tk.Frame(display_frame)
+        profile_frame.pack(padx=5, fill=tk.X)
+        tk.Label(profile_frame, text="List:").pack(side=tk.LEFT)
+        self.profile_var = tk.StringVar(value=DEFAULT_PROFILE)
+        self.profile_box = ttk.Combobox(profile_frame, textvariable=self.profile_var, state="readonly", width=45,
+                                        postcommand=self._list_profiles)
+        self.profile_box.pack(side=tk.LEFT, padx=5)
+        self.profile_box.bind("<<ComboboxSelected>>", lambda event: self.switch_profile(self._profile_names[self.profile_box.current()]))
+        self.new_list_button = tk.Button(profile_frame, text="New List", command=self.new_profile, bg="#B0C4DE")
+        self.new_list_button.pack(side=tk.LEFT)
+        self._profile_names = []
+
+        # Filter bar: only show the tasks matching a search (see task_index.py)
+        filter_frame = tk.Frame(display_frame)
+        filter_frame.pack(padx=5, pady=(5, 0), fill=tk.X)
+        tk.Label(filter_frame, text="Find:").pack(side=tk.LEFT)
+        self.filter_text_entry = tk.Entry(filter_frame, width=20)
+        self.filter_text_entry.pack(side=tk.LEFT, padx=5)
+        self.filter_type_var = tk.StringVar(value="All")
+        ttk.Combobox(filter_frame, textvariable=self.filter_type_var, values=("All", "Need", "Want"),
+                     state="readonly", width=6).pack(side=tk.LEFT)
+        self.filter_priority_var = tk.BooleanVar()
+        tk.Checkbutton(filter_frame, text="(!) only", variable=self.filter_priority_var,
+                       command=self.apply_filter).pack(side=tk.LEFT, padx=5)
+        tk.Label(filter_frame, text="Mins:").pack(side=tk.LEFT)
+        self.filter_min_entry = tk.Entry(filter_frame, width=4)
+        self.filter_min_entry.pack(side=tk.LEFT)
+        tk.Label(filter_frame, text="to").pack(side=tk.LEFT)
+        self.filter_max_entry = tk.Entry(filter_frame, width=4)
+        self.filter_max_entry.pack(side=tk.LEFT)
+        tk.Button(filter_frame, text="Clear", command=self.clear_filter, bg="#B0C4DE").pack(side=tk.LEFT, padx=5)
+        for entry in (self.filter_text_entry, self.filter_min_entry, self.filter_max_entry):
+            entry.bind("<KeyRelease>", lambda event: self.apply_filter()) #searches are quick enough to run per key
+        self.filter_type_var.trace_add("write", lambda *args: self.apply_filter())
+
+        list_frame = tk.Frame(display_frame)
+        list_frame.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
+
+        self.list_scrollbar = tk.Scrollbar(list_frame, command=self._on_scrollbar)
+        self.list_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # The task list is drawn on a canvas, only the rows in view (see task_view.py)
+        self.list_canvas = tk.Canvas(list_frame, width=600, height=440, bd=0, highlightthickness=0,
+                                     bg="white", yscrollcommand=self._on_list_scroll)
+        self.list_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.list_canvas.bind(sequence, self._on_mousewheel)
         
         # ADDED: Time Summary Label
         self.time_summary_label = tk.Label(display_frame, text="Estimated Time: 0 mins", anchor="w", font="{Bahnschrift SemiLight} 10")
         self.time_summary_label.pack(pady=(5, 0), fill=tk.X)
+
+        # Time planner: which tasks fit best into the time you have free
+        plan_frame = tk.Frame(display_frame)
+        plan_frame.pack(pady=(5, 0), fill=tk.X)
+        tk.Label(plan_frame, text="Free time (mins):").pack(side=tk.LEFT)
+        self.plan_budget_entry = tk.Entry(plan_frame, width=6)
+        self.plan_budget_entry.pack(side=tk.LEFT, padx=5)
+        self.plan_budget_entry.bind('<Return>', lambda event: self.plan_time())
+        tk.Button(plan_frame, text="Plan", command=self.plan_time, bg="#0C8F96", fg="white").pack(side=tk.LEFT)
+        self.plan_label = tk.Label(plan_frame, text="", anchor="w", font="{Bahnschrift SemiLight} 10")
+        self.plan_label.pack(side=tk.LEFT, padx=10, fill=tk.X, expand=True)
+
+        self.save_status_label = tk.Label(display_frame, text="", anchor="w", fg="grey40", font="{Bahnschrift SemiLight} 9")
+        self.save_status_label.pack(fill=tk.X)
     
 
         # Frame for Control Buttons and Completion
@@ -127,68 +421,225 @@ class TimeManagementApp:
         tk.Button(control_frame, text="Tick off!", command=self.complete_task, width=15, bg="#354871", fg="white").grid(row=0, column=2, padx=15, pady=5, sticky="e")
         control_frame.grid_columnconfigure(2, weight=1)
 
+        # How long the task really took - optional, goes in the completion history (see history.py)
+        tk.Label(control_frame, text="Took (mins):").grid(row=1, column=0, sticky="w", pady=5, padx=5)
+        self.completion_took_entry = tk.Entry(control_frame, width=8)
+        self.completion_took_entry.grid(row=1, column=1, sticky="w", pady=5, padx=5)
+        self.completion_took_entry.bind('<Return>', lambda event: self.complete_task())
+
+        tk.Button(control_frame, text="Stats...", command=self.show_stats, width=15, bg="#B0C4DE").grid(row=1, column=2, padx=15, pady=5, sticky="e")
+
         # Edit Task Input and Button
-        tk.Label(control_frame, text="Edit Task ID:").grid(row=1, column=0, sticky="w", pady=5, padx=5)
+        tk.Label(control_frame, text="Edit Task ID:").grid(row=2, column=0, sticky="w", pady=5, padx=5)
         self.edit_id_entry = tk.Entry(control_frame, width=8)
-        self.edit_id_entry.grid(row=1, column=1, sticky="w", pady=5, padx=5)
+        self.edit_id_entry.grid(row=2, column=1, sticky="w", pady=5, padx=5)
         self.edit_id_entry.bind('<Return>', lambda event: self.edit_task())
         
-        tk.Button(control_frame, text="Edit Task", command=self.edit_task, width=15, bg="#B0C4DE").grid(row=1, column=2, padx=15, pady=5, sticky="e")
+        tk.Button(control_frame, text="Edit Task", command=self.edit_task, width=15, bg="#B0C4DE").grid(row=2, column=2, padx=15, pady=5, sticky="e")
 
         separator = tk.Frame(control_frame, height=2, bd=1, relief=tk.SUNKEN, bg="light grey")
-        separator.grid(row=2, column=0, columnspan=3, sticky="ew", pady=(10, 5))
+        separator.grid(row=3, column=0, columnspan=3, sticky="ew", pady=(10, 5))
         
-        tk.Button(control_frame, text="Save Current Data", command=self.save_current_data, width=20, bg="#7D3096", fg="white").grid(row=3, column=0, padx=5, pady=5)
-        tk.Button(control_frame, text="Clear Tasks", command=self.clear_all_data, width=15, bg="#AA1730", fg="white").grid(row=3, column=1, padx=5, pady=5)
-        tk.Button(control_frame, text="Import Previous Data", command=self.import_data_manually, width=20,bg="#E488DF", fg="black").grid(row=4, column=0, padx=5, pady=5)
-        tk.Button(control_frame, text="Exit App", command=self.exit_application, width=15, bg="#FA8072").grid(row=4, column=1, padx=5, pady=5)
+        tk.Button(control_frame, text="Save Current Data", command=self.save_current_data, width=20, bg="#7D3096", fg="white").grid(row=4, column=0, padx=5, pady=5)
+        tk.Button(control_frame, text="Clear Tasks", command=self.clear_all_data, width=15, bg="#AA1730", fg="white").grid(row=4, column=1, padx=5, pady=5)
+        self.import_save_button = tk.Button(control_frame, text="Import Previous Data", command=self.import_data_manually, width=20,bg="#E488DF", fg="black")
+        self.import_save_button.grid(row=5, column=0, padx=5, pady=5)
+        tk.Button(control_frame, text="Exit App", command=self.exit_application, width=15, bg="#FA8072").grid(row=5, column=1, padx=5, pady=5)
+        tk.Button(control_frame, text="Import File...", command=self.import_file, width=20, bg="#B0C4DE").grid(row=6, column=0, padx=5, pady=5)
+        tk.Button(control_frame, text="Export File...", command=self.export_file, width=15, bg="#B0C4DE").grid(row=6, column=1, padx=5, pady=5)
+
+        self.undo_button = tk.Button(control_frame, text="Undo", command=self.undo, width=15, bg="#B0C4DE", state=tk.DISABLED)
+        self.undo_button.grid(row=4, column=2, padx=15, pady=5, sticky="e")
+        self.redo_button = tk.Button(control_frame, text="Redo", command=self.redo, width=15, bg="#B0C4DE", state=tk.DISABLED)
+        self.redo_button.grid(row=5, column=2, padx=15, pady=5, sticky="e")
+        self.master.bind("<Control-z>", lambda event: self.undo())
+        self.master.bind("<Control-y>", lambda event: self.redo())
+        self.master.bind("<Control-Z>", lambda event: self.redo()) #Ctrl+Shift+Z
+
+    def _on_scrollbar(self, *args):
+        """Scrollbar callback for the task list."""
+        self.list_canvas.yview(*args)
+
+    def _on_list_scroll(self, first, last):
+        """Moves the scrollbar and draws the rows that have scrolled into view."""
+        self.list_scrollbar.set(first, last)
+        self.view.refresh()
+
+    def _on_mousewheel(self, event):
+        # canvases don't scroll with the wheel on their own
+        if event.num == 4 or event.delta > 0:
+            self.list_canvas.yview_scroll(-3, "units")
+        else:
+            self.list_canvas.yview_scroll(3, "units")
+        return "break"
+
+    def _list_profiles(self):
+        """Fills the list picker with every profile and its cached summary."""
+        self._profile_names = self.profiles.names()
+        self.profile_box["values"] = [self.profiles.describe(name) for name in self._profile_names]
+
+    def switch_profile(self, name):
+        """Saves anything pending on the current list, then shows another one."""
+        if name == self.profile.name:
+            self.profile_var.set(name)
+            return
+        self._finish_loading()
+        try:
+            self.autosaver.flush()
+        except Exception:
+            messagebox.showerror("Save Error", "ERROR: Could not save data to file.")
+            self.profile_var.set(self.profile.name)
+            return
+        self.profiles.remember(self.profile)
+
+        try:
+            profile = self.profiles.get(name)
+        except Exception:
+            messagebox.showerror("Error", f"The '{name}' list could not be loaded. Its save file may be corrupted.")
+            self.profile_var.set(self.profile.name)
+            return
+        self._show_profile(profile)
+
+    def new_profile(self):
+        """Asks for a name and starts a new, empty task list."""
+        from tkinter import simpledialog
+        name = simpledialog.askstring("New List", "Name for the new task list:", parent=self.master)
+        if not name:
+            return
+        self._finish_loading()
+        try:
+            self.autosaver.flush()
+            self.profiles.remember(self.profile)
+            profile = self.profiles.create(name)
+        except ValueError as error:
+            messagebox.showerror("New List", str(error))
+            return
+        except Exception:
+            messagebox.showerror("Save Error", "ERROR: Could not save data to file.")
+            return
+        self._show_profile(profile)
+
+    def _show_profile(self, profile):
+        self.profile = profile
+        self.store = profile.store
+        self.autosaver.switch_to(profile.save_file, profile.store)
+        self._forget_undo()
+        self.profile_var.set(profile.name)
+        self.master.title("Time Management Helper" if profile.name == DEFAULT_PROFILE
+                          else f"Time Management Helper - {profile.name}")
+        self.plan_label.config(text="")
+        self.refresh_display()
 
     def clear_all_data(self):
         """Clears all tasks (wants and needs) from the current session."""
         
-        if not (self.wants or self.needs):
+        if not len(self.store):
             messagebox.showinfo("Info", "The task lists are already empty.")
             return
             
         response = messagebox.askyesno(
             "Confirm Clear",
             """WARNING: This will DELETE all tasks within the task window\n
-You may want to save before proceeding!)\nDo you want to proceed?"""
+(Undo brings them back)\nDo you want to proceed?"""
         )
         
-        if response:
-            self.wants.clear()
-            self.needs.clear()
-            self.sort_and_display()
+        if response and self.remote is not None:
+            self._send("clear") #the lists empty when the server says they have
+        elif response:
+            cleared = len(self.store)
+            before = self.store.snapshot() #the old lists themselves - nothing is copied
+            self.store.clear()
+            self._record_undo(Replaced(before, self.store.snapshot(), f"clear of {cleared} tasks"))
+            self.refresh_display()
+            self.autosaver.mark_dirty()
             messagebox.showinfo("Success", "Task window cleared.")
             
-    def _perform_task_removal(self, task_to_remove):
-        """Internal helper to remove the task from the main lists."""
-        task_name = task_to_remove['name']
-        task_type = task_to_remove['type']
-        
-        def is_match(t, target):
-            return (t['name'] == target['name'] and 
-                    t['time'] == target['time'] and 
-                    t['priority'] == target['priority'])
+    def _insert_task(self, task, task_type):
+        """Adds a task to the store and slots it into place on screen."""
+        rank = self.store.add(task, task_type)
+        self.view.insert_row(task_type, rank, task)
+        self._watch_deadlines()
+
+    def _watch_deadlines(self):
+        """Sets one Tk timer for the next moment a deadline moves a task up (see schedule.py).
+
+        Cheap - it only looks at the soonest deadline - so it's called after anything that adds tasks."""
+        when = self.store.next_deadline()
+        if self._deadline_timer is not None:
+            if self._deadline_timer[0] == when:
+                return
+            self.master.after_cancel(self._deadline_timer[1])
+            self._deadline_timer = None
+        if when is not None:
+            delay = min(max(int((when - time.time()) * 1000), 0), MAX_TIMER_MS)
+            self._deadline_timer = (when, self.master.after(delay, self._deadline_reached))
+
+    def _deadline_reached(self):
+        self._deadline_timer = None
+        now = time.time()
+        moved = self.store.catch_up(now)
+        if moved:
+            self.refresh_display() #moved up their lists (this also sets the next timer)
+            due = [task for task in moved if task.due <= now]
+            if due:
+                self._remind(due)
+        else:
+            self._watch_deadlines()
+
+    def _remind(self, tasks):
+        names = "\n".join(f"  - {task.name}" for task in tasks[:10])
+        more = f"\n  ...and {len(tasks) - 10} more" if len(tasks) > 10 else ""
+        self._show_save_status(f"Due now: {', '.join(task.name for task in tasks[:3])}")
+        self.master.bell()
+        messagebox.showinfo("Reminder", f"Due now:\n{names}{more}")
+
+    def _remove_task(self, task_id):
+        """Removes a task (by its permanent ID) from the store and from the screen.
 
-        # Find the index of the first matching task
-        target_list = self.needs if task_type == 'need' else self.wants
+        Returns store.remove's (type, rank, task), or None if it had already gone."""
+        removed = self.store.remove(task_id)
+        if removed is None:
+            return None
+        task_type, rank, task = removed
+        self.view.delete_row(task_type, rank, task)
+        return removed
+
+    @timed("complete")
+    def _perform_task_removal(self, task_id, actual=None):
+        """Internal helper to remove the task from the main lists."""
+        # Does nothing if the task has already gone (e.g. the lists were cleared meanwhile)
+        if self.remote is not None:
+            self._send("complete", ids=[task_id], actual=actual) #the server logs it (and adds the next one if it repeats)
+            return
+        completed = self.store.complete(task_id)
+        if completed is None:
+            return
+        task_type, rank, task, following = completed
+        self._record_undo(Completed(task, task_type, following))
+        self.view.delete_row(task_type, rank, task)
+        if following is not None: #a repeating task comes back, due next time round
+            self.view.insert_row(task_type, self.store.list_for(task_type).index(following), following)
+            self._watch_deadlines()
+        self.autosaver.mark_dirty()
+        from adaptive import apply_weights, learner_for
+        from history import CompletionLog, history_path, passed_over
+        path = self.profile.save_file.path
         try:
-            index_to_remove=next(i for i, item in enumerate(target_list) if is_match(item, task_to_remove))
-            del target_list[index_to_remove]
-        except StopIteration:
-            # Should not happen if called correctly, but handles case where task is missing
-            pass
-        
-        self.sort_and_display()
+            CompletionLog(history_path(path)).record(task, task_type, rank, actual, others=passed_over(self.store, task_type))
+            learner = learner_for(path)
+            learner.update() #only reads the tick-offs since the last one
+        except OSError:
+            self._show_save_status("Could not add that to the completion history")
+            return
+        if apply_weights(self.store, learner.weights()): #re-sorts once the weights have really moved
+            self.refresh_display()
 
     def edit_task(self):
         """Prepares to edit a task based on its ID."""
         task_id_str = self.edit_id_entry.get().strip()
         self.edit_id_entry.delete(0, tk.END)
 
-        if not self.current_tasks:
+        if not len(self.store):
             messagebox.showinfo("Error", "The task list is empty. Nothing to edit.")
             return
 
@@ -198,49 +649,82 @@ You may want to save before proceeding!)\nDo you want to proceed?"""
             messagebox.showerror("Error", "Please enter a valid number for the Task ID to edit.")
             return
 
-        if 1 <= task_id <= len(self.current_tasks):
-            task_to_edit = self.current_tasks[task_id - 1]
+        if 1 <= task_id <= len(self.store):
+            task_to_edit, task_type, _ = self.store.task_at(task_id)
             # Open the edit pop-up window
-            self._open_edit_window(task_to_edit, task_id)
+            self._open_edit_window(task_to_edit, task_type, task_id)
         else:
-            messagebox.showerror("Error", f"ID {task_id} is out of range. Please enter an ID from 1 to {len(self.current_tasks)}.")
+            messagebox.showerror("Error", f"ID {task_id} is out of range. Please enter an ID from 1 to {len(self.store)}.")
     
-    def _open_edit_window(self, task, original_id):
-        """Creates a new window for editing a task."""
-        edit_window = tk.Toplevel(self.master)
-        edit_window.title(f"Edit Task {original_id}")
-        edit_window.grab_set() # Modal window
+    def _open_edit_window(self, task, task_type, original_id):
+        """Shows the edit pop-up for a task (the window is built once, then reused)."""
+        if self._edit_window is None:
+            self._build_edit_window()
+        self._editing = (task, original_id)
+
+        self._edit_window.title(f"Edit Task {original_id}")
+        self._edit_frame.config(text=f"Edit Task: {task.name}")
+        self._edit_name_var.set(task.name)
+        self._edit_time_var.set(str(task.time))
+        self._edit_due_var.set("" if task.due is None else format_due(task.due).replace("T", " "))
+        self._edit_repeat_var.set(repeat_name(task.repeat) or "")
+        self._edit_priority_var.set(task.priority)
+        self._edit_type_var.set(task_type)
+        self._edit_window.deiconify()
+        self._edit_window.grab_set() # Modal window
+
+    def _build_edit_window(self):
+        edit_window = self._edit_window = tk.Toplevel(self.master)
         edit_window.transient(self.master)
+        edit_window.protocol("WM_DELETE_WINDOW", self._close_edit_window)
 
-        edit_frame = tk.LabelFrame(edit_window, text=f"Edit Task: {task['name']}", padx=10, pady=10)
+        edit_frame = self._edit_frame = tk.LabelFrame(edit_window, text="Edit Task", padx=10, pady=10)
         edit_frame.pack(padx=20, pady=20)
 
         # Name
         tk.Label(edit_frame, text="Task Name:").grid(row=0, column=0, pady=2, sticky="ew")
-        edit_name_var = tk.StringVar(value=task['name'])
-        tk.Entry(edit_frame, width=25, textvariable=edit_name_var).grid(row=0, column=1, padx=5, pady=5)
+        self._edit_name_var = tk.StringVar()
+        tk.Entry(edit_frame, width=25, textvariable=self._edit_name_var).grid(row=0, column=1, padx=5, pady=5)
         
         # Time
         tk.Label(edit_frame, text="Time (mins):").grid(row=1, column=0, sticky="w", pady=2)
-        edit_time_var = tk.StringVar(value=str(task['time']))
-        tk.Entry(edit_frame, width=10, textvariable=edit_time_var).grid(row=1, column=1, sticky="w", padx=5, pady=2)
+        self._edit_time_var = tk.StringVar()
+        tk.Entry(edit_frame, width=10, textvariable=self._edit_time_var).grid(row=1, column=1, sticky="w", padx=5, pady=2)
+
+        # Deadline and repeat (blank for none)
+        tk.Label(edit_frame, text="Due:").grid(row=2, column=0, sticky="w", pady=2)
+        self._edit_due_var = tk.StringVar()
+        tk.Entry(edit_frame, width=18, textvariable=self._edit_due_var).grid(row=2, column=1, sticky="w", padx=5, pady=2)
+        tk.Label(edit_frame, text="Repeat:").grid(row=3, column=0, sticky="w", pady=2)
+        self._edit_repeat_var = tk.StringVar()
+        ttk.Combobox(edit_frame, textvariable=self._edit_repeat_var, values=REPEAT_CHOICES, width=15).grid(row=3, column=1, sticky="w", padx=5, pady=2)
         
         # Priority
-        edit_priority_var = tk.BooleanVar(value=task['priority'])
-        tk.Checkbutton(edit_frame, text="High Priority?", variable=edit_priority_var).grid(row=2, column=0, sticky="w", pady=5)
+        self._edit_priority_var = tk.BooleanVar()
+        tk.Checkbutton(edit_frame, text="High Priority?", variable=self._edit_priority_var).grid(row=4, column=0, sticky="w", pady=5)
         
         # Type (Need/Want)
-        edit_type_var = tk.StringVar(value=task['type'])
-        tk.Radiobutton(edit_frame, text="Need to do", variable=edit_type_var, value="need").grid(row=3, column=0, sticky="w")
-        tk.Radiobutton(edit_frame, text="Want to do", variable=edit_type_var, value="want").grid(row=3, column=1, sticky="w")
+        self._edit_type_var = tk.StringVar()
+        tk.Radiobutton(edit_frame, text="Need to do", variable=self._edit_type_var, value="need").grid(row=5, column=0, sticky="w")
+        tk.Radiobutton(edit_frame, text="Want to do", variable=self._edit_type_var, value="want").grid(row=5, column=1, sticky="w")
         
         # Save Button
-        tk.Button(edit_frame, text="Save Changes", bg="#98FB98", 
-                  command=lambda: self._save_edited_task(original_id, edit_name_var.get(), 
-                                                        edit_time_var.get(), edit_priority_var.get(), 
-                                                        edit_type_var.get(), edit_window)).grid(row=4, column=0, columnspan=2, pady=10)
-        
-    def _save_edited_task(self, original_id, new_name, new_time_str, new_priority, new_type, edit_window):
+        tk.Button(edit_frame, text="Save Changes", bg="#98FB98",
+                  command=self._submit_edit).grid(row=6, column=0, columnspan=2, pady=10)
+
+    def _submit_edit(self):
+        task, original_id = self._editing
+        # task.id is read now, not when the window opened - the task may have been renumbered since
+        self._save_edited_task(task.id, original_id, self._edit_name_var.get(), self._edit_time_var.get(),
+                               self._edit_priority_var.get(), self._edit_type_var.get(), self._edit_window,
+                               self._edit_due_var.get(), self._edit_repeat_var.get())
+
+    def _close_edit_window(self):
+        self._edit_window.grab_release()
+        self._edit_window.withdraw() # hidden, ready for the next edit
+
+    def _save_edited_task(self, task_id, original_id, new_name, new_time_str, new_priority, new_type, edit_window,
+                          new_due_str="", new_repeat_str=""):
         """Validates and saves the edited task."""
 
         new_name = new_name.strip()
@@ -256,47 +740,47 @@ You may want to save before proceeding!)\nDo you want to proceed?"""
             messagebox.showerror("Input Error", "Please enter a whole number between 1 and 300 for Time (minutes).", parent=edit_window)
             return
 
-        # 1. Remove the original task from its list using its data from current_tasks
-        old_task_data = self.current_tasks[original_id - 1]
-        
-        # Determine the correct list and index to remove from self.needs or self.wants
-        target_list = self.needs if old_task_data['type'] == 'need' else self.wants
-        
-        def is_match(t, target):
-            return (t['name'] == target['name'] and 
-                    t['time'] == target['time'] and 
-                    t['priority'] == target['priority'])
-            
-        try:
-            index_to_remove = next(i for i, item in enumerate(target_list) if is_match(item, old_task_data))
-            del target_list[index_to_remove]
-        except StopIteration:
+        schedule = self._read_schedule(new_due_str, new_repeat_str, edit_window)
+        if schedule is None:
+            return
+        new_due, new_repeat = schedule
+
+        if self.remote is not None:
+            # the row moves when the server announces the edit
+            self._send("edit", id=task_id, name=new_name, time=new_time, priority=new_priority, type=new_type,
+                       due=format_due(new_due), repeat=new_repeat)
+            self._close_edit_window()
+            return
+
+        # 1. Swap the new/edited task in for the original (it keeps the same permanent ID)
+        new_task = Task(new_name, new_time, new_priority, task_id, due=new_due, repeat=new_repeat)
+        edited = self.store.edit(task_id, new_task, new_type)
+
+        if edited is None:
             messagebox.showwarning("Warning", "Original task could not be found for removal.", parent=edit_window)
-            
-        # 2. Create and add the new/edited task
-        new_task = {
-            "time": new_time,
-            "priority": new_priority,
-            "name": new_name
-        }
-
-        if new_type == "need":
-            self.needs.append(new_task)
+            self._insert_task(new_task, new_type)
+            self._record_undo(Added([(new_task, new_type)]))
         else:
-            self.wants.append(new_task)
+            # 2. Move its row on screen
+            old_type, old_rank, old_task, new_rank = edited
+            self._record_undo(Edited(old_task, old_type, new_task, new_type))
+            self.view.delete_row(old_type, old_rank, old_task)
+            self.view.insert_row(new_type, new_rank, new_task)
+            self._watch_deadlines()
+        self.autosaver.mark_dirty()
 
-        # 3. Close window and refresh
-        edit_window.destroy()
-        self.sort_and_display()
+        # 3. Close window
+        self._close_edit_window()
         messagebox.showinfo("Success", f"Task {original_id} successfully updated.")
 
     def complete_task(self):
         """Marks a task for animation, then schedules its removal."""
         
         task_id_str = self.completion_id_entry.get().strip()
+        took_str = self.completion_took_entry.get()
         self.completion_id_entry.delete(0, tk.END)
 
-        if not self.current_tasks:
+        if not len(self.store):
             messagebox.showinfo("Error", "The task list is empty.")
             return
 
@@ -306,27 +790,33 @@ You may want to save before proceeding!)\nDo you want to proceed?"""
             messagebox.showerror("Error", "Please enter a valid number for the Task ID.")
             return
 
-        if 1 <= task_id <= len(self.current_tasks):
-            task_to_remove = self.current_tasks[task_id - 1]
+        from history import parse_actual
+        try:
+            actual = parse_actual(took_str)
+        except ValueError as error:
+            messagebox.showerror("Error", f"Took (mins): {error}.")
+            return
+        self.completion_took_entry.delete(0, tk.END)
+
+        if 1 <= task_id <= len(self.store):
+            task_to_remove, _, _ = self.store.task_at(task_id)
             
             # Apply the color tag for the visual confirmation
-            self.output_text.config(state=tk.NORMAL)
-            insert_index = f"task_{task_id}.first"
-            self.output_text.insert(insert_index, "✅ ")
-            # Tag the entire line based on the unique tag index
-            self.output_text.tag_add("completed", f"task_{task_id}.first", f"task_{task_id}.last")
-            self.output_text.config(state=tk.DISABLED)
-
-            # Schedule the actual removal and list refresh after 1 second (1000 milliseconds)
-            self.master.after(1000, lambda: self._perform_task_removal(task_to_remove))
+            self.view.mark_completed(task_id)
+
+            # Schedule the actual removal after 1 second (1000 milliseconds)
+            count("complete.scheduled")
+            self.master.after(1000, lambda: self._perform_task_removal(task_to_remove.id, actual))
         else:
-            messagebox.showerror("Error", f"ID {task_id} is out of range. Please enter an ID from 1 to {len(self.current_tasks)}.")
+            messagebox.showerror("Error", f"ID {task_id} is out of range. Please enter an ID from 1 to {len(self.store)}.")
             
     def import_data_manually(self):
         """Allows user to import previous save data, overwriting current lists."""
-        wants, needs, date = get_save_data()
+        self._finish_loading()
+        wants, needs, date = get_save_data(self.profile.save_file)
 
-        if self.wants==wants and self.needs==needs:
+        current_needs, current_wants = self.store.as_lists()
+        if current_wants==wants and current_needs==needs:
             response = messagebox.showinfo(
             "Importing Save Data",
             f"Import Unecessary.\nThe save data (from:{date}) is identical to your current tasks.")
@@ -336,19 +826,157 @@ You may want to save before proceeding!)\nDo you want to proceed?"""
             if date:
                 response = messagebox.askyesno(
                 "Importing Save Data",
-                f"Data found from {date}.\nDo you want to proceed?\n\nWarning: this will replace currently added tasks.")
+                f"Data found from {date}.\nDo you want to proceed?\n\nWarning: this will replace currently added tasks (Undo brings them back).")
                                 
                 if response:
-                    self.wants=wants
-                    self.needs=needs
-                    self.sort_and_display()
+                    before = self.store.snapshot()
+                    self.store.replace(needs, wants)
+                    self.store.mark_saved()
+                    self._record_undo(Replaced(before, self.store.snapshot(), f"import of the save from {date}"))
+                    self.refresh_display()
                     #messagebox.showinfo("Import Success","Successfully imported data.")
             else:
                 messagebox.showerror("Import Failed.","Could not import data.")
 
+
+    def import_file(self):
+        """Adds every task in a CSV or JSON Lines file (see task_io.py) to the current list."""
+        from tkinter import filedialog
+        path = filedialog.askopenfilename(title="Import Tasks", parent=self.master,
+                                          filetypes=[("CSV or JSON Lines", "*.csv *.jsonl *.ndjson")])
+        if not path:
+            return
+        self._finish_loading()
+        from task_io import read_chunks
+        self._show_save_status("Importing...")
+        # The file is read and checked on a worker thread a chunk at a time; the chunks go in on
+        # this one as they come, and the reader waits while two are queued, so memory stays bounded
+        chunks = queue.Queue(maxsize=2)
+
+        def read():
+            try:
+                for chunk in read_chunks(path):
+                    chunks.put((chunk, None))
+            except Exception as error:
+                chunks.put((None, error))
+            else:
+                chunks.put((None, None)) #the end of the file
+        threading.Thread(target=read, daemon=True).start()
+        progress = {"count": 0, "added": [], "skipped": 0, "errors": []} #added: (task, kind) for the undo
+        self.master.after(POLL_MS, lambda: self._take_import_chunk(chunks, progress))
+
+    def _take_import_chunk(self, chunks, progress):
+        """Adds the next chunk read_chunks has checked, then waits for the one after."""
+        try:
+            chunk, error = chunks.get_nowait()
+        except queue.Empty:
+            self.master.after(POLL_MS, lambda: self._take_import_chunk(chunks, progress))
+            return
+        if chunk is None:
+            self._finish_import(progress, error)
+            return
+
+        from task_io import MAX_ERRORS, add_batches
+        batches, skipped, errors = chunk
+        if self.remote is not None:
+            tasks = [{"name": task.name, "time": task.time, "priority": task.priority, "type": kind}
+                     for kind, batch in batches.items() for task in batch]
+            if tasks:
+                self._send("extend", tasks=tasks) #they show up with the server's "added" event
+        else:
+            progress["added"].extend((task, kind) for kind, batch in batches.items() for task in batch) #for undo
+            add_batches(self.store, batches) # one score + sort per list
+            self.refresh_display() # and one redraw
+            if any(batches.values()):
+                self.autosaver.mark_dirty()
+        progress["count"] += sum(len(batch) for batch in batches.values())
+        progress["skipped"] += skipped
+        progress["errors"].extend(errors[:MAX_ERRORS - len(progress["errors"])])
+        self._show_save_status(f"Importing... {progress['count']} tasks so far")
+        self.master.after(1, lambda: self._take_import_chunk(chunks, progress))
+
+    def _finish_import(self, progress, error):
+        added, skipped, errors = progress["count"], progress["skipped"], progress["errors"]
+        if progress["added"] and self.remote is None:
+            self._record_undo(Added(progress["added"])) #the whole import is one undo
+        self._show_save_status("")
+        if error is not None:
+            message = f"Could not import the file:\n{error}"
+            if added:
+                message += f"\n\nThe {added} tasks read before that were imported."
+            messagebox.showerror("Import Failed", message)
+            return
+
+        message = f"Imported {added} tasks into '{self.profile.name}'."
+        if skipped:
+            message += f"\n\n{skipped} rows were skipped:\n" + "\n".join(errors)
+            if skipped > len(errors):
+                message += "\n..."
+        messagebox.showinfo("Import", message)
+
+    def export_file(self):
+        """Writes every task to a CSV or JSON Lines file (see task_io.py)."""
+        from tkinter import filedialog
+        path = filedialog.asksaveasfilename(title="Export Tasks", parent=self.master, defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+        self._finish_loading()
+        from task_io import export_tasks, task_rows
+        try:
+            written = export_tasks(task_rows(self.store), path)
+        except Exception as error:
+            messagebox.showerror("Export Failed", f"Could not export the tasks:\n{error}")
+            return
+        messagebox.showinfo("Export", f"Exported {written} tasks.")
+
+    def show_stats(self):
+        """Shows what the completion history says: throughput, minutes per day, estimate accuracy."""
+        if self.remote is not None:
+            self._send("stats", lambda future: self._show_stats(None if future.exception() else future.result(),
+                                                                future.exception()))
+            return
+        from history import CompletionLog, HistoryStats, history_path
+        path = history_path(self.profile.save_file.path)
+        if self._stats is None or self._stats.log.path != path:
+            self._stats = HistoryStats(CompletionLog(path))
+        stats = self._stats
+        # the log is read on a worker thread - only the part added since last time
+        self._in_background(lambda: stats.update().summary(), self._show_stats)
+
+    def _show_stats(self, summary, error):
+        if error is not None:
+            messagebox.showerror("Stats", f"Could not read the completion history:\n{error}")
+            return
+        from history import summary_lines
+        window = tk.Toplevel(self.master)
+        window.title(f"Stats - {self.profile.name}")
+        window.transient(self.master)
+        text = "\n".join(summary_lines(summary))
+        tk.Label(window, text=text, justify=tk.LEFT, anchor="w", font="TkFixedFont").pack(padx=15, pady=15)
+        tk.Button(window, text="Close", command=window.destroy, bg="#B0C4DE").pack(pady=(0, 10))
+
+    def _in_background(self, work, done):
+        """Runs work() on a worker thread, then done(result, error) back on the Tk thread."""
+        outcome = {}
+
+        def run():
+            try:
+                outcome["result"] = work()
+            except Exception as error:
+                outcome["error"] = error
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+
+        def check():
+            if thread.is_alive():
+                self.master.after(POLL_MS, check)
+            else:
+                done(outcome.get("result"), outcome.get("error"))
+        self.master.after(POLL_MS, check)
         
     def add_task(self):
-        """Validates input, creates a task dictionary, and adds it to the list."""
+        """Validates input, creates a Task, and adds it to the list."""
         
         task_name = self.task_name_entry.get().strip().title()
         task_time_str = self.task_time_entry.get().strip()
@@ -367,115 +995,171 @@ You may want to save before proceeding!)\nDo you want to proceed?"""
             messagebox.showerror("Input Error", "Please enter a whole number between 1 and 300 for Time (minutes).")
             return
 
-        new_task = {
-            "time": task_time,
-            "priority": priority,
-            "name": task_name
-        }
+        schedule = self._read_schedule(self.task_due_entry.get(), self.repeat_var.get())
+        if schedule is None:
+            return
+        due, repeat = schedule
 
-        if task_type == "need":
-            self.needs.append(new_task)
+        if self.remote is not None:
+            self._send("add", name=task_name, time=task_time, priority=priority, type=task_type,
+                       due=format_due(due), repeat=repeat)
         else:
-            self.wants.append(new_task)
+            new_task = Task(task_name, task_time, priority, due=due, repeat=repeat)
+            self._insert_task(new_task, task_type)
+            self._record_undo(Added([(new_task, task_type)]))
+            self.autosaver.mark_dirty()
 
         self.task_name_entry.delete(0, tk.END)
         self.task_time_entry.delete(0, tk.END)
+        self.task_due_entry.delete(0, tk.END)
+        self.repeat_var.set("")
         self.priority_var.set(False)
-        
-        self.sort_and_display()
 
-    def sort_and_display(self):
-        """Calculates scores, sorts the lists, updates the display area, and updates the time summary."""
-        
-        self.current_tasks = []
-        task_id = 1
-        total_need_time = 0
-        total_want_time = 0
-        
-        self.output_text.config(state=tk.NORMAL)
-        self.output_text.delete('1.0', tk.END)
-
-        # NEEDS list processing
-        for task in self.needs:
-            task["score"] = priority_score(task)
-            total_need_time += task['time']
-        self.needs.sort(key=lambda task: task["score"], reverse=True)
-        
-        self.output_text.insert(tk.END, "You need to do:\n","heading_ul")
-        for task in self.needs:
-            priority_mark = " (!)" if task["priority"] else ""
-            line = f" {task_id}. {task['name']} ~ {task['time']} mins{priority_mark}\n"
-            
-            self.output_text.insert(tk.END, line, f"task_{task_id}")
-            
-            # Store full task details for removal/editing
-            self.current_tasks.append({'name': task['name'], 'time': task['time'], 'priority': task['priority'], 'type': 'need'})
-            task_id += 1
-        if not self.needs:
-            self.output_text.insert(tk.END, " No Need tasks added.\n")
-
-
-        # WANTS list processing
-        for task in self.wants:
-            task["score"] = priority_score(task)
-            total_want_time += task['time']
-        self.wants.sort(key=lambda task: task["score"], reverse=True)
-        
-        self.output_text.insert(tk.END, "\nYou want to do:\n","heading_ul")
-        for task in self.wants:
-            priority_mark = " (!)" if task["priority"] else ""
-            line = f" {task_id}. {task['name']} ~ {task['time']} mins{priority_mark}\n"
-            
-            self.output_text.insert(tk.END, line, f"task_{task_id}")
-            
-            # Store full task details for removal/editing
-            self.current_tasks.append({'name': task['name'], 'time': task['time'], 'priority': task['priority'], 'type': 'want'})
-            task_id += 1
-        if not self.wants:
-            self.output_text.insert(tk.END, "  No Want tasks added.\n")
-
-        # Update display
-        self.output_text.config(state=tk.DISABLED)
-        
-        total_time_mins = total_need_time + total_want_time
-        
-        def convert_minutes_to_h_m(total_minutes):
-            """Converts total minutes into a string format: X hours Y minutes."""
-            if total_minutes < 60:
-                return f"{total_minutes} mins"
-            
-            hours = total_minutes // 60
-            minutes = total_minutes % 60
-            
-            h_label = "hour" if hours == 1 else "hours"
-            m_label = "min" if minutes == 1 else "mins"
-            
-            if minutes == 0:
-                return f"{hours} {h_label}"
-            else:
-                return f"{hours} {h_label}, {minutes} {m_label}"
+    def _read_schedule(self, due_str, repeat_str, parent=None):
+        """(due, repeat) from what was typed (either can be None), or None after showing what's wrong."""
+        options = {"parent": parent} if parent is not None else {}
+        try:
+            due = parse_due(due_str)
+            repeat = parse_repeat(repeat_str)
+        except ValueError as error:
+            messagebox.showerror("Input Error", f"{str(error).capitalize()}.", **options)
+            return None
+        if repeat is not None and due is None:
+            messagebox.showerror("Input Error", "A repeating task needs a due time (when it's next due).", **options)
+            return None
+        return due, repeat
 
-        total_time_h_m = convert_minutes_to_h_m(total_time_mins)
-        need_time_h_m = convert_minutes_to_h_m(total_need_time)
-        want_time_h_m = convert_minutes_to_h_m(total_want_time)
-        
-        summary_text = f"Estimated Time: Needs: {need_time_h_m} | Wants: {want_time_h_m} | Total: {total_time_h_m}"
-        self.time_summary_label.config(text=summary_text)
+    def apply_filter(self):
+        """Shows only the tasks matching the filter bar (every task when it's empty)."""
+        text = self.filter_text_entry.get().strip()
+        kind = {"Need": "need", "Want": "want"}.get(self.filter_type_var.get())
+        priority = True if self.filter_priority_var.get() else None
+        # half-typed or invalid minutes are ignored rather than complained about
+        min_time, max_time = (int(entry.get()) if entry.get().strip().isdigit() else None
+                              for entry in (self.filter_min_entry, self.filter_max_entry))
+        if not text and kind is None and priority is None and min_time is None and max_time is None:
+            self.view.show_filter(None)
+            return
+        count("filter")
+        # looked up through self.store each time, so it follows list switches and reloads
+        self.view.show_filter(lambda: self.store.find(text, kind, priority, min_time, max_time))
+
+    def clear_filter(self):
+        for entry in (self.filter_text_entry, self.filter_min_entry, self.filter_max_entry):
+            entry.delete(0, tk.END)
+        self.filter_priority_var.set(False)
+        self.filter_type_var.set("All")
+        self.apply_filter()
+
+    def plan_time(self):
+        """Picks the tasks that make the best use of the free time entered, and highlights them."""
+        budget_str = self.plan_budget_entry.get().strip()
+        if not budget_str: # an empty box clears the plan
+            self._plan = []
+            self.view.show_plan([])
+            self.plan_label.config(text="")
+            return
+
+        try:
+            budget = int(budget_str)
+            if budget < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Input Error", "Please enter a whole number of minutes to plan for.")
+            return
+
+        from planner import plan_tasks
+        plan = plan_tasks(self.store.index.values(), budget) #every task, without ranking them all
+        self._plan = list(plan.tasks)
+        self.view.show_plan(task.id for task in plan.tasks)
+        if plan.tasks:
+            self._label_plan()
+        else:
+            self.plan_label.config(text="Nothing fits in that time.")
+
+    def _label_plan(self):
+        minutes = sum(task.time for task in self._plan)
+        self.plan_label.config(text=f"Plan: {len(self._plan)} tasks in {convert_minutes_to_h_m(minutes)} (highlighted)"
+                               if self._plan else "")
+
+    def refresh_display(self):
+        """Redraws the whole display area from the (already sorted) task store.
+
+        Only needed when the lists are replaced wholesale (start-up, import, clear, undo);
+        single adds/edits/tick-offs go through _insert_task/_remove_task instead."""
+        if self._plan:
+            # the plan keeps its tasks that are still listed - the same Task objects, so ones a merge
+            # renumbered stay in it, and a list switched to, imported or shared drops it
+            index = self.store.index
+            still_listed = [task for task in self._plan if index.get(task.id) is task]
+            if len(still_listed) < len(self._plan):
+                self._plan = still_listed
+                self._label_plan()
+            self.view.planned = {task.id for task in still_listed}
+        self.view.render(self.store.needs, self.store.wants)
+        self._watch_deadlines()
+
+    def undo(self):
+        """Undoes the last change to the list (Ctrl+Z)."""
+        self._undo_or_redo(self.undo_history.undo, "Undone")
+
+    def redo(self):
+        """Makes the last undone change again (Ctrl+Y)."""
+        self._undo_or_redo(self.undo_history.redo, "Redone")
+
+    def _undo_or_redo(self, step, done):
+        if self.remote is not None:
+            return #nothing to undo while connected (see connect)
+        command = step(self.store)
+        if command is None:
+            return
+        self.refresh_display() #a big undo is one redraw, not a row at a time
+        self.autosaver.mark_dirty()
+        self._update_undo_buttons()
+        self._show_save_status(f"{done}: {command.label}")
+
+    def _record_undo(self, command):
+        self.undo_history.record(command)
+        self._update_undo_buttons()
+
+    def _forget_undo(self):
+        self.undo_history.clear()
+        self._update_undo_buttons()
+
+    def _update_undo_buttons(self):
+        local = self.remote is None
+        self.undo_button.config(state=tk.NORMAL if local and self.undo_history.can_undo() else tk.DISABLED)
+        self.redo_button.config(state=tk.NORMAL if local and self.undo_history.can_redo() else tk.DISABLED)
+
+    def _merged(self, merged):
+        # the lists were rebuilt from the merged save, so the undo history no longer lines up with them
+        self._forget_undo()
+        self.refresh_display()
 
 
     def save_current_data(self):
         """Handles the save button click."""
+        self._finish_loading() #so the save can't overwrite tasks that haven't loaded yet
         
+        if self.profile.save_file.generation is None:
+            warning = "WARNING: This will overwrite your previous save data."
+        else:
+            warning = "Anything saved from another window since is kept - the changes are merged."
         response = messagebox.askyesno(
             "Confirm Save",
-            "WARNING: This will overwrite your previous save data.\nAre you sure you want to save the current task list?"
+            f"{warning}\nAre you sure you want to save the current task list?"
         )
-        if response:
-            result = save_data(self.wants, self.needs)
-            if result.startswith("ERROR"):
-                messagebox.showerror("Save Error", result)
-            else:
-                messagebox.showinfo("Save Status", result)
+        if response and self.remote is not None:
+            self._send("save", lambda future: self._report_save(future.exception()))
+        elif response:
+            # Written in the background; the result pops up once it's done
+            self.autosaver.save_now(self._report_save)
+
+    def _report_save(self, error):
+        if error is None:
+            messagebox.showinfo("Save Status", "Save successful!")
+        else:
+            messagebox.showerror("Save Error", "ERROR: Could not save data to file.")
 
 
 # Driver Code
@@ -492,7 +1176,17 @@ if __name__ == "__main__":
         root.grid_columnconfigure(1, weight=1)
         root.grid_rowconfigure(0, weight=1)
 
-        
+        # --server [ADDRESS] shares the list held by task_server.py (default address: $TMH_SERVER)
+        if "--server" in sys.argv:
+            following = sys.argv[sys.argv.index("--server") + 1:]
+            try:
+                app.connect(following[0] if following and not following[0].startswith("-") else None)
+            except OSError as error:
+                messagebox.showerror("Task Server", f"Could not reach the task server ({error}).\nUsing the save instead.")
+        if app.remote is None:
+            # The window opens empty straight away; the saved tasks follow once loaded
+            app.load_in_background()
+        root.after_idle(mark_startup, "startup.window") #idle = the first paint is done
         root.mainloop()
         
     except Exception as e:
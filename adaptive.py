@@ -0,0 +1,231 @@
+"""Learning the scoring weights from the completion history.
+
+scoring.py ranks tasks by multiplier**priority / (time + dampener), with both
+weights fixed at 5. Here they are fitted to what actually gets done instead.
+Each completion in the history (see history.py) logs the task that was picked
+and a few others from its list picked at random. The model says a task is
+picked with probability proportional to score**sharpness among those (a
+conditional logit - with the others sampled at random it is fitted without
+bias). "sharpness" soaks up how closely the list is followed at all, so
+picking at random leaves the weights alone rather than flattening them.
+
+Every completion is one step of online Fisher scoring on the logs of the three
+weights: the gradient of log(chance of the actual pick) and its Fisher
+information (a 3x3 matrix) are added up as they come, and the weights move by
+information^-1 . gradient. That gets as close as a full refit would in a few
+hundred completions, where plain gradient steps stall on the dampener. The
+information starts at PRIOR_INFORMATION, so the first few picks can't run
+away with the ranking.
+
+A step is a few dozen float operations over at most RIVALS + 1 tasks, so the
+weights keep up one completion at a time. They are cached, with how far into
+the log they have read, in ProductivitySaveData.pkl.weights next to the save:
+    {"multiplier": 6.2, "dampener": 11.8, "sharpness": 1.4, "information": [[...], ...],
+     "choices": 57, "offset": 10432, "enabled": true}
+Loading a list only reads that file; update() reads just the log lines added
+since. The learned weights are used once MIN_CHOICES completions have been
+learned from (and can be switched off - see `commands.py weights`). Until then,
+the defaults in scoring.py are used.
+
+Scoring itself is unchanged - the store is simply given the learned multiplier
+and dampener, so ranking stays one cached score per task. Stores are only
+re-scored when the weights have drifted by more than REWEIGH_TOLERANCE.
+"""
+import json
+from math import exp, log
+
+from history import CompletionLog, history_path
+from instrument import timed
+from scoring import DAMPENER, PRIORITY_MULTIPLIER
+from storage import write_file_atomically
+
+WEIGHTS_EXTENSION = ".weights"
+MIN_CHOICES = 20 #completions learned from before the learned weights are used
+PRIOR_INFORMATION = 1.0 #how many completions' worth of belief the default weights start with, roughly
+REWEIGH_TOLERANCE = 0.02 #re-score a store once a weight has moved this much (relative)
+LIMITS = {"multiplier": (1.0, 50.0), "dampener": (0.5, 120.0), "sharpness": (0.05, 20.0)}
+DEFAULTS = {"multiplier": PRIORITY_MULTIPLIER, "dampener": DAMPENER, "sharpness": 1.0}
+NAMES = tuple(DEFAULTS)
+
+
+def weights_path(save_path):
+    """The learned-weights file that goes with a save file (named after all of it, like its history)."""
+    return save_path + WEIGHTS_EXTENSION
+
+
+class LearnedWeights:
+    """The fitted weights for one save, read from (and written back to) its .weights file."""
+
+    def __init__(self, path, history=None):
+        self.path = path
+        self.history = history  # the CompletionLog learned from
+        self.offset = 0  # how far into the log has been learned from
+        self.choices = 0
+        self.enabled = True
+        self._start()
+        try:
+            with open(path, encoding="utf-8") as file:
+                state = json.load(file)
+            params = [log(_clamp(name, float(state[name]))) for name in NAMES]
+            information = [[float(value) for value in row] for row in state["information"]]
+            if len(information) != 3 or any(len(row) != 3 for row in information):
+                raise ValueError("bad information matrix")
+            self._params, self._information = params, information
+            self.offset = int(state["offset"])
+            self.choices = int(state["choices"])
+            self.enabled = bool(state.get("enabled", True))
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # nothing learned yet (or an unreadable file) - start from the defaults
+
+    def _start(self):
+        # the weights are fitted as logs, which keeps them positive and the steps even-handed
+        self._params = [log(DEFAULTS[name]) for name in NAMES]
+        self._information = [[PRIOR_INFORMATION if row == column else 0.0 for column in range(3)] for row in range(3)]
+
+    def fitted(self):
+        """{"multiplier", "dampener", "sharpness"} as learned so far, used or not."""
+        return {name: exp(value) for name, value in zip(NAMES, self._params)}
+
+    def weights(self):
+        """The (multiplier, dampener) stores should score with."""
+        if not self.enabled or self.choices < MIN_CHOICES:
+            return PRIORITY_MULTIPLIER, DAMPENER
+        fitted = self.fitted()
+        return round(fitted["multiplier"], 3), round(fitted["dampener"], 3)
+
+    @timed("weights.learn")
+    def update(self):
+        """Learns from the completions logged since the last update and saves the result.
+
+        Returns True if anything was learned."""
+        if self.history is None:
+            return False
+        if self.history.size() < self.offset:
+            self.offset = 0  # the log was replaced - carry on from its start
+        start, learned = self.offset, False
+        try:
+            for records, offset in self.history.read(self.offset):
+                for record in records:
+                    learned = self.add(record) or learned
+                self.offset = offset
+        except FileNotFoundError:
+            return False
+        if self.offset != start:
+            self.save()
+        return learned
+
+    def add(self, record):
+        """Learns from one completion record; False if it doesn't say what else was on offer."""
+        try:
+            chosen = (int(record["time"]), bool(record["priority"]))
+            others = [(int(time), bool(priority)) for time, priority in record.get("others") or ()]
+        except (KeyError, TypeError, ValueError):
+            return False
+        if not others:
+            return False  # nothing else to pick, so nothing to learn
+        self.observe(chosen, others)
+        return True
+
+    def observe(self, chosen, others):
+        """One Fisher scoring step: (time, priority) `chosen` was picked over every (time, priority) in `others`."""
+        multiplier_log, dampener_log, sharpness_log = self._params
+        dampener, sharpness = exp(dampener_log), exp(sharpness_log)
+
+        # log score of each task, and the chance the model gives each of being picked (softmax)
+        options = [chosen] + others
+        log_scores = [multiplier_log * priority - log(time + dampener) for time, priority in options]
+        top = max(log_scores)
+        odds = [exp(sharpness * (value - top)) for value in log_scores]
+        total = sum(odds)
+        chances = [value / total for value in odds]
+
+        # how each task's sharpness * log score moves with each (log) weight, and what the model expects of them
+        slopes = [(sharpness * priority, -sharpness * dampener / (time + dampener), sharpness * value)
+                  for (time, priority), value in zip(options, log_scores)]
+        mean_1 = mean_2 = mean_3 = 0.0
+        for chance, (slope_1, slope_2, slope_3) in zip(chances, slopes):
+            mean_1 += chance * slope_1
+            mean_2 += chance * slope_2
+            mean_3 += chance * slope_3
+        # gradient of log(chance of the actual pick): what was picked minus what the model expected
+        gradient = [slopes[0][0] - mean_1, slopes[0][1] - mean_2, slopes[0][2] - mean_3]
+
+        # the information is the spread of those slopes - symmetric, so six sums cover it
+        f11 = f12 = f13 = f22 = f23 = f33 = 0.0
+        for chance, (slope_1, slope_2, slope_3) in zip(chances, slopes):
+            d1, d2, d3 = slope_1 - mean_1, slope_2 - mean_2, slope_3 - mean_3
+            f11 += chance * d1 * d1
+            f12 += chance * d1 * d2
+            f13 += chance * d1 * d3
+            f22 += chance * d2 * d2
+            f23 += chance * d2 * d3
+            f33 += chance * d3 * d3
+        information = self._information
+        for row, added in zip(information, ((f11, f12, f13), (f12, f22, f23), (f13, f23, f33))):
+            row[0] += added[0]
+            row[1] += added[1]
+            row[2] += added[2]
+
+        step = _solve(information, gradient)
+        if step is not None:
+            for i, name in enumerate(NAMES):
+                self._params[i] = log(_clamp(name, exp(self._params[i] + step[i])))
+        self.choices += 1
+
+    def reset(self, relearn=False):
+        """Forgets what was learned. Learns again from the whole log if `relearn`, else only from new completions."""
+        self.choices = 0
+        self._start()
+        self.offset = 0 if relearn or self.history is None else self.history.size()
+
+    def save(self):
+        state = {name: round(value, 4) for name, value in self.fitted().items()}
+        state.update(information=self._information, choices=self.choices, offset=self.offset, enabled=self.enabled)
+        data = json.dumps(state).encode("utf-8")
+        write_file_atomically(self.path, lambda file: file.write(data))
+
+    def summary(self):
+        """What `weights` prints."""
+        multiplier, dampener = self.weights()
+        return {"multiplier": multiplier, "dampener": dampener, "learned": self.enabled and self.choices >= MIN_CHOICES,
+                "fitted": {name: round(value, 3) for name, value in self.fitted().items()},
+                "choices": self.choices, "enabled": self.enabled}
+
+
+def _solve(matrix, vector):
+    """x with matrix . x = vector, for a 3x3 matrix (Cramer's rule); None if it's singular."""
+    (a, b, c), (d, e, f), (g, h, i) = matrix
+    p, q, r = vector
+    determinant = a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+    if abs(determinant) < 1e-12:
+        return None
+    return [(p * (e * i - f * h) - b * (q * i - f * r) + c * (q * h - e * r)) / determinant,
+            (a * (q * i - f * r) - p * (d * i - f * g) + c * (d * r - q * g)) / determinant,
+            (a * (e * r - q * h) - b * (d * r - q * g) + p * (d * h - e * g)) / determinant]
+
+
+def _clamp(name, value):
+    low, high = LIMITS[name]
+    return min(max(value, low), high)
+
+
+def learner_for(save_path):
+    """The LearnedWeights for a save, reading its completion history."""
+    return LearnedWeights(weights_path(save_path), CompletionLog(history_path(save_path)))
+
+
+def learned_weights(save_path):
+    """The (multiplier, dampener) to score a save's tasks with - only reads the cached weights."""
+    return LearnedWeights(weights_path(save_path)).weights()
+
+
+def apply_weights(store, weights):
+    """Re-scores the store with new (multiplier, dampener) if they differ enough from what it has.
+
+    Returns True if it did (the lists may have been reordered)."""
+    multiplier, dampener = weights
+    if (abs(multiplier - store.multiplier) <= REWEIGH_TOLERANCE * store.multiplier
+            and abs(dampener - store.dampener) <= REWEIGH_TOLERANCE * store.dampener):
+        return False
+    store.set_weights(multiplier, dampener)
+    return True
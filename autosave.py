@@ -0,0 +1,155 @@
+"""Saving in the background, so a big save never freezes the window.
+
+Changes are marked with mark_dirty(); once things have been quiet for a moment
+(AUTOSAVE_DELAY_MS) the save is prepared on the Tk thread - cheap, see
+SaveFile.prepare - and written to disk on a single worker thread. Results come
+back to the Tk thread by polling with root.after, as Tk widgets must only be
+touched from the thread running the mainloop.
+
+Autosave only kicks in once the session is tied to the save file (it has been
+loaded or saved once), so a fresh session never quietly overwrites old data.
+While `holding` is set (the GUI is still loading the save) nothing is saved
+at all - changes are kept for once it's cleared.
+If another program saved meanwhile, the save comes back merged (see storage.py);
+the store is brought up to date on the Tk thread and on_merge is called.
+"""
+from datetime import datetime
+
+AUTOSAVE_DELAY_MS = 1500 #wait this long after the last change before saving
+POLL_MS = 50 #how often to check on a save in progress
+
+
+class Autosaver:
+    def __init__(self, root, save_file, store, on_status=None, delay_ms=AUTOSAVE_DELAY_MS, on_merge=None):
+        self.root = root
+        self.save_file = save_file
+        self.store = store
+        self.on_status = on_status or (lambda message: None)
+        self.on_merge = on_merge or (lambda merged: None)
+        self.delay_ms = delay_ms
+        self.dirty = False
+        self.holding = False  # set while the save is still loading - see the module docstring
+        self._timer = None  # the pending after() call for the next save
+        self._writing = None  # Future of the save being written
+        self._requested = False  # save_now() was called, so save even if autosave isn't on yet
+        self._callbacks = []  # called with the error (or None) once the next save is written
+        self._writing_callbacks = []
+        self._executor = None  # started with the first save (concurrent.futures is slow to import)
+
+    @property
+    def enabled(self):
+        return self.save_file.generation is not None
+
+    def mark_dirty(self):
+        """Notes that the tasks changed; they get saved once things settle down."""
+        if not self.enabled or self.holding:
+            return
+        self.dirty = True
+        self._schedule(self.delay_ms)
+
+    def save_now(self, callback=None):
+        """Saves straight away (still off the Tk thread), even in a session that isn't autosaving yet.
+
+        `callback(error)` runs on the Tk thread once the save is written; error is None on success."""
+        self.dirty = True
+        self._requested = True
+        if callback:
+            self._callbacks.append(callback)
+        self._schedule(0)
+
+    def flush(self):
+        """Waits for any save in progress and writes anything still pending. Blocks - used on exit.
+
+        Raises whatever the save raised if it couldn't be written. save_now() callbacks
+        waiting on either save are still called."""
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+        if self._writing is not None:
+            error = None
+            try:
+                merged = self._writing.result()
+            except Exception as failure:
+                error = failure
+                self.store.changes = None
+                self.dirty = True
+            else:
+                if merged:
+                    self._take_in(merged)
+            self._writing = None
+            callbacks, self._writing_callbacks = self._writing_callbacks, []
+            for callback in callbacks:
+                callback(error)
+        if self.dirty and (self.enabled or self._requested):
+            callbacks, self._callbacks = self._callbacks, []
+            try:
+                merged = self.save_file.save(self.store)  # rebases the store itself
+            except Exception as error:
+                for callback in callbacks:
+                    callback(error)
+                raise
+            self.dirty = self._requested = False
+            if merged:
+                self.on_merge(merged)
+            for callback in callbacks:
+                callback(None)
+
+    def switch_to(self, save_file, store):
+        """Points the autosaver at another save and store (flush() the old one first)."""
+        self.save_file = save_file
+        self.store = store
+        self.dirty = self._requested = False
+
+    def _schedule(self, delay_ms):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+        self._timer = self.root.after(delay_ms, self._start_save)
+
+    def _start_save(self):
+        self._timer = None
+        if self._writing is not None:
+            # one save at a time - changes made meanwhile go in the next one
+            self._schedule(POLL_MS if self._requested else self.delay_ms)
+            return
+        if not self.dirty or self.holding:
+            return
+        self.dirty = self._requested = False
+        self._writing_callbacks, self._callbacks = self._callbacks, []
+        job = self.save_file.prepare(self.store)
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+        self._writing = self._executor.submit(self.save_file.write, job)
+        self.on_status("Saving...")
+        self.root.after(POLL_MS, self._check_save)
+
+    def _take_in(self, merged):
+        # a save came back merged with another program's: the store picks it up, then the GUI
+        self.store.rebase(merged)
+        self.on_merge(merged)
+
+    def _check_save(self):
+        if self._writing is None:
+            return  # flushed meanwhile
+        if not self._writing.done():
+            self.root.after(POLL_MS, self._check_save)
+            return
+        error = self._writing.exception()
+        merged = self._writing.result() if error is None else None
+        self._writing = None
+        callbacks, self._writing_callbacks = self._writing_callbacks, []
+
+        if merged:
+            self._take_in(merged)
+            self.on_status(f"Saved at {datetime.now().strftime('%H:%M')} - merged with {merged['saves']} "
+                           f"save{'s' if merged['saves'] != 1 else ''} made elsewhere")
+        elif error is None:
+            self.on_status(f"Saved at {datetime.now().strftime('%H:%M')}")
+        else:
+            # the changes in that save were lost, so the next save writes everything
+            self.store.changes = None
+            self.dirty = True
+            self.on_status("Autosave failed - will retry")
+            self._schedule(self.delay_ms)
+        for callback in callbacks:
+            callback(error)
@@ -0,0 +1,75 @@
+"""Load times: the pickle save vs the mmap binary save.
+
+Run from the repo folder:  python benchmarks/bench_load.py
+Times reading just the save date (what the "Data found from ..." prompt needs),
+reading the first page of 20 tasks, and loading every task.
+"""
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binary_save import BinaryTaskFile, write_binary
+from task_store import Task, TaskStore
+
+SIZES = [1000, 10000, 100000, 1000000]
+
+
+def best_of(action, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    folder = tempfile.mkdtemp()
+    pickle_path = os.path.join(folder, "save.pkl")
+    binary_path = os.path.join(folder, "save.tmh")
+
+    print(f"{'tasks':>8} | {'pickle load':>11} | {'bin header':>10} {'bin page':>9} {'bin load':>9}   (ms)")
+    for size in SIZES:
+        rng = random.Random(size)
+        store = TaskStore([Task(f"Task {i}", rng.randint(1, 300), rng.random() < 0.3) for i in range(size // 2)],
+                          [Task(f"Task {i}", rng.randint(1, 300), rng.random() < 0.3) for i in range(size - size // 2)])
+        needs, wants = store.as_lists()
+        with open(pickle_path, "wb") as file:
+            pickle.dump({"date": "01/01/2025 at 10:00", "wants_list": wants, "needs_list": needs}, file)
+        with open(binary_path, "wb") as file:
+            write_binary(file, needs, wants, "01/01/2025 at 10:00")
+
+        def pickle_load():
+            with open(pickle_path, "rb") as file:
+                return pickle.load(file)["date"]
+
+        def binary_header():
+            with BinaryTaskFile(binary_path) as save:
+                return save.date
+
+        def binary_page():
+            with BinaryTaskFile(binary_path) as save:
+                return save.page(0, 20)
+
+        def binary_load():
+            with BinaryTaskFile(binary_path) as save:
+                return save.load()
+
+        repeat = 3 if size < 1000000 else 1
+        print(f"{size:>8} | {best_of(pickle_load, repeat) * 1000:>11.2f} | "
+              f"{best_of(binary_header, repeat) * 1000:>10.3f} {best_of(binary_page, repeat) * 1000:>9.3f} "
+              f"{best_of(binary_load, repeat) * 1000:>9.1f}")
+
+    for path in (pickle_path, binary_path):
+        os.remove(path)
+    os.rmdir(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Memory taken by 100k tasks: old-style dicts vs Task records.
+
+Run from the repo folder:  python benchmarks/bench_memory.py
+"""
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import priority_score
+from task_store import Task
+
+COUNT = 100_000
+
+
+def build_dicts(rows):
+    tasks = [{"time": time, "priority": priority, "name": name} for name, time, priority in rows]
+    for task in tasks:
+        task["score"] = priority_score(Task(task["name"], task["time"], task["priority"]))
+    # the old GUI also kept a copy of every task (plus its type) in current_tasks
+    current_tasks = [{"name": t["name"], "time": t["time"], "priority": t["priority"], "type": "need"} for t in tasks]
+    return tasks, current_tasks
+
+
+def build_records(rows):
+    tasks = [Task(name, time, priority, task_id) for task_id, (name, time, priority) in enumerate(rows, 1)]
+    for task in tasks:
+        task.score = priority_score(task)
+        task.kind = "need"
+    return tasks
+
+
+def measure(builder, rows):
+    tracemalloc.start()
+    kept = builder(rows)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    rng = random.Random(0)
+    # names are built up front so both forms share the same string objects
+    rows = [(f"Task {i}", rng.randint(1, 300), rng.random() < 0.3) for i in range(COUNT)]
+
+    dict_only = measure(lambda r: build_dicts(r)[0], rows)
+    dict_with_copies = measure(build_dicts, rows)
+    records = measure(build_records, rows)
+
+    print(f"{COUNT} tasks (task names not counted)")
+    print(f"  dicts:                      {dict_only / 1e6:7.1f} MB  ({dict_only / COUNT:.0f} B/task)")
+    print(f"  dicts + current_tasks copy: {dict_with_copies / 1e6:7.1f} MB  ({dict_with_copies / COUNT:.0f} B/task)")
+    print(f"  Task records:               {records / 1e6:7.1f} MB  ({records / COUNT:.0f} B/task)")
+
+
+if __name__ == "__main__":
+    main()
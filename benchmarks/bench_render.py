@@ -0,0 +1,69 @@
+"""Cost of the task list view: full render, single rows and scrolling.
+
+Run from the repo folder:  python benchmarks/bench_render.py
+Uses the display-free widget stubs, so it works without a screen. "calls" is the
+number of canvas calls per operation and "items" the canvas items that exist -
+both should stay flat as the list grows, as only the rows in view are drawn.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tk_stubs import StubCanvas, StubLabel
+from task_store import Task, TaskStore
+from task_view import TaskListView
+
+SIZES = [100, 1000, 10000, 100000]
+OPS = 200
+
+
+def make_tasks(count, rng):
+    return [Task(f"Task {i}", rng.randint(1, 300), rng.random() < 0.3) for i in range(count)]
+
+
+def timed(view, action, rounds):
+    """Average (ms, canvas calls) per round of `action`, including the redraw it triggers."""
+    canvas = view.canvas
+    calls_before = canvas.calls
+    start = time.perf_counter()
+    for i in range(rounds):
+        action(i)
+        canvas.run_idle()
+    return (time.perf_counter() - start) / rounds * 1000, (canvas.calls - calls_before) / rounds
+
+
+def bench(size):
+    rng = random.Random(size)
+    store = TaskStore(make_tasks(size // 2, rng), make_tasks(size - size // 2, rng))
+    view = TaskListView(StubCanvas(), StubLabel())
+    view.render(store.needs, store.wants)
+    view.canvas.run_idle()
+
+    render = timed(view, lambda i: view.render(store.needs, store.wants), 20)
+
+    def add_and_remove(i):
+        kind = "need" if i % 2 else "want"
+        task = Task("New", rng.randint(1, 300), False)
+        view.insert_row(kind, store.add(task, kind), task)
+        view.canvas.run_idle()
+        view.delete_row(*store.remove(task.id))
+    change = timed(view, add_and_remove, OPS)
+
+    scroll = timed(view, lambda i: (view.canvas.yview_moveto(rng.random()), view.refresh()), OPS)
+    return render, change, scroll, len(view.canvas.items)
+
+
+def main():
+    print(f"{'tasks':>8} | {'render ms':>9} {'calls':>6} | {'add+remove ms':>13} {'calls':>6} | "
+          f"{'scroll ms':>9} {'calls':>6} | {'items':>5}")
+    for size in SIZES:
+        render, change, scroll, items = bench(size)
+        print(f"{size:>8} | {render[0]:>9.3f} {render[1]:>6.0f} | {change[0]:>13.3f} {change[1]:>6.0f} | "
+              f"{scroll[0]:>9.3f} {scroll[1]:>6.0f} | {items:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Times the GUI's start-up: importing the app, and loading a save in the background.
+
+Run from the repo folder:
+    python benchmarks/bench_startup.py [--sizes 1000,100000] [--out startup.jsonl]
+
+Prints JSON lines in the same format as bench_suite.py, so runs can be compared
+with `python benchmarks/bench_suite.py --compare old.jsonl new.jsonl`:
+    startup.import         a fresh interpreter importing the GUI script (no window)
+    startup.load.<kind>    what the load thread does - read the save, build the lists
+    startup.page.<kind>    the same, up to having the first screenful ranked
+
+Creating and painting the window needs a display; with one, run the app with
+--profile to see startup.window (first paint) and startup.loaded.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from storage import open_save_file
+from task_store import Task, TaskStore
+
+SIZES = [1000, 10000, 100000, 1000000]
+PAGE = 30 #rows in a screenful
+APP = "[!] time management helper (with tkinter).py"
+
+_IMPORT_APP = """
+import importlib.util, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {repo!r})
+spec = importlib.util.spec_from_file_location("app", {path!r})
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print(time.perf_counter() - start)
+"""
+
+
+def import_time(folder, repeat=5):
+    """Best time for a fresh interpreter to import the GUI script."""
+    code = _IMPORT_APP.format(repo=REPO, path=os.path.join(REPO, APP))
+    return min(float(subprocess.check_output([sys.executable, "-c", code], cwd=folder))
+               for _ in range(repeat))
+
+
+def load_times(size, folder):
+    """Yields (stage, seconds) for loading a save of `size` tasks."""
+    rng = random.Random(size)
+    tasks = [Task(f"Task {i}", rng.randint(1, 300), rng.random() < 0.3) for i in range(size)]
+    store = TaskStore(tasks[:size // 2], tasks[size // 2:])
+    for kind, filename in (("pickle", "save.pkl"), ("binary", "save.tmh"), ("sqlite", "save.db")):
+        path = os.path.join(folder, filename)
+        store.changes = None
+        open_save_file(path).save(store, "01/01/2025 at 10:00")
+
+        start = time.perf_counter()
+        data = open_save_file(path).load()
+        loaded = TaskStore(data["needs_list"], data["wants_list"])
+        yield f"startup.load.{kind}", time.perf_counter() - start
+        loaded.needs.top(PAGE)
+        loaded.wants.top(PAGE)
+        yield f"startup.page.{kind}", time.perf_counter() - start
+
+
+def run(sizes, out):
+    folder = tempfile.mkdtemp()
+    try:
+        meta = {"stage": "meta", "python": platform.python_version(), "machine": platform.machine(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        out.write(json.dumps(meta) + "\n")
+        out.write(json.dumps({"stage": "startup.import", "tasks": 0, "seconds": import_time(folder), "per": "call"}) + "\n")
+        for size in sizes:
+            for stage, seconds in load_times(size, folder):
+                out.write(json.dumps({"stage": stage, "tasks": size, "seconds": seconds, "per": "call"}) + "\n")
+                out.flush()
+    finally:
+        shutil.rmtree(folder)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", help="comma separated save sizes (default: 1000 to 1M)")
+    parser.add_argument("--out", help="write the results to this file instead of stdout")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")] if args.sizes else SIZES
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as out:
+            run(sizes, out)
+    else:
+        run(sizes, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
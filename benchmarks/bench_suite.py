@@ -0,0 +1,223 @@
+"""Times every stage - scoring, sorting, planning, searching, rendering, saving, loading,
+completion stats, learning the weights, undo - from 10 to 1M tasks.
+
+Run from the repo folder:
+    python benchmarks/bench_suite.py [--sizes 10,1000,100000] [--out results.jsonl]
+    python benchmarks/bench_suite.py --compare old.jsonl new.jsonl [--threshold 0.2]
+
+Results are JSON lines - one {"stage", "tasks", "seconds", "per"} record per
+measurement, after a "meta" record describing the run - so two runs can be
+compared with --compare, which lists the stages that got slower. Rendering uses
+the display-free widget stubs, so this works on a headless box.
+
+"seconds" is the best of a few runs; "per" says what it is per ("call" for one
+pass over the whole list, "op" for a single add/scroll/save).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scoring
+from adaptive import LearnedWeights
+from history import CompletionLog, HistoryStats, completion_record
+from planner import plan_tasks
+from scoring import priority_score, score_batch
+from storage import open_save_file
+from task_store import Task, TaskStore
+from task_view import TaskListView
+from tk_stubs import StubCanvas, StubLabel
+from undo import Added, Replaced, UndoHistory
+
+SIZES = [10, 100, 1000, 10000, 100000, 1000000]
+OPS = 100
+
+
+def make_tasks(count, rng):
+    return [Task(f"Task {i}", rng.randint(1, 300), rng.random() < 0.3) for i in range(count)]
+
+
+def best_of(action, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def per_op(action, ops=OPS):
+    """Average time of `action(i)` over `ops` calls."""
+    start = time.perf_counter()
+    for i in range(ops):
+        action(i)
+    return (time.perf_counter() - start) / ops
+
+
+def bench_size(size, folder):
+    """Yields (stage, seconds, per) for one list size."""
+    rng = random.Random(size)
+    needs = make_tasks(size // 2, rng)
+    wants = make_tasks(size - size // 2, rng)
+    tasks = needs + wants
+    repeat = 5 if size <= 10000 else 1
+
+    # ---------- scoring and sorting ----------
+    times = [task.time for task in tasks]
+    priorities = [task.priority for task in tasks]
+    yield "score.scalar", best_of(lambda: [priority_score(task) for task in tasks], repeat), "call"
+    yield "score.batch", best_of(lambda: score_batch(times, priorities), repeat), "call"
+    yield "sort.build", best_of(lambda: TaskStore(needs, wants), repeat), "call"
+
+    store = TaskStore(needs, wants)
+
+    def add_and_remove(i):
+        task = Task("New", rng.randint(1, 300), False)
+        store.add(task, "need" if i % 2 else "want")
+        store.remove(task.id)
+    yield "store.add_remove", per_op(add_and_remove), "op"
+
+    # undoing a clear of the whole list, and undoing + redoing an import of a tenth of it
+    undo_history = UndoHistory()
+
+    def clear_and_undo():
+        before = store.snapshot()
+        store.clear()
+        undo_history.record(Replaced(before, store.snapshot(), "clear"))
+        undo_history.undo(store)
+    yield "undo.clear", best_of(clear_and_undo, repeat), "call"
+
+    imported = make_tasks(max(size // 10, 1), rng)
+    store.extend(imported, "need")
+    undo_history.record(Added((task, "need") for task in imported))
+    yield "undo.import", best_of(lambda: (undo_history.undo(store), undo_history.redo(store)), repeat), "call"
+    undo_history.undo(store)
+    yield "plan.480", best_of(lambda: plan_tasks(tasks, 480), repeat), "call"
+
+    # ---------- searching ----------
+    def build_index():
+        store._search = None  # dropped, so the next find builds it again
+        store.find("task 1")
+    yield "search.build", best_of(build_index, repeat), "call"
+
+    def search(i):
+        store.find(f"task {rng.randrange(max(size, 1))}", "need", True, 1, 120)
+    yield "search.query", per_op(search), "op"
+
+    # ---------- rendering ----------
+    view = TaskListView(StubCanvas(), StubLabel())
+
+    def render():
+        view.render(store.needs, store.wants)
+        view.canvas.run_idle()
+    yield "render.full", best_of(render, repeat), "call"
+
+    def scroll(i):
+        view.canvas.yview_moveto(rng.random())
+        view.refresh()
+        view.canvas.run_idle()
+    yield "render.scroll", per_op(scroll), "op"
+
+    # ---------- persistence ----------
+    for kind, filename in (("pickle", "save.pkl"), ("binary", "save.tmh"), ("sqlite", "save.db")):
+        path = os.path.join(folder, filename)
+
+        def snapshot():
+            fresh = open_save_file(path)  # a session that didn't load the save writes a full snapshot
+            store.changes = None
+            fresh.save(store, "01/01/2025 at 10:00")
+        yield f"save.snapshot.{kind}", best_of(snapshot, repeat), "call"
+
+        save_file = open_save_file(path)
+        yield f"load.{kind}", best_of(save_file.load, repeat), "call"
+        store.mark_saved()
+
+        def journal_save(i):
+            task = Task("New", rng.randint(1, 300), False)
+            store.add(task, "need")
+            save_file.save(store, "01/01/2025 at 10:00")
+        yield f"save.journal.{kind}", per_op(journal_save, 20), "op"
+
+    # ---------- completion history ----------
+    log = CompletionLog(os.path.join(folder, "save.history"))
+    if os.path.exists(log.path):
+        os.remove(log.path)
+    yield "history.record", per_op(lambda i: log.record(tasks[i % len(tasks)], "need", 0, 30)), "op"
+    log.append(completion_record(task, task.kind, rng.randrange(20), task.time + rng.randint(-5, 30),
+                                 others=rng.sample(tasks, min(5, len(tasks)))) for task in tasks)
+    yield "history.stats", best_of(lambda: HistoryStats(log).update().summary(), repeat), "call"
+
+    # ---------- learned weights (see adaptive.py) ----------
+    weights_path = os.path.join(folder, "save.weights")
+
+    def learn():
+        if os.path.exists(weights_path):
+            os.remove(weights_path)  # so every run learns from the whole log
+        LearnedWeights(weights_path, log).update()
+    yield "weights.learn", best_of(learn, repeat), "call"
+    yield "weights.apply", best_of(lambda: store.set_weights(store.multiplier * 1.1, store.dampener), repeat), "call"
+
+def run(sizes, out):
+    folder = tempfile.mkdtemp()
+    try:
+        meta = {"stage": "meta", "python": platform.python_version(), "machine": platform.machine(),
+                "numpy": scoring.np is not None, "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        out.write(json.dumps(meta) + "\n")
+        for size in sizes:
+            for stage, seconds, per in bench_size(size, folder):
+                out.write(json.dumps({"stage": stage, "tasks": size, "seconds": seconds, "per": per}) + "\n")
+                out.flush()
+    finally:
+        shutil.rmtree(folder)
+
+
+def read_results(path):
+    with open(path, encoding="utf-8") as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    return {(r["stage"], r["tasks"]): r["seconds"] for r in records if r["stage"] != "meta"}
+
+
+def compare(old_path, new_path, threshold):
+    """Prints every stage in both runs; returns the number that got slower than the threshold."""
+    old, new = read_results(old_path), read_results(new_path)
+    slower = 0
+    print(f"{'stage':<24} {'tasks':>8} {'old ms':>10} {'new ms':>10} {'change':>8}")
+    for key in sorted(old.keys() & new.keys(), key=lambda key: (key[1], key[0])):
+        change = new[key] / old[key] - 1 if old[key] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  SLOWER"
+            slower += 1
+        print(f"{key[0]:<24} {key[1]:>8} {old[key] * 1000:>10.3f} {new[key] * 1000:>10.3f} {change:>+8.0%}{flag}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", help="comma separated list sizes (default: 10 to 1M)")
+    parser.add_argument("--out", help="write the results to this file instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown counted as a regression (default 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    sizes = [int(size) for size in args.sizes.split(",")] if args.sizes else SIZES
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as out:
+            run(sizes, out)
+    else:
+        run(sizes, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
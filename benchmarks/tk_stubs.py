@@ -0,0 +1,79 @@
+"""Display-free stand-ins for the Tk widgets the task views talk to.
+
+StubCanvas keeps canvas items as plain dicts and has a fixed-size view that can
+be scrolled, so the views can be timed on a headless box. Every call is counted
+in `calls` and the items ever created in `created`, which together are the
+widget cost we care about. Idle callbacks wait in a queue until run_idle().
+"""
+
+
+class StubCanvas:
+    def __init__(self, height=440):
+        self.height = height
+        self.items = {}
+        self.options = {}
+        self.top = 0.0  # canvas y at the top of the view
+        self.idle = []
+        self.calls = 0
+        self.created = 0
+
+    # ---------- the bits of the tk.Canvas API the views use ----------
+
+    def create_text(self, x, y, **options):
+        self.calls += 1
+        self.created += 1
+        item = len(self.items) + 1
+        self.items[item] = dict(options, coords=(x, y))
+        return item
+
+    def coords(self, item, *coords):
+        self.calls += 1
+        self.items[item]["coords"] = coords
+
+    def itemconfig(self, item, **options):
+        self.calls += 1
+        self.items[item].update(options)
+
+    def config(self, **options):
+        self.calls += 1
+        self.options.update(options)
+
+    configure = config
+
+    def bind(self, sequence, callback):
+        pass
+
+    def canvasy(self, y):
+        return self.top + y
+
+    def winfo_height(self):
+        return self.height
+
+    def yview_moveto(self, fraction):
+        region = self.options.get("scrollregion", (0, 0, 0, self.height))
+        self.top = max(0.0, min(fraction * region[3], region[3] - self.height))
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+
+    def run_idle(self):
+        while self.idle:
+            self.idle.pop(0)()
+
+    def visible_text(self):
+        """Texts of the shown items, top to bottom."""
+        shown = [item for item in self.items.values() if item.get("state") != "hidden"
+                 and self.top <= item["coords"][1] < self.top + self.height]
+        return [item["text"] for item in sorted(shown, key=lambda item: (item["coords"][1], item["coords"][0]))]
+
+
+class StubLabel:
+    def __init__(self):
+        self.text = ""
+        self.calls = 0
+
+    def config(self, text="", **options):
+        self.calls += 1
+        self.text = text
+
+    configure = config
@@ -0,0 +1,146 @@
+"""A fixed-width binary snapshot format (ProductivitySaveData.tmh), read through mmap.
+
+Layout:
+    header   64 bytes: magic, version, save date, need count, want count,
+             generation, offset of the name heap
+    records  42 bytes per task - needs first, then wants, each in score order:
+             id, time, priority, kind, score, name offset, name length,
+             due (0 for none), repeat (0 for none)
+    names    every task name, UTF-8, back to back
+
+Version 1 files (32-byte records, no due/repeat) are still read.
+
+The header can be read without touching the tasks, and any task can be read
+on its own (record i is at a fixed offset), so the save date, the counts or
+the first page of tasks come back in constant time however big the list is.
+
+To convert an existing pickle save:
+    python binary_save.py [ProductivitySaveData.pkl] [ProductivitySaveData.tmh]
+"""
+import mmap
+import struct
+import sys
+
+from task_store import Task
+
+BINARY_SAVE_FILE = "ProductivitySaveData.tmh"
+MAGIC = b"TMHB"
+VERSION = 2
+
+_HEADER = struct.Struct("<4sHH32sIIQQ")
+_RECORDS = {1: struct.Struct("<QHBBdQI"), 2: struct.Struct("<QHBBdQIqH")}  # by file version
+_RECORD = _RECORDS[VERSION]
+_KINDS = ("need", "want")
+
+
+def write_binary(file, needs, wants, date, generation=0):
+    """Writes the needs and wants (already in score order) to an open binary file."""
+    names = bytearray()
+    records = []
+    for kind_code, tasks in enumerate((needs, wants)):
+        for task in tasks:
+            name = task.name.encode("utf-8")
+            records.append(_RECORD.pack(task.id or 0, task.time, bool(task.priority), kind_code,
+                                        task.score or 0.0, len(names), len(name), task.due or 0, task.repeat or 0))
+            names += name
+
+    heap_offset = _HEADER.size + _RECORD.size * len(records)
+    # the date field is 32 bytes - cut a longer date between characters, not in the middle of one
+    date = date.encode("utf-8")[:32].decode("utf-8", "ignore").encode("utf-8")
+    header = _HEADER.pack(MAGIC, VERSION, 0, date, len(needs), len(wants),
+                          generation, heap_offset)
+    file.write(header)
+    file.write(b"".join(records))
+    file.write(names)
+
+
+class BinaryTaskFile:
+    """Lazy, read-only access to a binary save. Use as a context manager."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            (magic, version, _, date, self.need_count, self.want_count,
+             self.generation, self._heap) = _HEADER.unpack_from(self._map, 0)
+        except (ValueError, struct.error):
+            self._file.close()
+            raise ValueError(f"{path} is not a binary save file")
+        if magic != MAGIC or version not in _RECORDS:
+            self.close()
+            raise ValueError(f"{path} is not a binary save file")
+        self._record = _RECORDS[version]
+        self.date = date.rstrip(b"\0").decode("utf-8", "ignore")  # older saves could end mid-character
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if not self._file.closed:
+            self._map.close()
+            self._file.close()
+
+    def __len__(self):
+        return self.need_count + self.want_count
+
+    def task(self, index):
+        """The task at position `index` (needs first, then wants), read on its own."""
+        if not 0 <= index < len(self):
+            raise IndexError("task index out of range")
+        start = _HEADER.size + index * self._record.size
+        return self._make_task(next(self._unpack(self._map[start:start + self._record.size])))
+
+    def page(self, start, count):
+        """Up to `count` tasks starting at position `start`."""
+        stop = min(start + count, len(self))
+        if start >= stop:
+            return []
+        size = self._record.size
+        records = self._map[_HEADER.size + start * size:_HEADER.size + stop * size]
+        return [self._make_task(record) for record in self._unpack(records)]
+
+    def load(self):
+        """Every task, as (needs, wants) lists."""
+        tasks = self.page(0, len(self))
+        return tasks[:self.need_count], tasks[self.need_count:]
+
+    def _unpack(self, data):
+        records = self._record.iter_unpack(data)
+        if self._record is not _RECORD:
+            records = (record + (0, 0) for record in records)  # a version 1 file - no due/repeat
+        return records
+
+    def _make_task(self, record):
+        task_id, time, priority, kind_code, score, name_offset, name_length, due, repeat = record
+        start = self._heap + name_offset
+        task = Task(self._map[start:start + name_length].decode("utf-8"), time, bool(priority),
+                    task_id or None, _KINDS[kind_code], due or None, repeat or None)
+        task.score = score
+        return task
+
+
+def convert_pickle(pickle_path="ProductivitySaveData.pkl", binary_path=BINARY_SAVE_FILE):
+    """Converts a pickle save (with its journal replayed) into a binary save.
+
+    Returns the number of tasks converted."""
+    from storage import SaveFile
+    from task_store import TaskStore
+
+    source = SaveFile(pickle_path)
+    data = source.load()
+    if not data:
+        data = {"date": "", "needs_list": [], "wants_list": []}
+    store = TaskStore(data["needs_list"], data["wants_list"])
+
+    target = SaveFile(binary_path)  # with a journal of its own - the pickle's is left as it was
+    target.save(store, data["date"])
+    return len(store)
+
+
+if __name__ == "__main__":
+    count = convert_pickle(*sys.argv[1:3])
+    print(f"Converted {count} tasks.")
@@ -0,0 +1,444 @@
+"""The command-line helper's non-interactive mode, for scripts, pipes and cron.
+
+    python "[!] time management helper (with save data).py" COMMAND ...
+    (or python commands.py COMMAND ...)
+
+    add NAME MINUTES [--priority] [--want] [--due WHEN] [--repeat RULE]
+                                             add a task (deadlines and repeats: see schedule.py)
+    list [--type need|want] [--limit N]      the tasks, highest score first
+    search [TEXT] [--type need|want] [--priority] [--min-time N] [--max-time N] [--limit N]
+                                             the tasks matching all of those, in list order
+    complete ID [ID ...] [--position] [--took MINUTES]
+                                             tick tasks off, by ID (or by the number shown),
+                                             logging them in the completion history (see history.py);
+                                             a repeating task comes back with its next due time
+    due [--hours N]                          tasks due in the next N hours (24) or overdue, soonest first
+    plan MINUTES                             the best tasks for that much free time
+    import FILE / export FILE                CSV or JSON Lines (see task_io.py)
+    stats                                    throughput, minutes per day and estimate accuracy
+    weights [--reset | --relearn | --off | --on]
+                                             the scoring weights learned from the history (see adaptive.py)
+    history [FILE] [--since YYYY-MM-DD]      the completion history, or write it to a .csv/.jsonl
+    batch                                    one command per line from stdin, saved once at the end
+
+Every invocation opens the save, does its job, saves only if something changed
+(usually a small journal append - see storage.py) and exits. Output is JSON:
+one object per line, e.g. {"id": 7, "name": "Laundry", "time": 45,
+"priority": false, "type": "need"} (plus "due" and "repeat" for tasks that have
+them); failures print {"error": "..."} and exit
+with status 1. `batch` is the quick way to run thousands of commands, as the
+save is only loaded and written once.
+
+Options before the command: --save-file PATH, --list-name NAME (a named list,
+see profiles.py), --profile / --cprofile (see instrument.py), and --server
+(with $TMH_SERVER or --server-address ADDRESS) to send the command to a running
+task_server.py instead of opening the save - the server saves it.
+"""
+import argparse
+import json
+import shlex
+import sys
+import time
+
+from adaptive import learned_weights, learner_for
+from history import (CompletionLog, HistoryStats, completion_record, export_history, history_path, parse_actual,
+                     passed_over)
+from schedule import format_due, parse_due
+from storage import open_save_file
+from task_store import TaskStore
+
+
+def task_json(task, position=None):
+    record = {"id": task.id, "name": task.name, "time": task.time, "priority": bool(task.priority),
+              "type": task.kind}
+    if task.due is not None:
+        record["due"] = format_due(task.due)
+        record["repeat"] = task.repeat
+    if position is not None:
+        record["position"] = position
+    return record
+
+
+def emit(record):
+    sys.stdout.write(json.dumps(record) + "\n")
+
+
+def command_parser():
+    parser = argparse.ArgumentParser(description="Time Management Helper - run with no command to get the prompts.")
+    parser.add_argument("--save-file", help="save to use (default: $TMH_SAVE_FILE or the usual one)")
+    parser.add_argument("--list-name", help="use this named task list instead of the default one")
+    parser.add_argument("--server", action="store_true",
+                        help="send the command to a running task_server.py instead of using the save directly")
+    parser.add_argument("--server-address", metavar="ADDRESS", help="the server's host:port or unix:/path (implies --server)")
+    parser.add_argument("--profile", action="store_true", help="time each step and print a table on exit")
+    parser.add_argument("--cprofile", action="store_true", help="--profile plus a cProfile of the run")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    add = commands.add_parser("add", help="add a task")
+    add.add_argument("name")
+    add.add_argument("minutes", help="1 to 300")
+    add.add_argument("--priority", action="store_true", help="high priority")
+    add.add_argument("--want", action="store_true", help="a want-to-do task (default: need-to-do)")
+    add.add_argument("--due", metavar="WHEN", help='e.g. "2026-10-20 18:00", 18:00, today, tomorrow')
+    add.add_argument("--repeat", metavar="RULE", help='daily, weekly, "every 3 days"... (needs --due)')
+
+    show = commands.add_parser("list", help="list the tasks, highest score first")
+    show.add_argument("--type", choices=("need", "want"), help="only this list")
+    show.add_argument("--limit", type=int, help="only the top N of each list")
+
+    search = commands.add_parser("search", help="find tasks by name, type, priority and time")
+    search.add_argument("text", nargs="?", default="", help="words the name must contain (any case)")
+    search.add_argument("--type", choices=("need", "want"), help="only this list")
+    search.add_argument("--priority", action="store_true", help="only high priority tasks")
+    search.add_argument("--min-time", type=int, metavar="N", help="at least N minutes")
+    search.add_argument("--max-time", type=int, metavar="N", help="at most N minutes")
+    search.add_argument("--limit", type=int, help="only the first N matches")
+
+    complete = commands.add_parser("complete", help="tick tasks off")
+    complete.add_argument("ids", nargs="+", type=int, metavar="ID")
+    complete.add_argument("--position", action="store_true", help="the IDs are the numbers shown by list")
+    complete.add_argument("--took", metavar="MINUTES", help="how long it actually took (one task at a time)")
+
+    due = commands.add_parser("due", help="list the tasks due soon (and overdue)")
+    due.add_argument("--hours", type=float, default=24, help="how far ahead to look (default: 24)")
+
+    plan = commands.add_parser("plan", help="pick the best tasks for some free time")
+    plan.add_argument("minutes", type=int)
+
+    for name, action in (("import", "add the tasks in"), ("export", "write every task to")):
+        io_command = commands.add_parser(name, help=f"{action} a .csv or .jsonl file")
+        io_command.add_argument("file")
+
+    commands.add_parser("stats", help="summarise the completion history")
+    history = commands.add_parser("history", help="list the completion history, or write it to a file")
+    history.add_argument("file", nargs="?", help="a .csv or .jsonl file to write it to")
+    history.add_argument("--since", metavar="YYYY-MM-DD", help="only tasks ticked off on or after this day")
+    weights = commands.add_parser("weights", help="show the scoring weights learned from the completion history")
+    change = weights.add_mutually_exclusive_group()
+    change.add_argument("--reset", action="store_true", help="forget them and learn from new tick-offs only")
+    change.add_argument("--relearn", action="store_true", help="forget them and learn again from the whole history")
+    change.add_argument("--off", action="store_true", help="score with the default weights (keeps learning)")
+    change.add_argument("--on", action="store_true", help="score with the learned weights again")
+
+    commands.add_parser("batch", help="run commands read from stdin, one per line")
+    return parser
+
+
+def due_soon(tasks, hours, now=None):
+    """The tasks due within `hours` (or overdue), soonest first."""
+    until = (time.time() if now is None else now) + hours * 60 * 60
+    return sorted((task for task in tasks if task.due is not None and task.due <= until), key=lambda task: task.due)
+
+
+def completion_time(args):
+    """The --took minutes of a complete command (None if not given). Raises ValueError."""
+    if args.took is None:
+        return None
+    if len(args.ids) > 1:
+        raise ValueError("--took goes with a single task")
+    return parse_actual(args.took)
+
+
+def history_records(log, since=None):
+    """The completion records in a log, only those from day `since` ("YYYY-MM-DD") on if it's given."""
+    return (record for record in log.records() if not since or str(record.get("done")) >= since)
+
+
+def run(args, store, log=None, learner=None):
+    """Carries out one parsed command. Returns (changed, ok).
+
+    `log` is the CompletionLog that tick-offs go in (and stats/history read),
+    `learner` the LearnedWeights that learn from them (see adaptive.py)."""
+    if args.command == "add":
+        from task_io import parse_task
+        try:
+            task, kind = parse_task(args.name, args.minutes, args.priority, "want" if args.want else "need",
+                                    args.due, args.repeat)
+        except ValueError as error:
+            emit({"error": str(error)})
+            return False, False
+        store.add(task, kind)
+        emit(task_json(task))
+        return True, True
+
+    if args.command == "list":
+        for kind in ("need", "want"):
+            if args.type not in (None, kind):
+                continue
+            tasks = store.list_for(kind)
+            first = 1 if kind == "need" else len(store.needs) + 1
+            shown = tasks.top(args.limit) if args.limit else tasks
+            for position, task in enumerate(shown, first):
+                emit(task_json(task, position))
+        return False, True
+
+    if args.command == "search":
+        found = store.find(args.text, args.type, True if args.priority else None, args.min_time, args.max_time)
+        for task in found[:args.limit] if args.limit else found:
+            emit(task_json(task, store.position_of(task.id)))
+        return False, True
+
+    if args.command == "complete":
+        try:
+            actual = completion_time(args)
+        except ValueError as error:
+            emit({"error": str(error)})
+            return False, False
+        task_ids = args.ids
+        if args.position:
+            # numbers shift as tasks go, so look them all up first
+            task_ids = [store.task_at(number)[0].id if 1 <= number <= len(store) else None for number in args.ids]
+        records = []
+        for given, task_id in zip(args.ids, task_ids):
+            removed = store.complete(task_id) if task_id is not None else None
+            if removed is None:
+                emit({"error": f"no task {given}", "id": given})
+                continue
+            kind, rank, task, following = removed
+            records.append(completion_record(task, kind, rank, actual, others=passed_over(store, kind)))
+            if following is None:
+                emit({"completed": task_json(task)})
+            else:
+                emit({"completed": task_json(task), "next": task_json(following)})
+        if records and log is not None:
+            try:
+                log.append(records)
+                if learner is not None:
+                    learner.update()  # the next load scores with what it learns
+            except OSError as error:
+                emit({"error": f"could not add to the completion history: {error}"})
+        return bool(records), len(records) == len(task_ids)
+
+    if args.command == "due":
+        for task in due_soon(store.index.values(), args.hours):
+            emit(task_json(task, store.position_of(task.id)))
+        return False, True
+
+    if args.command == "plan":
+        from planner import plan_tasks
+        plan = plan_tasks(store.index.values(), args.minutes)
+        emit({"minutes": plan.minutes, "score": plan.score, "exact": plan.exact,
+              "tasks": [task_json(task) for task in plan.tasks]})
+        return False, True
+
+    if args.command == "import":
+        from task_io import import_tasks
+        before = len(store)
+        try:
+            result = import_tasks(store, args.file)
+        except (OSError, ValueError) as error:
+            emit({"error": str(error)})
+            return len(store) > before, False  # the chunks added before it went wrong are kept
+        emit({"added": result.added, "skipped": result.skipped, "errors": result.errors})
+        return result.added > 0, True
+
+    if args.command == "export":
+        from task_io import export_tasks, task_rows
+        try:
+            written = export_tasks(task_rows(store), args.file)
+        except (OSError, ValueError) as error:
+            emit({"error": str(error)})
+            return False, False
+        emit({"exported": written, "file": args.file})
+        return False, True
+
+    if args.command == "stats":
+        emit(HistoryStats(log).update().summary())
+        return False, True
+
+    if args.command == "history":
+        records = history_records(log, args.since)
+        if args.file:
+            try:
+                emit({"exported": export_history(records, args.file), "file": args.file})
+            except (OSError, ValueError) as error:
+                emit({"error": str(error)})
+                return False, False
+        else:
+            for record in records:
+                emit(record)
+        return False, True
+
+    if args.command == "weights":
+        try:
+            learner.update()
+            if args.reset or args.relearn:
+                learner.reset(relearn=args.relearn)
+                learner.update()
+            elif args.off or args.on:
+                learner.enabled = args.on
+            learner.save()
+        except OSError as error:
+            emit({"error": str(error)})
+            return False, False
+        emit(learner.summary())
+        return False, True
+
+    raise ValueError(f"unknown command {args.command!r}")
+
+
+def run_batch(parser, lines, run_one):
+    """Runs one command per line with run_one(args) -> (changed, ok).
+
+    Blank lines and # comments are skipped. Returns (changed, ok) for the lot."""
+    changed_any, all_ok = False, True
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            args = parser.parse_args(shlex.split(line))
+        except (SystemExit, ValueError):  # argparse has already said what was wrong, on stderr
+            args = None
+        if args is None or args.command in (None, "batch"):
+            emit({"error": "invalid command", "line": line_number})
+            all_ok = False
+            continue
+        changed, ok = run_one(args)
+        changed_any = changed_any or changed
+        all_ok = all_ok and ok
+    return changed_any, all_ok
+
+
+def run_remote(args, client):
+    """Carries out one parsed command on a task server (see task_server.py). Returns ok."""
+    from task_server import ServerError
+    try:
+        if args.command == "add":
+            emit(client.request("add", name=args.name, time=args.minutes, priority=args.priority,
+                                type="want" if args.want else "need", due=args.due, repeat=args.repeat))
+        elif args.command == "list":
+            for task in client.request("list", type=args.type, limit=args.limit)["tasks"]:
+                emit(task)
+        elif args.command == "search":
+            for task in client.request("search", text=args.text, type=args.type, priority=True if args.priority else None,
+                                       min_time=args.min_time, max_time=args.max_time, limit=args.limit)["tasks"]:
+                emit(task)
+        elif args.command == "complete":
+            result = client.request("complete", ids=args.ids, positions=args.position, actual=completion_time(args))
+            for task, following in zip(result["completed"], result["next"]):
+                emit({"completed": task} if following is None else {"completed": task, "next": following})
+            for given in result["missing"]:
+                emit({"error": f"no task {given}", "id": given})
+            return not result["missing"]
+        elif args.command == "due":
+            until = time.time() + args.hours * 60 * 60
+            tasks = [task for task in client.request("list")["tasks"] if task.get("due") is not None]
+            for task in sorted(tasks, key=lambda task: task["due"]):  # local "YYYY-MM-DDTHH:MM" sorts by time
+                if parse_due(task["due"]) <= until:
+                    emit(task)
+        elif args.command == "plan":
+            emit(client.request("plan", minutes=args.minutes))
+        elif args.command == "import":
+            from task_io import MAX_ERRORS, read_chunks
+            added = skipped = 0
+            errors = []
+            for batches, chunk_skipped, chunk_errors in read_chunks(args.file): # checked here, sent a chunk at a time
+                tasks = [{"name": task.name, "time": task.time, "priority": task.priority, "type": kind}
+                         for kind, batch in batches.items() for task in batch]
+                added += client.request("extend", tasks=tasks)["added"] if tasks else 0
+                skipped += chunk_skipped
+                errors.extend(chunk_errors[:MAX_ERRORS - len(errors)])
+            emit({"added": added, "skipped": skipped, "errors": errors})
+        elif args.command == "export":
+            from task_io import export_tasks
+            tasks = client.request("list")["tasks"]
+            rows = ((task["name"], task["time"], task["priority"], task["type"], task.get("due"), task.get("repeat"))
+                    for task in tasks)
+            emit({"exported": export_tasks(rows, args.file), "file": args.file})
+        elif args.command == "stats":
+            emit(client.request("stats"))
+        elif args.command == "weights":
+            change = ("reset" if args.reset else "relearn" if args.relearn else "off" if args.off
+                      else "on" if args.on else None)
+            emit(client.request("weights", change=change))
+        elif args.command == "history":
+            records = client.request("history", since=args.since)["records"] # the server's log, not one next to a save here
+            if args.file:
+                emit({"exported": export_history(records, args.file), "file": args.file})
+            else:
+                for record in records:
+                    emit(record)
+    except (ServerError, OSError, ValueError) as error:
+        emit({"error": str(error)})
+        return False
+    return True
+
+
+def open_session(args):
+    """(save file, store, profiles) for the save the options point at.
+
+    profiles is the ProfileManager the --list was found with, or None without one."""
+    save_file = open_save_file(args.save_file)
+    profiles = None
+    if args.list_name:
+        from profiles import ProfileManager
+        profiles = ProfileManager(save_file)
+        if args.list_name not in profiles.names():
+            raise LookupError(f"there is no list called {args.list_name!r}")
+        save_file = profiles.save_file_for(args.list_name)
+    try:
+        data = save_file.load()
+    except FileNotFoundError:
+        data = None
+    if not data:
+        return save_file, TaskStore((), (), *learned_weights(save_file.path)), profiles
+    store = TaskStore(data["needs_list"], data["wants_list"], *learned_weights(save_file.path))
+    store.mark_saved()
+    return save_file, store, profiles
+
+
+def main(argv=None, parser=None):
+    """Runs a command line; returns the exit status."""
+    parser = parser or command_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.error("no command given")
+    if args.server or args.server_address:
+        return run_on_server(parser, args)
+    try:
+        save_file, store, profiles = open_session(args)
+    except LookupError as error:
+        emit({"error": str(error)})
+        return 1
+    except Exception as error:
+        emit({"error": f"could not read the save: {error}"})
+        return 1
+
+    log = CompletionLog(history_path(save_file.path))
+    learner = learner_for(save_file.path)
+    if args.command == "batch":
+        changed, ok = run_batch(parser, sys.stdin, lambda line_args: run(line_args, store, log, learner))
+    else:
+        changed, ok = run(args, store, log, learner)
+    if changed:
+        try:
+            save_file.save(store)
+        except Exception as error:
+            emit({"error": f"could not save: {error}"})
+            return 1
+        if profiles is not None:
+            from profiles import Profile
+            profiles.remember(Profile(args.list_name, save_file, store)) # keeps the list picker's summary current
+    return 0 if ok else 1
+
+
+def run_on_server(parser, args):
+    from task_server import TaskClient
+    try:
+        client = TaskClient(args.server_address)
+    except OSError as error:
+        emit({"error": f"could not reach the task server: {error}"})
+        return 1
+    try:
+        if args.command == "batch":
+            _, ok = run_batch(parser, sys.stdin, lambda line_args: (False, run_remote(line_args, client)))
+        else:
+            ok = run_remote(args, client)
+        return 0 if ok else 1
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
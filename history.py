@@ -0,0 +1,309 @@
+"""The completion history: every task ticked off, in a log that is only ever appended to.
+
+    ProductivitySaveData.pkl.history    next to the save (TaskProfiles/<name>.pkl.history for a named list)
+
+One JSON object per line:
+    {"id": 7, "name": "Laundry", "time": 45, "priority": false, "type": "need",
+     "rank": 0, "done": "2026-10-18T14:05:33", "actual": 50, "others": [[10, true], [30, false]]}
+"time" is the estimate the task had, "actual" how long it really took in
+minutes (null if that wasn't given), "rank" its place in its list when it was
+ticked off (0 = the top) and "done" the local time it was ticked off. "others"
+are the [time, priority] of a few tasks picked at random from the rest of its
+list - ones that could have been done instead - which adaptive.py learns the
+scoring from.
+
+Each completion is a single write() to the end of the file, so programs sharing
+a save can all add to it at once. A line cut short by a crash is skipped when
+the log is read.
+
+HistoryStats reads the log a line at a time and keeps only running totals (one
+bucket per day, a count per estimate-error ratio), so years of history are
+summarised in one pass without holding it in memory. It remembers how far it
+has read, so update() after more completions only reads the new lines.
+"""
+import csv
+import io
+import json
+import os
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from instrument import timed
+from storage import write_file_atomically
+from task_io import file_format
+
+HISTORY_EXTENSION = ".history"
+READ_CHUNK = 1 << 20 #bytes of log read at a time
+HISTORY_FIELDS = ("id", "name", "time", "priority", "type", "rank", "done", "actual")
+WINDOWS = (7, 30) #days, for the rolling throughput
+CHART_DAYS = 14 #days shown in the minutes-per-day chart
+MAX_ACTUAL = 24 * 60 #longest "actual" time accepted, in minutes
+RIVALS = 5 #other tasks logged with each completion
+ERROR_BANDS = ((0.5, "under 0.5x"), (0.8, "0.5-0.8x"), (1.25, "0.8-1.25x"),
+               (2, "1.25-2x"), (None, "2x or more"))  # actual/estimate, below each limit
+
+_decoder = json.JSONDecoder()
+
+
+def history_path(save_path):
+    """The history log that goes with a save file - named after all of it, so save.pkl,
+    save.tmh and save.db each have their own."""
+    return save_path + HISTORY_EXTENSION
+
+
+def completion_record(task, kind, rank=None, actual=None, when=None, others=()):
+    return {"id": task.id, "name": task.name, "time": task.time, "priority": bool(task.priority),
+            "type": kind, "rank": rank, "done": (when or datetime.now()).isoformat(timespec="seconds"),
+            "actual": actual, "others": [[other.time, bool(other.priority)] for other in others]}
+
+
+def passed_over(store, kind):
+    """A few of the tasks left on a list just after one was ticked off - some of what it was picked over.
+
+    Picked at random rather than from the top, which keeps the fit in adaptive.py unbiased."""
+    return store.list_for(kind).sample(RIVALS)
+
+
+def parse_actual(text):
+    """Minutes a task actually took, from what was typed: None if blank. Raises ValueError."""
+    text = str(text).strip()
+    if not text:
+        return None
+    if not text.isdigit() or not 1 <= int(text) <= MAX_ACTUAL:
+        raise ValueError(f"the actual time must be a whole number of minutes from 1 to {MAX_ACTUAL}")
+    return int(text)
+
+
+class CompletionLog:
+    def __init__(self, path):
+        self.path = path
+
+    def record(self, task, kind, rank=None, actual=None, others=()):
+        """Logs one task as done, now."""
+        self.append([completion_record(task, kind, rank, actual, others=others)])
+
+    def append(self, records):
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        if not data:
+            return
+        handle = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+        try:
+            os.write(handle, data)  # one write, so lines from programs logging at once never interleave
+        finally:
+            os.close(handle)
+
+    def read(self, start=0):
+        """Yields ([records], offset just past them) a chunk at a time, for every good
+        line from byte `start` on.
+
+        Stops at a last line that hasn't been finished yet."""
+        decode = _decoder.decode  # json.loads without its per-call checks
+        with open(self.path, "rb") as file:
+            file.seek(start)
+            offset = start
+            left = b""  # the start of a line that runs into the next chunk
+            while True:
+                chunk = file.read(READ_CHUNK)
+                if not chunk:
+                    return
+                chunk = left + chunk
+                end = chunk.rfind(b"\n") + 1
+                left = chunk[end:]
+                if not end:
+                    continue
+                records = []
+                for line in chunk[:end].decode("utf-8", "replace").splitlines():
+                    try:
+                        record = decode(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict):
+                        records.append(record)
+                offset += end
+                yield records, offset
+
+    def records(self):
+        """Every completion, oldest first (nothing if there's no log yet)."""
+        try:
+            for records, _ in self.read():
+                yield from records
+        except FileNotFoundError:
+            return
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+
+@timed("history.export")
+def export_history(records, path):
+    """Writes completion records to a CSV/JSON Lines file, replacing it in one go. Returns the record count."""
+    fmt = file_format(path)
+    written = 0
+
+    def write(binary_file):
+        nonlocal written
+        file = io.TextIOWrapper(binary_file, encoding="utf-8", newline="")
+        if fmt == "csv":
+            writer = csv.writer(file)
+            writer.writerow(HISTORY_FIELDS)
+            for record in records:
+                row = [record.get(field) for field in HISTORY_FIELDS]
+                row[3] = "yes" if row[3] else "no"
+                writer.writerow(row)  # None (no rank/actual time) comes out blank
+                written += 1
+        else:
+            for record in records:
+                file.write(json.dumps({field: record.get(field) for field in HISTORY_FIELDS}) + "\n")
+                written += 1
+        file.flush()
+        file.detach()  # hands the file back to write_file_atomically to sync and close
+
+    write_file_atomically(path, write)
+    return written
+
+
+class HistoryStats:
+    """Running totals over a CompletionLog, brought up to date with update()."""
+
+    def __init__(self, log):
+        self.log = log
+        self._lock = threading.Lock()  # the GUI and the server update on worker threads
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0  # how far into the log has been read
+        self.completed = 0
+        self.top_picks = 0  # ticked off from the top of their list
+        self.days = {}  # "YYYY-MM-DD" -> [tasks, minutes] (actual minutes where given, else the estimate)
+        self.ratios = Counter()  # actual/estimate, to 2 places -> tasks
+        self.timed = 0  # tasks with an actual time
+        self.error_mean = 0.0  # actual - estimate, in minutes (Welford's running mean/variance)
+        self._error_m2 = 0.0
+
+    @timed("history.update")
+    def update(self):
+        """Reads whatever has been logged since the last update; returns self."""
+        with self._lock:
+            if self.log.size() < self.offset:
+                self._reset()  # the log was replaced
+            try:
+                for records, offset in self.log.read(self.offset):
+                    for record in records:
+                        self.add(record)
+                    self.offset = offset
+            except FileNotFoundError:
+                pass
+        return self
+
+    def add(self, record):
+        try:
+            day = record["done"][:10]
+            estimate = int(record["time"])
+            actual = record.get("actual")
+            actual = None if actual is None else int(actual)
+        except (KeyError, TypeError, ValueError):
+            return
+        self.completed += 1
+        if record.get("rank") == 0:
+            self.top_picks += 1
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = [0, 0]
+        bucket[0] += 1
+        bucket[1] += estimate if actual is None else actual
+        if actual is not None and estimate > 0:
+            self.ratios[round(actual / estimate, 2)] += 1
+            self.timed += 1
+            error = actual - estimate
+            delta = error - self.error_mean
+            self.error_mean += delta / self.timed
+            self._error_m2 += delta * (error - self.error_mean)
+
+    def window(self, days, today=None):
+        """(tasks, minutes) over the last `days` days, today included."""
+        first = ((today or date.today()) - timedelta(days=days - 1)).isoformat()
+        tasks = minutes = 0
+        for day, (count, spent) in self.days.items():
+            if day >= first:
+                tasks += count
+                minutes += spent
+        return tasks, minutes
+
+    def ratio_percentile(self, fraction):
+        """The actual/estimate ratio `fraction` of the timed tasks are at or under, or None."""
+        if not self.timed:
+            return None
+        wanted = fraction * self.timed
+        seen = 0
+        for ratio in sorted(self.ratios):
+            seen += self.ratios[ratio]
+            if seen >= wanted:
+                return ratio
+        return ratio
+
+    def summary(self, today=None):
+        """Everything worked out so far, as a plain dict (what `stats` prints)."""
+        today = today or date.today()
+        rolling = {}
+        for days in WINDOWS:
+            tasks, minutes = self.window(days, today)
+            rolling[f"last_{days}_days"] = {"tasks": tasks, "minutes": minutes,
+                                            "tasks_per_day": round(tasks / days, 2),
+                                            "minutes_per_day": round(minutes / days, 1)}
+        chart = [(today - timedelta(days=back)).isoformat() for back in range(CHART_DAYS - 1, -1, -1)]
+        bands, low = {}, 0
+        for limit, name in ERROR_BANDS:
+            bands[name] = sum(count for ratio, count in self.ratios.items()
+                              if ratio >= low and (limit is None or ratio < limit))
+            low = limit
+        return {
+            "completed": self.completed,
+            "active_days": len(self.days),
+            "first_day": min(self.days, default=None),
+            "top_picks": self.top_picks,
+            **rolling,
+            "minutes_by_day": {day: self.days.get(day, (0, 0))[1] for day in chart},
+            "estimates": {
+                "timed": self.timed,
+                "mean_error": round(self.error_mean, 1) if self.timed else None,
+                "stdev_error": round((self._error_m2 / (self.timed - 1)) ** 0.5, 1) if self.timed > 1 else None,
+                "median_ratio": self.ratio_percentile(0.5),
+                "p10_ratio": self.ratio_percentile(0.1),
+                "p90_ratio": self.ratio_percentile(0.9),
+                "bands": bands,
+            },
+        }
+
+
+def summary_lines(summary):
+    """The summary as text, for the GUI's stats window."""
+    if not summary["completed"]:
+        return ["Nothing ticked off yet."]
+    lines = [f"Ticked off: {summary['completed']} tasks over {summary['active_days']} days"
+             f" (since {summary['first_day']})",
+             f"Top of the list: {summary['top_picks']} of them", ""]
+    for days in WINDOWS:
+        window = summary[f"last_{days}_days"]
+        lines.append(f"Last {days} days: {window['tasks']} tasks, {window['minutes']} mins"
+                     f" ({window['tasks_per_day']} tasks / {window['minutes_per_day']} mins a day)")
+    lines += ["", "Minutes per day:"]
+    most = max(summary["minutes_by_day"].values()) or 1
+    for day, minutes in summary["minutes_by_day"].items():
+        lines.append(f"  {day[5:]}  {'#' * round(30 * minutes / most):<30} {minutes}")
+
+    estimates = summary["estimates"]
+    lines += ["", "Estimates:"]
+    if not estimates["timed"]:
+        lines.append("  no actual times given yet (fill in 'Took' when ticking a task off)")
+        return lines
+    lines.append(f"  {estimates['timed']} tasks timed; off by {estimates['mean_error']:+} mins on average"
+                 + (f" (give or take {estimates['stdev_error']})" if estimates["stdev_error"] is not None else ""))
+    lines.append(f"  took {estimates['median_ratio']}x the estimate typically"
+                 f" ({estimates['p10_ratio']}x to {estimates['p90_ratio']}x for most)")
+    for name, count in estimates["bands"].items():
+        lines.append(f"  {name:<12} {count}")
+    return lines
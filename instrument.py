@@ -0,0 +1,122 @@
+"""Optional timers and counters for the slow-looking parts of the app.
+
+Off unless switched on, either with an environment variable or a flag:
+    TMH_PROFILE=1         or  --profile     time scoring, sorting, rendering, load, save...
+    TMH_PROFILE=cprofile  or  --cprofile    the same, plus a cProfile of the whole session
+
+When on, a table is printed to stderr on exit. Set TMH_PROFILE_LOG=path to also
+append the results to that file as JSON lines (one per operation). cProfile
+data goes to tmh_session.prof (open it with `python -m pstats tmh_session.prof`).
+
+When off, @timed hands back the function untouched and span() is a shared
+no-op context manager, so leaving the hooks in costs next to nothing.
+"""
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+_MODE = os.environ.get("TMH_PROFILE", "").lower()
+CPROFILE = _MODE == "cprofile" or "--cprofile" in sys.argv
+ENABLED = CPROFILE or _MODE not in ("", "0") or "--profile" in sys.argv
+PROFILE_FILE = "tmh_session.prof"
+
+_stats = {}  # operation name -> [calls, total seconds, slowest call]
+_counters = {}
+_lock = threading.Lock()  # saves are timed on the autosave thread
+_null_span = contextlib.nullcontext()
+_profiler = None
+
+
+def record(name, seconds):
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            _stats[name] = [1, seconds, seconds]
+        else:
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+
+
+def timed(name):
+    """Decorator that times every call of a function under `name` (when enabled)."""
+    def decorate(function):
+        if not ENABLED:
+            return function
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def span(name):
+    """Context manager that times a block under `name` (when enabled)."""
+    if not ENABLED:
+        return _null_span
+    return _Span(name)
+
+
+class _Span:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.start)
+
+
+def count(name, amount=1):
+    """Adds to a counter (when enabled)."""
+    if ENABLED:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + amount
+
+
+def report():
+    """The results so far, as a printable table."""
+    lines = [f"{'operation':<24} {'calls':>8} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"]
+    for name, (calls, total, slowest) in sorted(_stats.items(), key=lambda item: -item[1][1]):
+        lines.append(f"{name:<24} {calls:>8} {total * 1000:>10.2f} {total / calls * 1000:>9.3f} {slowest * 1000:>9.3f}")
+    for name, value in sorted(_counters.items()):
+        lines.append(f"{name:<24} {value:>8}")
+    return "\n".join(lines)
+
+
+def _dump():
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(PROFILE_FILE)
+    if not _stats and not _counters:
+        return
+    print(report(), file=sys.stderr)
+
+    log_path = os.environ.get("TMH_PROFILE_LOG")
+    if log_path:
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(log_path, "a", encoding="utf-8") as log:
+            for name, (calls, total, slowest) in _stats.items():
+                log.write(json.dumps({"time": stamp, "operation": name, "calls": calls,
+                                      "total_ms": round(total * 1000, 3), "max_ms": round(slowest * 1000, 3)}) + "\n")
+            for name, value in _counters.items():
+                log.write(json.dumps({"time": stamp, "counter": name, "value": value}) + "\n")
+
+
+if ENABLED:
+    if CPROFILE:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    atexit.register(_dump)
@@ -0,0 +1,103 @@
+"""Picking which tasks fit into the time you've got.
+
+plan_tasks(tasks, budget) picks the tasks with the biggest total priority score
+whose times add up to no more than `budget` minutes (the 0/1 knapsack problem).
+
+Task times are whole minutes (1-300), so this is solved exactly with dynamic
+programming over the minutes of the budget. Three things keep that quick:
+  - a score only depends on a task's time, priority and how soon it's due, so
+    tasks with the same time and score are interchangeable, and only
+    budget // time of them could ever be picked - the rest are dropped
+  - those interchangeable tasks go into the table in bundles of 1, 2, 4, 8...
+    (any count can still be made from the bundles), so a few hundred rows
+    cover thousands of tasks
+  - each row's pass over the budget works on whole lists with map()
+If the table would still be too big (a huge budget), tasks are picked greedily
+by score per minute instead.
+"""
+from collections import namedtuple
+from operator import gt
+
+from instrument import timed
+from scoring import priority_score
+
+DP_MAX_CELLS = 3_000_000 #tasks x minutes above which the greedy planner is used
+
+Plan = namedtuple("Plan", "tasks minutes score exact")  # exact is False for a greedy plan
+
+
+@timed("plan")
+def plan_tasks(tasks, budget):
+    """The best set of tasks for `budget` minutes, as a Plan (tasks highest score first)."""
+    if budget <= 0:
+        return Plan([], 0, 0.0, True)
+
+    bundles = _bundles(tasks, budget)
+    exact = len(bundles) * budget <= DP_MAX_CELLS
+    if exact:
+        chosen = [task for bundle in _knapsack(bundles, budget) for task in bundle[2]]
+    else:
+        chosen = _greedy([task for bundle in bundles for task in bundle[2]], budget)
+
+    chosen.sort(key=lambda task: -_value(task))
+    return Plan(chosen, sum(task.time for task in chosen), round(sum(_value(task) for task in chosen), 3), exact)
+
+
+def _value(task):
+    return task.score if task.score is not None else priority_score(task)
+
+
+def _bundles(tasks, budget):
+    """Groups the tasks that could be in the best plan into (minutes, score, tasks) bundles."""
+    groups = {}
+    for task in tasks:
+        if task.time <= budget:
+            groups.setdefault((task.time, bool(task.priority), task.score), []).append(task)  # the score has any urgency in it
+
+    bundles = []
+    for (time, _, _), group in groups.items():
+        group = group[:budget // time]
+        value = _value(group[0])
+        start, size = 0, 1
+        while start < len(group):
+            size = min(size, len(group) - start)
+            bundles.append((time * size, value * size, group[start:start + size]))
+            start += size
+            size *= 2
+    return bundles
+
+
+def _knapsack(bundles, budget):
+    # best[m] is the highest score that fits in m minutes using the bundles so far;
+    # took[i][j] records whether bundle i was worth taking at m = minutes + j
+    best = [0.0] * (budget + 1)
+    took = []
+    for minutes, value, _ in bundles:
+        with_bundle = [score + value for score in best[:budget + 1 - minutes]]
+        without = best[minutes:]
+        took.append(bytes(map(gt, with_bundle, without)))
+        best[minutes:] = map(max, with_bundle, without)
+
+    chosen = []
+    left = budget
+    for bundle, row in zip(reversed(bundles), reversed(took)):
+        if left >= bundle[0] and row[left - bundle[0]]:
+            chosen.append(bundle)
+            left -= bundle[0]
+    return chosen
+
+
+def _greedy(tasks, budget):
+    # highest score per minute first, skipping whatever no longer fits
+    chosen = []
+    minutes = 0
+    for task in sorted(tasks, key=lambda task: _value(task) / task.time, reverse=True):
+        if minutes + task.time <= budget:
+            chosen.append(task)
+            minutes += task.time
+
+    # greedy alone can do badly when one big task is worth more than the rest put together
+    best_single = max(tasks, key=_value, default=None)
+    if best_single is not None and _value(best_single) > sum(_value(task) for task in chosen):
+        return [best_single]
+    return chosen
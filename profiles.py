@@ -0,0 +1,175 @@
+"""Named task lists ("profiles") - e.g. work, home, or one per project.
+
+Each profile is saved on its own, so saving one never rewrites another:
+    "default"        the usual save (see storage.open_save_file)
+    any other name   TaskProfiles/<name>.pkl (or .tmh/.db, to match the default save)
+
+TaskProfiles/profiles.json caches a summary of each profile (task count, total
+minutes and save date), so the profiles can be listed without opening their
+saves. Only a profile that is switched to gets loaded, and at most MAX_LOADED
+stay in memory: loading another drops the least recently used one, unless it
+has changes that haven't been saved yet.
+"""
+import json
+import os
+import re
+from collections import OrderedDict
+
+from adaptive import learned_weights
+from storage import open_save_file, write_file_atomically
+from task_store import TaskStore
+from task_view import convert_minutes_to_h_m
+
+PROFILE_FOLDER = "TaskProfiles"
+DEFAULT_PROFILE = "default"
+MAX_LOADED = 3 #profiles kept in memory at once
+SAVE_EXTENSIONS = (".pkl", ".tmh", ".db")
+
+_VALID_NAME = re.compile(r"\w[\w -]{0,39}$")
+
+
+class Profile:
+    """A loaded profile: its save file and its tasks."""
+
+    def __init__(self, name, save_file, store):
+        self.name = name
+        self.save_file = save_file
+        self.store = store
+
+    @property
+    def unsaved(self):
+        """True if dropping this profile from memory would lose tasks."""
+        if self.save_file.generation is None:
+            return len(self.store) > 0  # never loaded from or saved to its file
+        return self.store.changes is None or bool(self.store.changes)
+
+    def summary(self):
+        return {"tasks": len(self.store), "minutes": self.store.needs.total_time + self.store.wants.total_time,
+                "date": self.save_file.date}
+
+
+class ProfileManager:
+    def __init__(self, default_save_file=None, folder=PROFILE_FOLDER, max_loaded=MAX_LOADED):
+        self.default_save_file = default_save_file or open_save_file()
+        self.folder = folder
+        self.max_loaded = max_loaded
+        self.extension = os.path.splitext(self.default_save_file.path)[1] or ".pkl"
+        self.loaded = OrderedDict()  # name -> Profile, least recently used first
+        self.summaries = self._read_index()
+
+    def names(self):
+        """Every profile, "default" first."""
+        names = set(self.summaries)
+        if os.path.isdir(self.folder):
+            names.update(os.path.splitext(filename)[0] for filename in os.listdir(self.folder)
+                         if filename.endswith(SAVE_EXTENSIONS))
+        names.discard(DEFAULT_PROFILE)
+        return [DEFAULT_PROFILE] + sorted(names, key=str.lower)
+
+    def save_file_for(self, name):
+        """The save file of a profile, without loading it."""
+        if name in self.loaded:
+            return self.loaded[name].save_file
+        if name == DEFAULT_PROFILE:
+            return self.default_save_file
+        for extension in SAVE_EXTENSIONS:
+            path = os.path.join(self.folder, name + extension)
+            if os.path.exists(path):
+                return open_save_file(path)
+        return open_save_file(os.path.join(self.folder, name + self.extension))
+
+    def get(self, name):
+        """The profile called `name`, loading it if it isn't in memory.
+
+        Raises whatever the save raises if it is corrupted."""
+        profile = self.loaded.get(name)
+        if profile is None:
+            save_file = self.save_file_for(name)
+            try:
+                data = save_file.load()
+            except FileNotFoundError:
+                data = None
+            weights = learned_weights(save_file.path)  # what this list's completions have taught (see adaptive.py)
+            if data:
+                store = TaskStore(data["needs_list"], data["wants_list"], *weights)
+                store.mark_saved()
+            else:
+                store = TaskStore((), (), *weights)
+            profile = self.adopt(name, save_file, store)
+        self.loaded.move_to_end(name)
+        return profile
+
+    def adopt(self, name, save_file, store):
+        """Registers a session that was set up elsewhere (e.g. the app's starting lists)."""
+        profile = self.loaded[name] = Profile(name, save_file, store)
+        self._evict()
+        return profile
+
+    def create(self, name):
+        """Makes a new, empty profile (saved straight away) and returns it."""
+        name = name.strip()
+        if not _VALID_NAME.match(name):
+            raise ValueError("List names can only use letters, numbers, spaces, '-' and '_' (up to 40).")
+        if name.lower() in (existing.lower() for existing in self.names()):
+            raise ValueError(f"There is already a list called '{name}'.")
+        os.makedirs(self.folder, exist_ok=True)
+        save_file = open_save_file(os.path.join(self.folder, name + self.extension))
+        store = TaskStore()
+        save_file.save(store)
+        profile = self.adopt(name, save_file, store)
+        self.remember(profile)
+        return profile
+
+    def summary(self, name):
+        """{"tasks", "minutes", "date"} for a profile, or None if nothing is known about it yet."""
+        profile = self.loaded.get(name)
+        if profile is not None and profile.save_file.generation is not None:
+            return profile.summary()
+        return self.summaries.get(name)
+
+    def describe(self, name):
+        """One line about a profile, e.g. "work - 12 tasks, 3 hours (saved 01/01/2025 at 10:00)"."""
+        summary = self.summary(name)
+        if summary is None:
+            return f"{name} - not opened yet"
+        saved = f" (saved {summary['date']})" if summary["date"] else ""
+        return f"{name} - {summary['tasks']} tasks, {convert_minutes_to_h_m(summary['minutes'])}{saved}"
+
+    def remember(self, profile):
+        """Updates the cached summary of a profile (call after it has been saved)."""
+        if profile.save_file.generation is None:
+            return  # its save doesn't hold these tasks, so don't describe them as saved
+        self.summaries[profile.name] = profile.summary()
+        os.makedirs(self.folder, exist_ok=True)
+        data = json.dumps(self.summaries, indent=1).encode("utf-8")
+        write_file_atomically(self._index_path(), lambda file: file.write(data))
+
+    def close(self):
+        """Updates the summaries of every loaded profile (on exit)."""
+        for profile in self.loaded.values():
+            if not profile.unsaved:
+                self.remember(profile)
+
+    # ---------- internals ----------
+
+    def _index_path(self):
+        return os.path.join(self.folder, "profiles.json")
+
+    def _read_index(self):
+        try:
+            with open(self._index_path(), encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _evict(self):
+        # least recently used first; profiles with unsaved changes are kept for now
+        while len(self.loaded) > self.max_loaded:
+            newest = next(reversed(self.loaded))
+            for name, profile in self.loaded.items():
+                if name != newest and not profile.unsaved:
+                    self.remember(profile)
+                    del self.loaded[name]
+                    break
+            else:
+                return
@@ -0,0 +1,194 @@
+"""Deadlines and repeating tasks.
+
+A task can have a due time ("due", in seconds since the epoch - shown in local
+time) and a repeat rule ("repeat", a whole number of days: 1 is daily, 7 weekly).
+Only the current occurrence of a repeating task is ever on the list; ticking it
+off adds the next one (see TaskStore.complete), due `repeat` days after the last
+due time - skipping any that have already gone by, so a week away doesn't come
+back to seven copies of the washing up.
+
+Deadlines feed into the ranking: a task's score is multiplied by its urgency
+(see scoring.URGENCY), which steps up as the deadline nears and again once it
+has passed. Rather than re-scoring every task on a timer, Deadlines keeps a
+min-heap of the next moment each task's urgency steps up. TaskStore.catch_up
+pops just the tasks whose moment has come and slots them back in by their new
+score, and next_time() says when to look again - the GUI sets a single Tk
+`after` for then, so nothing polls the list.
+
+Due times can be typed as "2026-10-20 18:00", "2026-10-20" (the end of that
+day), "18:00" (today, or tomorrow once that has gone), "today", "tomorrow" or
+"tomorrow 9:00"; repeats as "daily", "weekly", "every 3 days" or "every 2 weeks"
+(or just a number of days).
+"""
+import re
+from datetime import datetime, time as clock_time, timedelta
+from heapq import heapify, heappop, heappush
+
+from scoring import URGENCY
+
+DAY = 24 * 60 * 60
+END_OF_DAY = clock_time(23, 59) #when a task given only a day is due
+MAX_REPEAT = 366 #days
+
+_REPEATS = {"daily": 1, "day": 1, "weekly": 7, "week": 7, "fortnightly": 14}
+_EVERY = re.compile(r"(?:every\s+)?(\d+)\s*(d|days?|w|weeks?)$")
+_CLOCK = re.compile(r"(\d{1,2})[:.](\d{2})$")
+
+
+def parse_due(text, now=None):
+    """Seconds since the epoch for a typed due time; None if it's blank. Raises ValueError."""
+    if text is None:
+        return None
+    text = " ".join(str(text).strip().lower().split())
+    if not text or text == "none":
+        return None
+    now = datetime.now() if now is None else datetime.fromtimestamp(now)
+
+    day, _, at = text.partition(" ")
+    if day in ("today", "tomorrow"):
+        when = datetime.combine(now.date() + timedelta(days=day == "tomorrow"), _parse_clock(at) if at else END_OF_DAY)
+    elif _CLOCK.match(text):
+        when = datetime.combine(now.date(), _parse_clock(text))
+        if when <= now:
+            when += timedelta(days=1)
+    else:
+        try:
+            when = datetime.fromisoformat(text.upper())
+        except ValueError:
+            raise ValueError("the due time must look like 2026-10-20 18:00, 18:00, today or tomorrow") from None
+        if len(text) <= 10:  # just a day
+            when = datetime.combine(when.date(), END_OF_DAY)
+    return int(when.timestamp())
+
+
+def _parse_clock(text):
+    match = _CLOCK.match(text)
+    if not match or int(match[1]) > 23 or int(match[2]) > 59:
+        raise ValueError(f"{text!r} isn't a time of day - use 24-hour HH:MM")
+    return clock_time(int(match[1]), int(match[2]))
+
+
+def format_due(due):
+    """A due time as local "YYYY-MM-DDTHH:MM" (what exports and the CLI show); None stays None."""
+    return None if due is None else datetime.fromtimestamp(due).isoformat(timespec="minutes")
+
+
+def describe_due(due, now):
+    """A short note for the task list, e.g. "due 18:00", "due Tue 09:00", "overdue"."""
+    if due <= now:
+        return "overdue"
+    when, today = datetime.fromtimestamp(due), datetime.fromtimestamp(now).date()
+    days = (when.date() - today).days
+    if days == 0:
+        return f"due {when:%H:%M}"
+    if days == 1:
+        return f"due tomorrow {when:%H:%M}"
+    if days < 7:
+        return f"due {when:%a %H:%M}"
+    return f"due {when:%d %b}"
+
+
+def parse_repeat(text):
+    """A repeat rule as a number of days; None if it's blank. Raises ValueError."""
+    if text is None or isinstance(text, bool):
+        return None
+    if isinstance(text, int):
+        days = text
+    else:
+        text = " ".join(str(text).strip().lower().split())
+        if not text or text in ("none", "never", "no"):
+            return None
+        match = _EVERY.match(text)
+        if text in _REPEATS:
+            days = _REPEATS[text]
+        elif text.isdigit():
+            days = int(text)
+        elif match:
+            days = int(match[1]) * (7 if match[2].startswith("w") else 1)
+        else:
+            raise ValueError("repeat must be daily, weekly, every N days or every N weeks")
+    if not 1 <= days <= MAX_REPEAT:
+        raise ValueError(f"a task can repeat every 1 to {MAX_REPEAT} days")
+    return days
+
+
+def repeat_name(days):
+    """The words for a repeat rule ("daily", "every 2 weeks"...); None stays None."""
+    if not days:
+        return None
+    if days == 1:
+        return "daily"
+    if days == 7:
+        return "weekly"
+    if days % 7 == 0:
+        return f"every {days // 7} weeks"
+    return f"every {days} days"
+
+
+def next_due(due, repeat, now):
+    """When the occurrence after the one due at `due` is due: `repeat` days on, and after `now`.
+
+    Steps in local time, so a task due at 18:00 stays at 18:00 across clock changes."""
+    step = timedelta(days=repeat)
+    when = datetime.fromtimestamp(due) + step
+    missed = int((now - when.timestamp()) // (repeat * DAY)) # whole occurrences that have gone by
+    if missed > 0:
+        when += step * missed
+    while when.timestamp() <= now:
+        when += step
+    return int(when.timestamp())
+
+
+def next_change(due, now):
+    """The next moment after `now` that a task due at `due` becomes more urgent, or None if it's overdue."""
+    for limit, _ in reversed(URGENCY):  # furthest from the deadline first
+        if due - limit > now:
+            return due - limit
+    return None
+
+
+class Deadlines:
+    """A min-heap of (when, task id, due): the next moment each task's urgency steps up.
+
+    Entries aren't taken out when a task is ticked off or its deadline edited;
+    they are skipped when they come up (or dropped by reset)."""
+
+    def __init__(self):
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def reset(self, tasks, now):
+        """Starts over with these tasks (O(n) - one heapify)."""
+        heap = []
+        for task in tasks:
+            if task.due is not None:
+                when = next_change(task.due, now)
+                if when is not None:
+                    heap.append((when, task.id, task.due))
+        heapify(heap)
+        self._heap = heap
+
+    def add(self, task, now):
+        when = next_change(task.due, now)
+        if when is not None:
+            heappush(self._heap, (when, task.id, task.due))
+
+    def next_time(self):
+        """When the next task's urgency steps up (seconds since the epoch), or None."""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, index, now):
+        """The tasks (live in `index`, by ID) whose urgency has stepped up by `now`.
+
+        Their next step, if any, goes back on the heap."""
+        heap, moved = self._heap, {}
+        while heap and heap[0][0] <= now:
+            _, task_id, due = heappop(heap)
+            task = index.get(task_id)
+            if task is None or task.due != due or task_id in moved:
+                continue  # ticked off, or its deadline changed since
+            moved[task_id] = task
+            self.add(task, now)
+        return list(moved.values())
@@ -0,0 +1,89 @@
+try:
+    import numpy as np #optional, only used to speed up scoring big lists
+except ImportError:
+    np = None
+
+from instrument import timed
+
+PRIORITY_MULTIPLIER = 5 #this line can be changed to adjust preferences
+#prioritised tasks are flagged as 5 times more important
+#i.e. a priority task that takes 60mins has same score as non-priority task that takes 12 minutes
+#the higher the score, the more important it is
+
+DAMPENER = 5 #this line can be changed to adjust preferences
+#The dampener acts to smooth out the harsh logarithmic scaling of priority/time
+#without it, short&easy tasks are aggressively favoured over others
+#This results in longer tasks being pushed towards the bottom (despite being important)
+#i.e. The dampener can be thought of as a 'minimum effective time' for all tasks
+#(both are only the starting point - adaptive.py learns them from the tasks that get ticked off)
+
+URGENCY = ((0, 4), (24 * 60 * 60, 2), (3 * 24 * 60 * 60, 1.5)) #(seconds left until due, score multiplier)
+#the first band a task's deadline falls in applies: overdue tasks count 4 times over,
+#tasks due within a day twice and within 3 days 1.5 times; later (or no) deadlines don't change the score
+#(see schedule.py for how tasks are moved up as their deadlines near)
+
+NUMPY_MIN_BATCH = 2000 #below this, plain Python is quicker than setting up arrays
+
+
+def score_value(time, priority, multiplier=PRIORITY_MULTIPLIER, dampener=DAMPENER):
+    """The priority score for a task that takes `time` minutes."""
+    priority_multiplier = multiplier if priority else 1
+    return round(priority_multiplier / (time + dampener), 3)
+
+
+def priority_score(task, multiplier=PRIORITY_MULTIPLIER, dampener=DAMPENER):
+    """Calculates the priority score for a task."""
+    return score_value(task.time, task.priority, multiplier, dampener)
+
+
+def urgency(due, now):
+    """How many times over a task due at `due` (seconds since the epoch, or None) counts at `now`."""
+    if due is None:
+        return 1
+    left = due - now
+    for limit, factor in URGENCY:
+        if left < limit:
+            return factor
+    return 1
+
+
+@timed("score")
+def score_batch(times, priorities, multiplier=PRIORITY_MULTIPLIER, dampener=DAMPENER):
+    """Scores whole columns of task times and priority flags in one go.
+
+    Returns (scores, ranking): scores[i] is exactly what priority_score gives task i,
+    and ranking lists the task indexes from highest score to lowest (equal scores
+    keep their input order). Uses NumPy for big batches when it is installed.
+    """
+    if len(times) != len(priorities):
+        raise ValueError("times and priorities must be the same length")
+
+    if np is not None and len(times) >= NUMPY_MIN_BATCH:
+        return _score_batch_numpy(times, priorities, multiplier, dampener)
+
+    # There are only a few hundred different (time, priority) pairs, so each one is
+    # worked out once and then reused
+    cache = {}
+    scores = []
+    for time, priority in zip(times, priorities):
+        pair = (time, bool(priority))
+        score = cache.get(pair)
+        if score is None:
+            score = cache[pair] = score_value(time, priority, multiplier, dampener)
+        scores.append(score)
+    ranking = sorted(range(len(scores)), key=lambda i: -scores[i])
+    return scores, ranking
+
+
+def _score_batch_numpy(times, priorities, multiplier, dampener):
+    times = np.asarray(times, dtype=np.int64)
+    flags = np.asarray(priorities, dtype=bool)
+
+    # Scoring each distinct (time, priority) pair with score_value and broadcasting
+    # the results keeps Python's round() - np.round can differ on halfway cases
+    pairs = times * 2 + flags
+    unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+    table = np.array([score_value(int(pair) >> 1, pair & 1, multiplier, dampener) for pair in unique_pairs])
+    scores = table[inverse]
+    ranking = np.argsort(-scores, kind="stable")
+    return scores.tolist(), ranking.tolist()
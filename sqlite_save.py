@@ -0,0 +1,232 @@
+"""An SQLite save (ProductivitySaveData.db), as an alternative to the pickle/binary save files.
+
+Tables:
+    tasks      one row per task: id, name, time, priority, kind ("need"/"want"), score,
+               due and repeat (NULL unless set - see schedule.py)
+               - indexed on (kind, score), the order the lists are loaded in
+    sessions   one row per save: when it was made and how many tasks it held
+
+Saving only touches the rows that changed (the store's recorded add/edit/complete
+changes) in a single transaction, plus a new sessions row. The database runs in
+WAL mode, so reading it while a save is being written never blocks.
+
+SqliteSaveFile works like storage.SaveFile, so the apps and the autosaver can use
+either; storage.open_save_file picks this one for paths ending in ".db". The
+latest sessions row plays the part of SaveFile's generation and version: if
+another program saved since this session loaded, this session's changes are
+merged into its rows task by task (see storage.rebased) rather than written
+over them. Saves take SQLite's write lock (BEGIN IMMEDIATE) for the whole check
+and write, so two programs never save at once.
+
+To move an existing pickle (or binary) save over:
+    python sqlite_save.py [ProductivitySaveData.pkl] [ProductivitySaveData.db]
+"""
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing
+
+from instrument import timed
+from scoring import score_value
+from storage import SAVE_FILE, SQLITE_SAVE_FILE, SaveFile, current_date, rebased
+from task_store import Task
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id       INTEGER PRIMARY KEY,
+    name     TEXT    NOT NULL,
+    time     INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    kind     TEXT    NOT NULL CHECK (kind IN ('need', 'want')),
+    score    REAL    NOT NULL,
+    due      INTEGER,
+    repeat   INTEGER
+);
+CREATE INDEX IF NOT EXISTS tasks_by_kind_score ON tasks (kind, score DESC, id);
+CREATE TABLE IF NOT EXISTS sessions (
+    id         INTEGER PRIMARY KEY,
+    date       TEXT    NOT NULL,
+    saved_at   REAL    NOT NULL,
+    need_count INTEGER NOT NULL,
+    want_count INTEGER NOT NULL
+);
+"""
+
+_UPSERT = ("INSERT OR REPLACE INTO tasks (id, name, time, priority, kind, score, due, repeat) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+_ADDED_COLUMNS = (("due", "INTEGER"), ("repeat", "INTEGER"))  # not in saves made before deadlines
+
+
+class SqliteSaveFile:
+    """The SQLite save, with the same load/save methods as storage.SaveFile."""
+
+    def __init__(self, path=SQLITE_SAVE_FILE):
+        self.path = path
+        self.generation = None  # id of the last sessions row this session read or wrote
+        self.date = None  # date of the save this session last loaded or made
+
+    @property
+    def version(self):
+        return self.generation
+
+    def carry_on_from(self, other):
+        """Takes on what another SqliteSaveFile for the same path learned by loading it (see SaveFile.carry_on_from)."""
+        self.generation, self.date = other.generation, other.date
+
+    def peek_date(self):
+        """Date of the last save (one indexed query). Returns None for an empty save."""
+        with closing(self._connect(must_exist=True)) as db:
+            row = db.execute("SELECT date FROM sessions ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    @timed("load")
+    def load(self):
+        """Returns {"date", "wants_list", "needs_list"}, or None if nothing has been saved.
+
+        Raises FileNotFoundError if there's no save file, and sqlite3 errors if it's corrupted."""
+        with closing(self._connect(must_exist=True)) as db:
+            session = db.execute("SELECT id, date FROM sessions ORDER BY id DESC LIMIT 1").fetchone()
+            if session is None:
+                return None
+            lists = _read_lists(db)
+        self.generation, self.date = session
+        return {"date": session[1], "wants_list": lists["want"], "needs_list": lists["need"]}
+
+    def save(self, store, save_date=None):
+        """Saves the store: updates the rows that changed, or rewrites them all when needed.
+
+        Like SaveFile.save, a save merged with another program's brings the store up
+        to date and returns the merge."""
+        merged = self.write(self.prepare(store, save_date))
+        if merged:
+            store.rebase(merged)
+        return merged
+
+    @timed("save.prepare")
+    def prepare(self, store, save_date=None):
+        """Works out what the next save has to write and marks the store as saved.
+
+        Like SaveFile.prepare, this is cheap enough for the GUI thread; write() does the rest."""
+        save_date = self.date = save_date or current_date()
+        counts = (len(store.needs), len(store.wants))
+        # rows and statements are built by write(), off the GUI thread
+        tasks = list(store.index.values()) if self._needs_rewrite(store) else None
+        job = (tasks, store.changes, (store.multiplier, store.dampener), save_date, counts)
+        store.mark_saved()
+        return job
+
+    @timed("save.write")
+    def write(self, job):
+        """Writes a save made by prepare(), all in one transaction.
+
+        Returns None, or the merge if another program saved first (see SaveFile.write)."""
+        tasks, changes, (multiplier, dampener), save_date, (need_count, want_count) = job
+        merged = None
+        with closing(self._connect()) as db:
+            with db:
+                db.execute("BEGIN IMMEDIATE")  # the write lock - readers carry on (WAL)
+                latest = db.execute("SELECT MAX(id) FROM sessions").fetchone()[0]
+                if self.generation is not None and latest != self.generation and changes is not None:
+                    merged = self._merge(db, changes, multiplier, dampener)
+                    need_count, want_count = (db.execute("SELECT COUNT(*) FROM tasks WHERE kind = ?", (kind,)).fetchone()[0]
+                                              for kind in ("need", "want"))
+                elif tasks is not None:
+                    db.execute("DELETE FROM tasks")
+                    db.executemany(_UPSERT, ((task.id, task.name, task.time, int(task.priority), task.kind,
+                                             score_value(task.time, task.priority, multiplier, dampener), task.due, task.repeat)
+                                            for task in tasks))
+                else:
+                    for statement, parameters in _updates(changes, multiplier, dampener):
+                        db.execute(statement, parameters)
+                cursor = db.execute("INSERT INTO sessions (date, saved_at, need_count, want_count) VALUES (?, ?, ?, ?)",
+                                    (save_date, time.time(), need_count, want_count))
+            if merged is not None:
+                merged["saves"] = db.execute("SELECT COUNT(*) FROM sessions WHERE id > ? AND id < ?",
+                                             (self.generation, cursor.lastrowid)).fetchone()[0]
+                lists = _read_lists(db)
+                merged["needs_list"], merged["wants_list"] = lists["need"], lists["want"]
+            self.generation = cursor.lastrowid
+        return merged
+
+    # ---------- internals ----------
+
+    def _connect(self, must_exist=False):
+        if must_exist and not os.path.exists(self.path):
+            raise FileNotFoundError(self.path)
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")  # in WAL mode a crash can lose the last save, never corrupt the file
+        db.executescript(SCHEMA)
+        columns = {row[1] for row in db.execute("PRAGMA table_info(tasks)")}
+        for name, column_type in _ADDED_COLUMNS:
+            if name not in columns:
+                db.execute(f"ALTER TABLE tasks ADD COLUMN {name} {column_type}")
+        return db
+
+    def _needs_rewrite(self, store):
+        if store.changes is None or self.generation is None:
+            return True  # this session didn't start from the save, so it overwrites it
+        return not os.path.exists(self.path)
+
+    def _merge(self, db, changes, multiplier, dampener):
+        # in write()'s transaction: apply the changes on top of the rows another program saved
+        added_ids = [change[2][0] for change in changes if change[0] == "add"]
+        next_id = 1 + max([db.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]] + added_ids)
+        renumbered = {}
+        has_task = lambda task_id: db.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone() is not None
+        for change in rebased(changes, has_task, next_id, renumbered):
+            for statement, parameters in _updates([change], multiplier, dampener):
+                db.execute(statement, parameters)
+        return {"renumbered": renumbered}
+
+
+def _updates(changes, multiplier, dampener):
+    """Recorded changes (see TaskStore.changes) as SQL statements."""
+    updates = []
+    for change in changes:
+        action = change[0]
+        if action == "add":
+            updates.append((_UPSERT, _row(change[2], change[1], multiplier, dampener)))
+        elif action == "edit":
+            updates.append((_UPSERT, _row(change[3], change[2], multiplier, dampener)))
+        elif action == "complete":
+            updates.append(("DELETE FROM tasks WHERE id = ?", (change[1],)))
+        elif action == "clear":
+            updates.extend(("DELETE FROM tasks WHERE id = ?", (task_id,)) for task_id in change[1])
+    return updates
+
+
+def _read_lists(db):
+    lists = {"need": [], "want": []}
+    for task_id, name, minutes, priority, kind, due, repeat in db.execute(
+            "SELECT id, name, time, priority, kind, due, repeat FROM tasks ORDER BY kind, score DESC, id"):
+        lists[kind].append(Task(name, minutes, bool(priority), task_id, None, due, repeat))
+    return lists
+
+
+def _row(state, kind, multiplier, dampener):
+    # the score is the one without urgency - that changes by the hour (see schedule.py)
+    task_id, name, minutes, priority, *schedule = state
+    due, repeat = schedule or (None, None)  # journals written before deadlines have 4 fields
+    return (task_id, name, minutes, int(priority), kind, score_value(minutes, priority, multiplier, dampener),
+            due, repeat)
+
+
+def migrate_pickle(pickle_path=SAVE_FILE, db_path=SQLITE_SAVE_FILE):
+    """Copies a pickle or binary save (with its journal replayed) into an SQLite save.
+
+    Returns the number of tasks copied."""
+    from task_store import TaskStore
+
+    data = SaveFile(pickle_path).load()
+    if not data:
+        data = {"date": current_date(), "needs_list": [], "wants_list": []}
+    store = TaskStore(data["needs_list"], data["wants_list"])
+    SqliteSaveFile(db_path).save(store, data["date"])
+    return len(store)
+
+
+if __name__ == "__main__":
+    count = migrate_pickle(*sys.argv[1:3])
+    print(f"Migrated {count} tasks.")
@@ -0,0 +1,482 @@
+"""Reading and writing the save data.
+
+The save is made of two files:
+    ProductivitySaveData.pkl      a snapshot - the same pickled
+                                  {"date", "wants_list", "needs_list"} dict as always
+                                  (or ProductivitySaveData.tmh, see binary_save.py)
+    ProductivitySaveData.pkl.journal
+                                  every change saved since that snapshot, appended
+                                  to the end of the file
+
+A normal save only appends the changes made since the last save, so it costs
+O(changes) rather than re-pickling every task. Once the journal outgrows the
+snapshot, the next save writes a fresh snapshot instead (compaction).
+
+Crash safety: snapshots are written to a temporary file and swapped in with
+os.replace, and each save's journal records end with a "saved" marker - a save
+that was cut off half way through is simply ignored when the journal is read.
+Snapshots and journals carry a generation number, so a journal left over from
+before a compaction is never replayed on top of the newer snapshot.
+
+Several programs can share a save (two windows, the GUI and the CLI). Writers
+take turns through a lock file (ProductivitySaveData.pkl.lock); readers never wait
+for it, as they only ever see whole snapshots and complete saves. Every save
+also carries a version number, one up on the last. If another program saved
+since this session loaded, its changes aren't written over: this session's
+changes are replayed task by task on top of the newer save, and the merged
+lists come back for the store to pick up (see SaveFile.write and TaskStore.rebase).
+"""
+import os
+import pickle
+import struct
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import chain
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from binary_save import BINARY_SAVE_FILE, BinaryTaskFile, write_binary
+from instrument import timed
+from task_store import Task, TaskStore, assign_missing_ids, load_tasks, sort_key
+
+SAVE_FILE = "ProductivitySaveData.pkl"
+SQLITE_SAVE_FILE = "ProductivitySaveData.db" #see sqlite_save.py
+JOURNAL_MAGIC = b"TMHJ1\n"
+COMPACT_MIN_BYTES = 64 * 1024 #journals smaller than this are never compacted
+
+_HEADER = struct.Struct("<Q")  # snapshot generation the journal applies to
+_FRAME = struct.Struct("<II")  # record length, crc32 of the record
+
+# What SaveFile.prepare hands to write(): data is the snapshot to write (None
+# for a journal append), changes the store's changes since the last save
+SaveJob = namedtuple("SaveJob", "kind data changes date version")
+
+
+def default_save_path():
+    """The SQLite or binary save once one has been made (see sqlite_save.py and
+    binary_save.py), else the pickle save."""
+    for path in (SQLITE_SAVE_FILE, BINARY_SAVE_FILE):
+        if os.path.exists(path):
+            return path
+    return SAVE_FILE
+
+
+def open_save_file(path=None):
+    """The save file to use: `path`, else $TMH_SAVE_FILE, else default_save_path().
+
+    Paths ending in ".db" get the SQLite backend, anything else a SaveFile."""
+    path = path or os.environ.get("TMH_SAVE_FILE") or default_save_path()
+    if path.endswith(".db"):
+        from sqlite_save import SqliteSaveFile
+        return SqliteSaveFile(path)
+    return SaveFile(path)
+
+
+def current_date():
+    return datetime.now().strftime("%d/%m/%Y at %H:%M")
+
+
+def write_file_atomically(path, write):
+    """Writes a file via a temporary file + rename, so a crash never leaves half a file.
+
+    Readers see the old file or the new one, never a mix."""
+    temp_path = f"{path}.{os.getpid()}.tmp"  # one per program, so two saving at once don't share it
+    try:
+        with open(temp_path, "wb") as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    if fcntl is not None:
+        # and make the rename itself survive a crash
+        folder_handle = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+        try:
+            os.fsync(folder_handle)
+        finally:
+            os.close(folder_handle)
+
+
+@contextmanager
+def file_lock(path):
+    """Holds an exclusive lock on `path` (made if it doesn't exist) until the block ends.
+
+    Blocks while another program holds it. Only writers use it."""
+    with open(path, "a+b") as file:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)  # gives up with OSError after ~10 seconds
+        try:
+            yield
+        finally:
+            if fcntl is None:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+            # flock locks go when the file is closed
+
+
+def _frames(records):
+    frames = []
+    for record in records:
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        frames.append(_FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+    return b"".join(frames)
+
+
+class Journal:
+    """The append-only change log that sits next to a snapshot."""
+
+    def __init__(self, path):
+        self.path = path
+        self.end = None  # where the last complete save ends (known once read or reset)
+
+    def generation(self):
+        """Generation of the snapshot this journal belongs to (None if there's no journal)."""
+        try:
+            with open(self.path, "rb") as file:
+                header = file.read(len(JOURNAL_MAGIC) + _HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(header) < len(JOURNAL_MAGIC) + _HEADER.size or not header.startswith(JOURNAL_MAGIC):
+            return None
+        return _HEADER.unpack_from(header, len(JOURNAL_MAGIC))[0]
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def reset(self, generation, records=()):
+        """Starts a new journal for a new snapshot, holding just `records`."""
+        data = JOURNAL_MAGIC + _HEADER.pack(generation) + _frames(records)
+        write_file_atomically(self.path, lambda file: file.write(data))
+        self.end = len(data)
+
+    def append(self, records):
+        """Appends one save's worth of records (ending in a "saved" marker) and syncs it to disk.
+
+        Only valid once the journal has been read or reset, so the end of the last
+        complete save is known - anything after it (a cut-off save) is written over."""
+        data = _frames(records)
+        with open(self.path, "r+b") as file:
+            file.seek(self.end)
+            file.truncate()
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        self.end += len(data)
+
+    def saved_batches(self, generation):
+        """Yields the records of each complete save, oldest first.
+
+        Stops quietly at the first damaged or cut-off record."""
+        self.end = None
+        try:
+            with open(self.path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return
+        start = len(JOURNAL_MAGIC) + _HEADER.size
+        if not data.startswith(JOURNAL_MAGIC) or len(data) < start:
+            return
+        if _HEADER.unpack_from(data, len(JOURNAL_MAGIC))[0] != generation:
+            return  # left over from before the last compaction
+
+        batch = []
+        offset = self.end = start
+        while offset + _FRAME.size <= len(data):
+            length, checksum = _FRAME.unpack_from(data, offset)
+            payload = data[offset + _FRAME.size:offset + _FRAME.size + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            offset += _FRAME.size + length
+            try:
+                record = pickle.loads(payload)
+            except Exception:
+                return
+            batch.append(record)
+            if record[0] == "saved":
+                self.end = offset
+                yield batch
+                batch = []
+
+    def last_saved_date(self, generation):
+        """Date of the last complete save in the journal, or None."""
+        date = None
+        for batch in self.saved_batches(generation):
+            date = batch[-1][1]
+        return date
+
+
+def replay(needs, wants, records):
+    """Applies journal records (see TaskStore.changes) to {id: Task} dicts for the needs and wants.
+
+    Returns the date of the last save among them."""
+    lists = {"need": needs, "want": wants}
+    date = None
+    for record in records:
+        action = record[0]
+        if action == "add":
+            _, kind, state = record
+            lists[kind][state[0]] = Task.from_state(state)
+        elif action == "edit":
+            _, task_id, kind, state = record
+            needs.pop(task_id, None)
+            wants.pop(task_id, None)
+            lists[kind][state[0]] = Task.from_state(state)
+        elif action == "complete":
+            needs.pop(record[1], None)
+            wants.pop(record[1], None)
+        elif action == "clear":
+            if len(record) == 1:  # written before clears listed the tasks they cleared
+                needs.clear()
+                wants.clear()
+            else:
+                for task_id in record[1]:
+                    needs.pop(task_id, None)
+                    wants.pop(task_id, None)
+        elif action == "saved":
+            date = record[1]
+    return date
+
+
+def rebased(changes, has_task, next_id, renumbered):
+    """Yields a session's changes adjusted to go on top of a save another program changed meanwhile.
+
+    has_task(id) says whether the task is in the save (with the changes yielded so
+    far applied) and next_id is the first ID nobody has used. Tasks added here
+    under an ID the other program also used are given new IDs, noted in the
+    `renumbered` dict; edits to tasks the other program ticked off are dropped -
+    the tick-off wins. A clear only removes the tasks this session had, so
+    anything the other program added meanwhile stays."""
+    for change in changes:
+        action = change[0]
+        if action == "add":
+            _, kind, state = change
+            if has_task(state[0]):
+                renumbered[state[0]] = next_id
+                state = (next_id,) + tuple(state[1:])
+                next_id += 1
+            yield ("add", kind, state)
+        elif action == "edit":
+            _, task_id, kind, state = change
+            task_id = renumbered.get(task_id, task_id)
+            if has_task(task_id):
+                yield ("edit", task_id, kind, (task_id,) + tuple(state[1:]))
+        elif action == "complete":
+            yield ("complete", renumbered.get(change[1], change[1]))
+        elif action == "clear":
+            yield ("clear", tuple(renumbered.get(task_id, task_id) for task_id in change[1]))
+
+
+class SaveFile:
+    """The snapshot + journal pair, and which generation of it this session loaded.
+
+    Snapshots are pickles, or binary saves when the path ends in ".tmh"."""
+
+    def __init__(self, path=SAVE_FILE):
+        self.path = path
+        self.binary = path.endswith(".tmh")
+        self.journal = Journal(path + ".journal")  # the full name, so a .pkl and a .tmh side by side don't share one
+        self.generation = None  # None until this session has loaded or written the save
+        self.version = None  # number of the save this session last loaded or made
+        self.date = None  # date of the save this session last loaded or made
+        self._peeked = None  # a pickle loaded by peek_date, handed out by the next load()
+        self._lock_path = path + ".lock"
+        self._seen = None  # the files as this session last read or wrote them (see _disk_state)
+
+    def carry_on_from(self, other):
+        """Takes on what another SaveFile for the same path learned by loading it.
+
+        The GUI loads on a worker thread into a SaveFile of its own, so the one it
+        saves with only starts autosaving once the loaded tasks are on screen."""
+        self.generation, self.version, self.date = other.generation, other.version, other.date
+        self.journal = other.journal  # knows where the loaded journal ends
+        self._seen = other._seen
+
+    @timed("load.peek")
+    def peek_date(self):
+        """Date of the last save, without loading the tasks where the format allows it.
+
+        Binary saves only read their header (plus the journal written since the
+        snapshot); pickles have to be loaded in full. Returns None for an empty save."""
+        if not self.binary:
+            self._peeked = self.load()
+            return self._peeked["date"] if self._peeked else None
+        with BinaryTaskFile(self.path) as snapshot:
+            date, generation = snapshot.date, snapshot.generation
+        return self.journal.last_saved_date(generation) or date
+
+    @timed("load")
+    def load(self):
+        """Returns {"date", "wants_list", "needs_list"} with the journal replayed, or None if the file is empty.
+
+        Raises FileNotFoundError if there's no save file, and other errors if it's corrupted."""
+        if self._peeked is not None:
+            data, self._peeked = self._peeked, None
+            return data
+
+        seen = self._disk_state()  # before reading - a save made meanwhile then shows up as a change
+        data = self._read_snapshot()
+        if not data:  # e.g. a file set up by 'initialising pickle file.py'
+            return None
+
+        generation = data.get("generation", 0)
+        needs = load_tasks(data["needs_list"])
+        wants = load_tasks(data["wants_list"])
+        # Older snapshots have no task IDs; give them the same ones the task store would
+        assign_missing_ids(needs, wants)
+
+        needs = {task.id: task for task in needs}
+        wants = {task.id: task for task in wants}
+        date = data["date"]
+        version = 0
+        for batch in self.journal.saved_batches(generation):
+            date = replay(needs, wants, batch) or date
+            marker = batch[-1]
+            version = marker[2] if len(marker) > 2 else version + 1  # older saves didn't number them
+
+        self.generation = generation
+        self.version = version
+        self.date = date
+        self._seen = seen
+        return {"date": date, "wants_list": list(wants.values()), "needs_list": list(needs.values())}
+
+    def save(self, store, save_date=None):
+        """Saves the store: appends its recorded changes, or writes a new snapshot when needed.
+
+        If the save had to be merged with another program's (see write), the store
+        is brought up to date with it and the merge is returned; otherwise None."""
+        merged = self.write(self.prepare(store, save_date))
+        if merged:
+            store.rebase(merged)
+        return merged
+
+    @timed("save.prepare")
+    def prepare(self, store, save_date=None):
+        """Works out what the next save has to write and marks the store as saved.
+
+        This part is cheap (no pickling or disk writes), so the GUI can do it on its
+        own thread and hand the result to write() on a background thread. Prepared
+        saves must be written in the order they were prepared."""
+        save_date = self.date = save_date or current_date()
+        version = self.version = (self.version or 0) + 1
+
+        if self._needs_snapshot(store):
+            # a new generation, so no journal already on disk can be replayed onto this snapshot
+            generation = max(self.generation or 0, self.journal.generation() or 0) + 1
+            needs, wants = store.as_lists(ordered=False)  # put in order by write(), off the GUI thread
+            job = SaveJob("snapshot", {"date": save_date, "wants_list": wants, "needs_list": needs,
+                                       "generation": generation}, store.changes, save_date, version)
+            self.generation = generation
+            self.journal.end = None  # not known again until the new journal is written
+        else:
+            # with no changes this still moves the save date on
+            job = SaveJob("append", None, store.changes, save_date, version)
+
+        store.mark_saved()
+        return job
+
+    @timed("save.write")
+    def write(self, job):
+        """Writes a save made by prepare(), holding the save's lock while it does.
+
+        If another program has saved since this session last read or wrote the
+        save, the job's changes are merged into that save instead (see _merge),
+        and {"needs_list", "wants_list", "renumbered", "saves"} is returned for
+        TaskStore.rebase. Otherwise returns None. A session that never loaded the
+        save, or has lost track of its changes, still writes over it."""
+        with file_lock(self._lock_path):
+            if self._seen is not None and job.changes is not None and self._disk_state() != self._seen:
+                merged = self._merge(job)
+            else:
+                merged = None
+                if job.kind == "snapshot":
+                    self._write_all(job.data, job.date, job.version)
+                else:
+                    self.journal.append(job.changes + [("saved", job.date, job.version)])
+            self._seen = self._disk_state()
+        return merged
+
+    def _merge(self, job):
+        # under the lock: reload the save as it is now, replay this session's changes
+        # on top (see rebased) and append them to its journal
+        data = self.load() or {"date": job.date, "needs_list": [], "wants_list": []}
+        needs = {task.id: task for task in data["needs_list"]}
+        wants = {task.id: task for task in data["wants_list"]}
+        added_ids = (change[2][0] for change in job.changes if change[0] == "add")
+        next_id = 1 + max(chain(needs, wants, added_ids), default=0)
+
+        renumbered = {}
+        records = []
+        for change in rebased(job.changes, lambda task_id: task_id in needs or task_id in wants, next_id, renumbered):
+            replay(needs, wants, [change])
+            records.append(change)
+        saves = max(self.version - (job.version - 1), 0)  # how many saves were made meanwhile
+        version = self.version = self.version + 1
+        self.date = job.date
+
+        needs_list, wants_list = list(needs.values()), list(wants.values())
+        if self.journal.end is None:
+            # its snapshot has no journal (e.g. it's from an older version), so write it out whole
+            store = TaskStore(needs_list, wants_list)
+            self.generation = max(self.generation or 0, self.journal.generation() or 0) + 1
+            needs_list, wants_list = store.as_lists(ordered=False)
+            self._write_all({"date": job.date, "wants_list": wants_list, "needs_list": needs_list,
+                             "generation": self.generation}, job.date, version)
+        else:
+            self.journal.append(records + [("saved", job.date, version)])
+        return {"needs_list": needs_list, "wants_list": wants_list, "renumbered": renumbered, "saves": saves}
+
+    def _write_all(self, data, save_date, version):
+        data["needs_list"].sort(key=sort_key)
+        data["wants_list"].sort(key=sort_key)
+        self._write_snapshot(data)
+        self.journal.reset(data["generation"], [("saved", save_date, version)])
+
+    def _disk_state(self):
+        # changes whenever anyone saves: snapshots are swapped for new files, journals grow
+        try:
+            stat = os.stat(self.path)
+            snapshot = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            snapshot = None
+        return snapshot, self.journal.generation(), self.journal.size()
+
+    def _needs_snapshot(self, store):
+        if store.changes is None or self.generation is None:
+            return True  # this session didn't start from the save, so it overwrites it
+        if not os.path.exists(self.path) or self.journal.generation() != self.generation or self.journal.end is None:
+            return True  # the save has been replaced since it was loaded (or the last write failed)
+        # compact once the journal has grown bigger than the snapshot itself
+        return self.journal.size() > max(COMPACT_MIN_BYTES, os.path.getsize(self.path))
+
+    def _read_snapshot(self):
+        if self.binary:
+            with BinaryTaskFile(self.path) as snapshot:
+                needs, wants = snapshot.load()
+                return {"date": snapshot.date, "wants_list": wants, "needs_list": needs,
+                        "generation": snapshot.generation}
+        with open(self.path, "rb") as file:
+            return pickle.load(file)
+
+    def _write_snapshot(self, data):
+        if self.binary:
+            write_file_atomically(self.path, lambda file: write_binary(
+                file, data["needs_list"], data["wants_list"], data["date"], data["generation"]))
+        else:
+            write_file_atomically(self.path, lambda file: pickle.dump(data, file))
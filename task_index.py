@@ -0,0 +1,129 @@
+"""Indexes for searching the tasks by name, priority, type and time.
+
+    grams      every 2- and 3-letter piece of each lower-cased name -> task IDs
+    buckets    one bucket per (type, priority) pair, split into one per minute -> task IDs
+
+A search goes through its pieces of the index smallest first, never building the
+union of a lot of postings: the rarest piece of each word searched for, and the
+buckets the type, priority and time range pick out. If the buckets hold fewer
+tasks than the rarest piece, each bucket is intersected with the pieces one by
+one (a set intersection runs in C, over the smaller of the two); otherwise the
+pieces are intersected and the few tasks left are checked against the filters.
+Only words longer than three letters (or a single letter, which has no piece of
+its own) are then checked against the names - a two or three letter word is its
+own piece, so its posting is already exact.
+
+TaskStore builds a TaskIndex the first time it is searched (see TaskStore.find)
+and keeps it current on every add, edit and tick-off after that.
+"""
+from collections import defaultdict
+
+KINDS = ("need", "want")
+_EMPTY = frozenset()
+
+
+def pieces(text):
+    """Every 2- and 3-letter piece of the text."""
+    return {text[i:i + size] for size in (2, 3) for i in range(len(text) - size + 1)}
+
+
+class TaskIndex:
+    def __init__(self, tasks=()):
+        self.tasks = {}  # task id -> task
+        self.names = {}  # task id -> lower-cased name
+        self.grams = defaultdict(set)  # 2 or 3 letters -> set of task IDs
+        self.buckets = {(kind, priority): defaultdict(set) for kind in KINDS for priority in (False, True)}  # -> minutes -> IDs
+        for task in tasks:
+            self.add(task)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def add(self, task):
+        task_id = task.id
+        name = self.names[task_id] = task.name.lower()
+        self.tasks[task_id] = task
+        grams = self.grams
+        for gram in {name[i:i + size] for size in (2, 3) for i in range(len(name) - size + 1)}:  # pieces(), inlined for speed
+            grams[gram].add(task_id)
+        self.buckets[task.kind, bool(task.priority)][task.time].add(task_id)
+
+    def remove(self, task):
+        task_id = task.id
+        if self.tasks.pop(task_id, None) is None:
+            return
+        for gram in pieces(self.names.pop(task_id)):
+            ids = self.grams[gram]
+            ids.discard(task_id)
+            if not ids:
+                del self.grams[gram]
+        times = self.buckets[task.kind, bool(task.priority)]
+        ids = times[task.time]
+        ids.discard(task_id)
+        if not ids:
+            del times[task.time]
+
+    def search(self, text="", kind=None, priority=None, min_time=None, max_time=None):
+        """The tasks whose name contains every word of `text` (any case), of the given
+        type ("need"/"want"), priority (True/False) and time range (inclusive).
+
+        Leave any of them as None (or text empty) to not filter on it. Unordered."""
+        words = text.lower().split()
+        low = 1 if min_time is None else min_time
+        high = float("inf") if max_time is None else max_time
+        timed = min_time is not None or max_time is not None
+
+        postings = []  # the rarest piece of each word long enough to have one
+        for word in words:
+            if len(word) < 2:
+                continue
+            grams = self.grams
+            rarest = grams.get(word, _EMPTY) if len(word) <= 3 else min(
+                (grams.get(word[i:i + 3], _EMPTY) for i in range(len(word) - 2)), key=len)
+            if not rarest:
+                return []
+            postings.append(rarest)
+        postings.sort(key=len)
+        unchecked = [word for word in words if not 2 <= len(word) <= 3]
+
+        buckets = None  # the per-minute buckets the filters pick out, if there are any filters
+        if kind is not None or priority is not None or timed:
+            buckets = []
+            for (of_kind, of_priority), times in self.buckets.items():
+                if kind not in (None, of_kind) or priority not in (None, of_priority):
+                    continue
+                if not timed:
+                    buckets.extend(times.values())
+                elif high - low < len(times):
+                    buckets.extend(times[minutes] for minutes in range(low, int(high) + 1) if minutes in times)
+                else:
+                    buckets.extend(ids for minutes, ids in times.items() if low <= minutes <= high)
+
+        check_filters = False
+        if buckets is not None and (not postings or sum(map(len, buckets)) <= len(postings[0])):
+            # the filters narrow it down the most: every task in these buckets passes them
+            ids = []
+            for bucket in buckets:
+                for posting in postings:
+                    bucket = bucket & posting
+                    if not bucket:
+                        break
+                else:
+                    ids.extend(bucket)
+        elif postings:
+            ids = postings[0]
+            for posting in postings[1:]:
+                ids = ids & posting
+            check_filters = buckets is not None
+        else:
+            ids = self.tasks
+
+        names = self.names
+        for word in unchecked:  # a word at a time - quicker than all() over the words for each task
+            ids = [task_id for task_id in ids if word in names[task_id]]
+        tasks = self.tasks
+        found = [tasks[task_id] for task_id in ids]
+        if check_filters:
+            found = [task for task in found if kind in (None, task.kind) and priority in (None, bool(task.priority))
+                     and low <= task.time <= high]
+        return found
@@ -0,0 +1,203 @@
+"""Importing and exporting tasks in bulk, as CSV or JSON Lines.
+
+One task per row (CSV, with a header row) or per line (JSON Lines):
+    name,time,priority,type,due,repeat
+    Laundry,45,no,need,2026-10-20T18:00,weekly
+    {"name": "Laundry", "time": 45, "priority": false, "type": "need", "due": "2026-10-20T18:00", "repeat": 7}
+"priority" (yes/no, true/false, 1/0) and "type" (need/want) can be left out;
+they default to no and need. So can "due" and "repeat" (a number of days, or
+daily/weekly/every N days) - see schedule.py for what they accept. A task
+can only repeat if it has a due time.
+
+Files are read and written a line at a time through generators, so even a file
+of millions of tasks is never held in memory as text - only as the Tasks the
+lists keep anyway. Rows are checked with the same rules as adding a task by
+hand (a name, and a whole number of minutes from 1 to 300); bad rows are
+skipped and reported rather than stopping the import. The good ones are read
+CHUNK_ROWS at a time and each chunk goes into the lists (one TaskStore.extend
+per list, i.e. one scoring pass) before the next is read, so besides the lists
+an import only ever holds one chunk of new tasks.
+
+From the command line, use `commands.py import` / `commands.py export`.
+"""
+import csv
+import io
+import json
+import os
+from collections import namedtuple
+from itertools import islice
+
+from instrument import span, timed
+from schedule import format_due, parse_due, parse_repeat, repeat_name
+from storage import write_file_atomically
+from task_store import Task
+
+FIELDS = ("name", "time", "priority", "type", "due", "repeat")
+MAX_ERRORS = 20 #error messages kept per import (the rest are only counted)
+CHUNK_ROWS = 10_000 #rows read and added at a time
+
+ImportResult = namedtuple("ImportResult", "added skipped errors")  # errors: the first MAX_ERRORS messages
+
+_FLAGS = {"yes": True, "y": True, "true": True, "1": True, "!": True,
+          "no": False, "n": False, "false": False, "0": False, "": False,
+          True: True, False: False, None: False}  # 1 and 0 match True and False
+_KINDS = {"need": "need", "want": "want", "": "need", None: "need"}
+_PLAIN = (str, int, type(None))  # what a priority or type can be (bools are ints)
+
+def file_format(path):
+    """"csv" or "jsonl", going by the file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unknown file type '{extension}' - use .csv or .jsonl")
+
+
+def parse_task(name, time, priority=None, kind=None, due=None, repeat=None):
+    """(Task, kind) from one row's fields, checked like add_task. Raises ValueError saying what's wrong."""
+    name = name.strip().title() if isinstance(name, str) else ""
+    if not name:
+        raise ValueError("no task name")
+
+    if isinstance(time, str):
+        time = int(time) if time.strip().isdigit() else None
+    if type(time) is not int or not 1 <= time <= 300:  # bools are ints too
+        raise ValueError("time must be a whole number of minutes from 1 to 300")
+
+    # JSON can also give lists and objects, which can't be looked up at all (they aren't hashable)
+    if not isinstance(priority, _PLAIN):
+        raise ValueError("priority must be yes or no")
+    flag = _FLAGS.get(priority.strip().lower() if isinstance(priority, str) else priority, _FLAGS)
+    if flag is _FLAGS:
+        raise ValueError("priority must be yes or no")
+
+    if not isinstance(kind, _PLAIN):
+        raise ValueError("type must be need or want")
+    kind = _KINDS.get(kind.strip().lower() if isinstance(kind, str) else kind)
+    if kind is None:
+        raise ValueError("type must be need or want")
+
+    due = parse_due(due)
+    repeat = parse_repeat(repeat)
+    if repeat is not None and due is None:
+        raise ValueError("a repeating task needs a due time")
+    return Task(name, time, flag, due=due, repeat=repeat), kind
+
+
+def read_records(file, fmt):
+    """Yields (line number, (name, time, priority, type, due, repeat)) from an open text file.
+
+    Missing fields are None."""
+    if fmt == "csv":
+        reader = csv.reader(file)
+        header = [field.strip().lower() for field in next(reader, ())]
+        columns = [header.index(field) if field in header else None for field in FIELDS]
+        width = max((column for column in columns if column is not None), default=-1) + 1
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row += [None] * (width - len(row))
+            yield reader.line_num, tuple(None if column is None else row[column] for column in columns)
+        return
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if not isinstance(record, dict):
+            record = {}
+        yield line_number, tuple(record.get(field) for field in FIELDS)
+
+
+def read_tasks(path):
+    """Yields (task, kind) for every good row, and (None, message) for every bad one."""
+    fmt = file_format(path)
+    with open(path, encoding="utf-8-sig", newline="") as file:
+        for line_number, fields in read_records(file, fmt):
+            try:
+                yield parse_task(*fields)
+            except ValueError as error:
+                yield None, f"line {line_number}: {error}"
+
+
+def read_chunks(path, rows=CHUNK_ROWS):
+    """Reads and checks a file `rows` rows at a time, yielding ({"need": [...], "want": [...]},
+    skipped, errors) for each chunk - errors being the chunk's first MAX_ERRORS messages.
+
+    Doesn't touch the lists, so the GUI runs this off the Tk thread."""
+    rows_left = read_tasks(path)
+    while True:
+        batches = {"need": [], "want": []}
+        skipped = 0
+        errors = []
+        with span("import.read"):
+            for task, kind in islice(rows_left, rows):
+                if task is None:
+                    skipped += 1
+                    if len(errors) < MAX_ERRORS:
+                        errors.append(kind)
+                else:
+                    batches[kind].append(task)
+        if not (batches["need"] or batches["want"] or skipped):
+            return
+        yield batches, skipped, errors
+
+
+@timed("import.add")
+def add_batches(store, batches):
+    """Adds a chunk of read_chunks' tasks to the store, one extend per list."""
+    for kind, tasks in batches.items():
+        if tasks:
+            store.extend(tasks, kind)
+    return sum(len(tasks) for tasks in batches.values())
+
+
+def import_tasks(store, path):
+    """Adds every good row of a CSV/JSON Lines file to the store, a chunk at a time. Returns an ImportResult."""
+    added = skipped = 0
+    errors = []
+    for batches, chunk_skipped, chunk_errors in read_chunks(path):
+        added += add_batches(store, batches)
+        skipped += chunk_skipped
+        errors.extend(chunk_errors[:MAX_ERRORS - len(errors)])
+    return ImportResult(added, skipped, errors)
+
+
+def task_rows(store):
+    """(name, time, priority, type, due, repeat) for every task, needs then wants, highest score first.
+
+    "due" is the local time as text (see schedule.format_due), "repeat" the days, or None."""
+    for kind, tasks in (("need", store.needs), ("want", store.wants)):
+        for task in tasks:
+            yield task.name, task.time, bool(task.priority), kind, format_due(task.due), task.repeat
+
+
+@timed("export")
+def export_tasks(rows, path):
+    """Writes rows (see task_rows) to a CSV/JSON Lines file, replacing it in one go. Returns the row count."""
+    fmt = file_format(path)
+    written = 0
+
+    def write(binary_file):
+        nonlocal written
+        file = io.TextIOWrapper(binary_file, encoding="utf-8", newline="")
+        if fmt == "csv":
+            writer = csv.writer(file)
+            writer.writerow(FIELDS)
+            for name, time, priority, kind, due, repeat in rows:
+                writer.writerow((name, time, "yes" if priority else "no", kind, due, repeat_name(repeat)))
+                written += 1
+        else:
+            for row in rows:
+                file.write(json.dumps(dict(zip(FIELDS, row))) + "\n")
+                written += 1
+        file.flush()
+        file.detach()  # hands the file back to write_file_atomically to sync and close
+
+    write_file_atomically(path, write)
+    return written
+
@@ -0,0 +1,510 @@
+"""A local task server, so the GUI, the CLI and scripts can share one task list.
+
+    python task_server.py [--address 127.0.0.1:8765 | --address unix:/tmp/tmh.sock] [--save-file PATH]
+
+The server loads the save once and keeps the lists in memory; clients send it
+requests instead of each loading, changing and re-saving the file themselves
+(where the last save would win). Requests are handled one at a time on the
+asyncio loop, so they never trip over each other. Changes are saved in batches:
+SAVE_DELAY seconds after the first unsaved change, prepared on the loop and
+written on a worker thread (the same split as autosave.py), and once more on exit.
+
+Protocol: one JSON object per line each way.
+    request   {"seq": 1, "op": "add", "name": "Laundry", "time": 45, "priority": false, "type": "need"}
+    reply     {"seq": 1, "ok": true, "result": {...}}   or   {"seq": 1, "ok": false, "error": "..."}
+    event     {"event": "added", "tasks": [...]}       (only to clients that sent "subscribe")
+
+Operations:
+    ping
+    subscribe                          -> {"tasks": [...], "weights": [multiplier, dampener]}
+                                          (every task; events follow from then on)
+    list      [type] [limit]           -> {"tasks": [task + "position"...]}
+    search    [text] [type] [priority] [min_time] [max_time] [limit]   -> {"tasks": [...]} (see TaskStore.find)
+    add       name time [priority] [type] [due] [repeat]
+    extend    tasks: [{name, time, priority, type, due, repeat}...]  (bulk add; bad rows are skipped)
+    complete  ids: [...] [positions: true] [actual: minutes]
+                                       -> {"completed": [tasks], "next": [task or null...], "missing": [ids]}
+                                          ("next" is the next occurrence of each completed task that repeats)
+    edit      id name time [priority] [type] [due] [repeat]
+    clear
+    plan      minutes
+    save                                (write any unsaved changes now)
+    stats                              -> the completion history summary (see history.py)
+    history   [since: "YYYY-MM-DD"]    -> {"records": [...]}
+    weights   [change: "reset" | "relearn" | "off" | "on"]   -> the learned weights (see adaptive.py)
+Events: added {tasks}, completed {ids}, edited {task}, cleared, reweighted
+{weights} when the store was re-scored with newly learned weights, and
+replaced {tasks} when a save was merged with one another program made
+directly to the file (see storage.py) - every task, as after subscribe.
+
+Tick-offs are logged in the completion history next to the server's save, and
+the scoring weights learn from them as they come. Tasks with deadlines move up
+the server's lists as they near (one loop timer for the next one - see
+schedule.py); clients do the same with their own copies, so no events are sent
+for that.
+Tasks are sent as {"id", "name", "time", "priority", "type"}, with "due" (local
+"YYYY-MM-DDTHH:MM") and "repeat" (days) when set - see commands.task_json.
+TaskClient (below) is a small blocking client with events delivered on a thread;
+the GUI and `commands.py --server` use it.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from adaptive import apply_weights, learned_weights, learner_for
+from commands import history_records, task_json
+from history import CompletionLog, HistoryStats, completion_record, history_path, parse_actual, passed_over
+from schedule import parse_due
+from storage import open_save_file
+from task_io import MAX_ERRORS, parse_task
+from task_store import Task, TaskStore
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+SAVE_DELAY = 1.0 #seconds between the first unsaved change and the save that writes it
+MAX_BACKLOG = 4 * 1024 * 1024 #bytes of events a subscriber can fall behind by before it's dropped
+MAX_REQUEST = 16 * 1024 * 1024 #longest request line (an "extend" of a chunk of an import is ~1 MB)
+MAX_TIMER = 60 * 60 #longest wait before looking at the deadlines again (in case the clock jumps)
+
+
+def server_address(address=None):
+    """The address to use: `address`, else $TMH_SERVER, else DEFAULT_ADDRESS."""
+    return address or os.environ.get("TMH_SERVER") or DEFAULT_ADDRESS
+
+
+def _split_address(address):
+    # "unix:/path" or "host:port"
+    if address.startswith("unix:"):
+        return "unix", address[5:]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+class RequestError(ValueError):
+    """A request that can't be carried out; the message goes back to the client."""
+
+
+class TaskServer:
+    def __init__(self, save_file, store, save_delay=SAVE_DELAY):
+        self.save_file = save_file
+        self.store = store
+        self.save_delay = save_delay
+        self.history = CompletionLog(history_path(save_file.path))
+        self.stats = HistoryStats(self.history)  # kept, so each "stats" only reads what's new
+        self.learner = learner_for(save_file.path)
+        self.clients = set()  # StreamWriters of every connected client
+        self.subscribers = set()  # the ones that want events
+        self._dirty = False
+        self._save_timer = None
+        self._saving = None  # Future of the save being written
+        self._deadline_timer = None  # (when, TimerHandle) for the next TaskStore.catch_up
+
+    async def start(self, address):
+        """Starts listening; returns the asyncio server."""
+        self._watch_deadlines()
+        kind, where = _split_address(address)
+        if kind == "unix":
+            return await asyncio.start_unix_server(self._serve, where, limit=MAX_REQUEST)
+        return await asyncio.start_server(self._serve, *where, limit=MAX_REQUEST)
+
+    async def _serve(self, reader, writer):
+        self.clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(await self._reply(line, writer))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # ValueError: a line over MAX_REQUEST - the client is dropped rather than left half-read
+        finally:
+            self.clients.discard(writer)
+            self.subscribers.discard(writer)
+            writer.close()
+
+    def close_clients(self):
+        for writer in list(self.clients):
+            writer.close()
+
+    async def _reply(self, line, writer):
+        seq = None
+        try:
+            message = json.loads(line)
+            if not isinstance(message, dict):
+                raise RequestError("requests must be JSON objects")
+            seq = message.get("seq")
+            if message.get("op") == "save":
+                await self.flush()
+                result = {"saved": True}
+            elif message.get("op") in ("stats", "history"):
+                # reads the log - off the loop, like a save
+                result = await asyncio.get_running_loop().run_in_executor(None, self.read_history, message)
+            else:
+                result = self.handle(message, writer)
+            reply = {"seq": seq, "ok": True, "result": result}
+        except (RequestError, ValueError, KeyError, TypeError) as error:
+            reply = {"seq": seq, "ok": False, "error": str(error)}
+        except Exception as error:  # e.g. the save failed
+            reply = {"seq": seq, "ok": False, "error": f"{type(error).__name__}: {error}"}
+        return (json.dumps(reply) + "\n").encode()
+
+    def read_history(self, message):
+        if message["op"] == "stats":
+            return self.stats.update().summary()
+        return {"records": list(history_records(self.history, message.get("since")))}
+
+    def handle(self, message, writer=None):
+        """Carries out one request (everything but "save", "stats" and "history") and returns its result."""
+        op = message.get("op")
+        store = self.store
+
+        if op == "ping":
+            return {"tasks": len(store)}
+
+        if op == "subscribe":
+            # the tasks come with it (unranked - the client sorts its own copy),
+            # so nothing can change between the copy and the first event
+            self.subscribers.add(writer)
+            return {"tasks": [task_json(task) for task in store.index.values()],
+                    "weights": [store.multiplier, store.dampener]}
+
+        if op == "list":
+            tasks = []
+            for kind in ("need", "want"):
+                if message.get("type") not in (None, kind):
+                    continue
+                limit = message.get("limit")
+                first = 1 if kind == "need" else len(store.needs) + 1
+                shown = store.list_for(kind).top(limit) if limit else store.list_for(kind)
+                tasks.extend(task_json(task, position) for position, task in enumerate(shown, first))
+            return {"tasks": tasks}
+
+        if op == "search":
+            found = store.find(message.get("text") or "", message.get("type"), message.get("priority"),
+                               message.get("min_time"), message.get("max_time"))
+            limit = message.get("limit")
+            return {"tasks": [task_json(task, store.position_of(task.id)) for task in (found[:limit] if limit else found)]}
+
+        if op == "add":
+            task, kind = _parse(message)
+            store.add(task, kind)
+            self._changed({"event": "added", "tasks": [task_json(task)]})
+            return task_json(task)
+
+        if op == "extend":
+            batches = {"need": [], "want": []}
+            errors = []
+            for number, record in enumerate(message["tasks"]):
+                try:
+                    task, kind = _parse(record)
+                except ValueError as error:
+                    if len(errors) < MAX_ERRORS:
+                        errors.append(f"task {number}: {error}")
+                    continue
+                batches[kind].append(task)
+            for kind, tasks in batches.items():
+                if tasks:
+                    store.extend(tasks, kind)
+            added = batches["need"] + batches["want"]
+            if added:
+                self._changed({"event": "added", "tasks": [task_json(task) for task in added]})
+            return {"added": len(added), "skipped": len(message["tasks"]) - len(added), "errors": errors}
+
+        if op == "complete":
+            given = [int(number) for number in message["ids"]]
+            actual = None if message.get("actual") is None else parse_actual(message["actual"])
+            task_ids = given
+            if message.get("positions"):
+                task_ids = [store.task_at(number)[0].id if 1 <= number <= len(store) else None for number in given]
+            completed, following, missing, records = [], [], [], []
+            for number, task_id in zip(given, task_ids):
+                removed = store.complete(task_id) if task_id is not None else None
+                if removed is None:
+                    missing.append(number)
+                    continue
+                kind, rank, task, next_task = removed
+                completed.append(task_json(task))
+                following.append(None if next_task is None else task_json(next_task))
+                records.append(completion_record(task, kind, rank, actual, others=passed_over(store, kind)))
+            try:
+                self.history.append(records)
+            except OSError as error:
+                print(f"Could not add to the completion history: {error}", file=sys.stderr)
+            if completed:
+                self._changed({"event": "completed", "ids": [task["id"] for task in completed]})
+                if any(following):
+                    self._changed({"event": "added", "tasks": [task for task in following if task]})
+                self._learn()
+            return {"completed": completed, "next": following, "missing": missing}
+
+        if op == "edit":
+            task, kind = _parse(message)
+            if store.edit(int(message["id"]), task, kind) is None:
+                raise RequestError(f"no task {message['id']}")
+            self._changed({"event": "edited", "task": task_json(task)})
+            return task_json(task)
+
+        if op == "clear":
+            store.clear()
+            self._changed({"event": "cleared"})
+            return {"cleared": True}
+
+        if op == "weights":
+            change = message.get("change")
+            if change not in (None, "reset", "relearn", "off", "on"):
+                raise RequestError(f"unknown change {change!r}")
+            if change in ("reset", "relearn"):
+                self.learner.reset(relearn=change == "relearn")
+            elif change is not None:
+                self.learner.enabled = change == "on"
+            self._learn()
+            self.learner.save()
+            return self.learner.summary()
+
+        if op == "plan":
+            from planner import plan_tasks
+            plan = plan_tasks(store.index.values(), int(message["minutes"]))
+            return {"minutes": plan.minutes, "score": plan.score, "exact": plan.exact,
+                    "tasks": [task_json(task) for task in plan.tasks]}
+
+        raise RequestError(f"unknown op {op!r}")
+
+    def _learn(self):
+        # a few float operations per new tick-off; the lists are only re-scored once the weights have really moved
+        try:
+            self.learner.update()
+        except OSError as error:
+            print(f"Could not learn from the completion history: {error}", file=sys.stderr)
+            return
+        if apply_weights(self.store, self.learner.weights()):
+            self._send({"event": "reweighted", "weights": [self.store.multiplier, self.store.dampener]})
+
+    # ---------- events and saving ----------
+
+    def _changed(self, event):
+        self._send(event)
+        self._watch_deadlines()
+        self._dirty = True
+        if self._save_timer is None and self._saving is None:
+            self._save_timer = asyncio.get_running_loop().call_later(self.save_delay, self._start_save)
+
+    def _send(self, event):
+        line = (json.dumps(event) + "\n").encode()
+        for writer in list(self.subscribers):
+            if writer.transport.get_write_buffer_size() > MAX_BACKLOG:
+                # not reading its events - drop it rather than buffer them forever
+                self.subscribers.discard(writer)
+                writer.close()
+            else:
+                writer.write(line)
+
+    def _watch_deadlines(self):
+        # one timer, for whenever the soonest deadline next moves a task up
+        when = self.store.next_deadline()
+        if self._deadline_timer is not None:
+            if self._deadline_timer[0] == when:
+                return
+            self._deadline_timer[1].cancel()
+            self._deadline_timer = None
+        if when is not None:
+            delay = min(max(when - time.time(), 0), MAX_TIMER)
+            self._deadline_timer = (when, asyncio.get_running_loop().call_later(delay, self._deadline_reached))
+
+    def _deadline_reached(self):
+        self._deadline_timer = None
+        self.store.catch_up()
+        self._watch_deadlines()
+
+    def _start_save(self):
+        self._save_timer = None
+        if not self._dirty or self._saving is not None:
+            return
+        self._dirty = False
+        job = self.save_file.prepare(self.store)  # cheap; the write happens off the loop
+        self._saving = asyncio.get_running_loop().run_in_executor(None, self.save_file.write, job)
+        self._saving.add_done_callback(self._saved)
+
+    def _saved(self, future):
+        self._saving = None
+        if future.exception() is not None:
+            print(f"Save failed, will retry: {future.exception()}", file=sys.stderr)
+            self.store.changes = None  # those changes didn't make it, so write everything next time
+            self._dirty = True
+        elif future.result():
+            self._merged(future.result())
+        if self._dirty and self._save_timer is None:
+            self._save_timer = asyncio.get_running_loop().call_later(self.save_delay, self._start_save)
+
+    async def flush(self):
+        """Writes any unsaved changes now (waiting for a save in progress). Raises if the save fails."""
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        if self._saving is not None:
+            try:
+                await asyncio.shield(self._saving)
+            except Exception:
+                pass  # _saved has marked everything for the save below
+        if self._dirty:
+            self._dirty = False
+            job = self.save_file.prepare(self.store)
+            try:
+                merged = await asyncio.get_running_loop().run_in_executor(None, self.save_file.write, job)
+            except Exception:
+                self.store.changes = None
+                self._dirty = True
+                raise
+            if merged:
+                self._merged(merged)
+
+    def _merged(self, merged):
+        # someone saved to the file without going through the server - pick their changes up
+        self.store.rebase(merged)
+        self._watch_deadlines()
+        line = (json.dumps({"event": "replaced", "tasks": [task_json(task) for task in self.store.index.values()]})
+                + "\n").encode()
+        for writer in list(self.subscribers):
+            writer.write(line)
+
+
+def task_from_json(record):
+    """(Task, kind) for a task sent by the server - the inverse of commands.task_json."""
+    return (Task(record["name"], record["time"], record["priority"], record["id"],
+                 due=parse_due(record.get("due")), repeat=record.get("repeat")), record["type"])
+
+
+def _parse(record):
+    return parse_task(record.get("name"), record.get("time"), record.get("priority"), record.get("type"),
+                      record.get("due"), record.get("repeat"))
+
+
+def load_store(save_file):
+    """The store for a save (empty if there isn't one yet). Raises if the save is corrupted."""
+    try:
+        data = save_file.load()
+    except FileNotFoundError:
+        data = None
+    weights = learned_weights(save_file.path)
+    if not data:
+        return TaskStore((), (), *weights)
+    store = TaskStore(data["needs_list"], data["wants_list"], *weights)
+    store.mark_saved()
+    return store
+
+
+async def serve(address, save_file, ready=None):
+    """Runs a server until cancelled, then saves. `ready()` is called once it's listening."""
+    server = TaskServer(save_file, load_store(save_file))
+    listener = await server.start(address)
+    try:
+        # stop (and save) on SIGTERM too, e.g. from a service manager
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, AttributeError, RuntimeError, ValueError):
+        pass  # Windows (or not the main thread): Ctrl+C still works
+    if ready:
+        ready(server)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close_clients()
+        await server.flush()
+
+
+class ServerError(Exception):
+    """The server turned a request down (the message says why)."""
+
+
+class TaskClient:
+    """A connection to a TaskServer.
+
+    request() waits for the reply; send() returns a concurrent.futures.Future.
+    Events (after subscribe) and a final {"event": "disconnected"} are passed to
+    on_event, on the client's reader thread."""
+
+    def __init__(self, address=None, on_event=None, timeout=5):
+        kind, where = _split_address(server_address(address))
+        if kind == "unix":
+            self.sock = socket.socket(socket.AF_UNIX)
+            self.sock.settimeout(timeout)
+            self.sock.connect(where)
+        else:
+            self.sock = socket.create_connection(where, timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(None)
+        self.on_event = on_event or (lambda event: None)
+        self._seqs = itertools.count(1)
+        self._pending = {}  # request seq -> Future; None once the connection is gone
+        self._lock = threading.Lock()  # for _pending, shared with the reader thread
+        self._reader = threading.Thread(target=self._read, name="task-client", daemon=True)
+        self._reader.start()
+
+    def send(self, op, **fields):
+        from concurrent.futures import Future
+        future = Future()
+        with self._lock:
+            if self._pending is None:
+                raise ConnectionError("lost the connection to the task server")
+            seq = next(self._seqs)
+            self._pending[seq] = future
+            self.sock.sendall((json.dumps({**fields, "seq": seq, "op": op}) + "\n").encode())
+        return future
+
+    def request(self, op, timeout=30, **fields):
+        """Sends a request and returns its result; raises ServerError if it was turned down."""
+        return self.send(op, **fields).result(timeout)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def _read(self):
+        try:
+            for line in self.sock.makefile("rb"):
+                message = json.loads(line)
+                if "event" in message:
+                    self.on_event(message)
+                    continue
+                with self._lock:
+                    future = self._pending.pop(message.get("seq"), None)
+                if future is None:
+                    continue
+                if message.get("ok"):
+                    future.set_result(message.get("result"))
+                else:
+                    future.set_exception(ServerError(message.get("error")))
+        except (OSError, ValueError):
+            pass
+        with self._lock:
+            pending, self._pending = self._pending, None  # send() turns requests away from now on
+        for future in pending.values():
+            future.set_exception(ConnectionError("lost the connection to the task server"))
+        self.on_event({"event": "disconnected"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve one shared task list to the GUI, the CLI and scripts.")
+    parser.add_argument("--address", help=f"host:port or unix:/path (default: $TMH_SERVER or {DEFAULT_ADDRESS})")
+    parser.add_argument("--save-file", help="save to serve (default: the usual one)")
+    args = parser.parse_args()
+    address = server_address(args.address)
+    save_file = open_save_file(args.save_file)
+    try:
+        asyncio.run(serve(address, save_file, lambda server: print(
+            f"Serving {len(server.store)} tasks from {save_file.path} on {address} (Ctrl+C to stop)")))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass  # stopped - serve() has saved on the way out
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,711 @@
+import random
+import time as clock
+from bisect import bisect_left, bisect_right
+from heapq import heapify, heappop, heappush
+from itertools import chain
+from operator import attrgetter, itemgetter
+
+from instrument import timed
+from schedule import Deadlines, next_due
+from scoring import DAMPENER, PRIORITY_MULTIPLIER, priority_score, score_batch, urgency
+from task_index import TaskIndex
+
+
+class Task:
+    """One task on a list.
+
+    Uses __slots__ rather than a dict per task, which roughly halves the memory a
+    big backlog takes. Older saves hold plain dicts; Task.coerce turns those into
+    Tasks when they are loaded.
+
+    `due` (seconds since the epoch) and `repeat` (days) are None unless the task
+    has a deadline / comes round again - see schedule.py.
+    """
+
+    __slots__ = ("id", "name", "time", "priority", "score", "kind", "due", "repeat")
+
+    def __init__(self, name, time, priority=False, task_id=None, kind=None, due=None, repeat=None):
+        self.id = task_id
+        self.name = name
+        self.time = time
+        self.priority = priority
+        self.score = None
+        self.kind = kind  # "need" or "want", set when the task is filed
+        self.due = due
+        self.repeat = repeat
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data["time"], data["priority"], data.get("id"),
+                   due=data.get("due"), repeat=data.get("repeat"))
+
+    @classmethod
+    def coerce(cls, item):
+        """Accepts a Task or an old-style task dict."""
+        return item if isinstance(item, cls) else cls.from_dict(item)
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "time": self.time, "priority": self.priority,
+                "due": self.due, "repeat": self.repeat}
+
+    def state(self):
+        """The task as a plain tuple, as written to the save journal."""
+        return (self.id, self.name, self.time, self.priority, self.due, self.repeat)
+
+    @classmethod
+    def from_state(cls, state):
+        task_id, name, time, priority, *schedule = state  # journals written before deadlines have 4 fields
+        return cls(name, time, priority, task_id, None, *schedule)
+
+    def __reduce__(self):
+        # Pickled as its constructor arguments; the score is recalculated on load
+        if self.due is None and self.repeat is None:
+            return (Task, (self.name, self.time, self.priority, self.id, self.kind))  # most tasks - keeps big saves small
+        return (Task, (self.name, self.time, self.priority, self.id, self.kind, self.due, self.repeat))
+
+    def __eq__(self, other):
+        if not isinstance(other, Task):
+            return NotImplemented
+        return ((self.name, self.time, self.priority, self.due, self.repeat)
+                == (other.name, other.time, other.priority, other.due, other.repeat))
+
+    __hash__ = None
+
+    def __repr__(self):
+        schedule = "" if self.due is None else f", due={self.due}, repeat={self.repeat}"
+        return f"Task({self.name!r}, {self.time}, {self.priority}, task_id={self.id}{schedule})"
+
+
+def load_tasks(items):
+    """Turns a saved list (Tasks, or dicts from older saves) into a list of Tasks."""
+    return [Task.coerce(item) for item in items]
+
+
+def assign_missing_ids(needs, wants):
+    """Numbers tasks that have no ID (or a clashing one), needs first, in list order.
+
+    Used on older saves, so the same file always gets the same IDs."""
+    next_id = 1 + max((task.id for task in chain(needs, wants) if task.id is not None), default=0)
+    seen = set()
+    for task in chain(needs, wants):
+        if task.id is None or task.id in seen:
+            task.id = next_id
+            next_id += 1
+        seen.add(task.id)
+
+
+def sort_key(task):
+    """Highest score first; equal scores fall back to creation order via the task ID."""
+    return (-task.score, task.id)
+
+
+class SortedTaskList:
+    """A list of tasks that stays sorted by score (highest first) as tasks go in.
+
+    Tasks are held in chunks of roughly LOAD items, with a Fenwick tree over the
+    chunk sizes, so adding, removing and finding the task at a given rank are all
+    O(log n) (plus a small memmove inside one chunk) instead of a full re-sort.
+    Every task has a unique sort key (see sort_key), so a task is found by bisecting.
+
+    Big lists are ranked lazily: loading one only heapifies it (O(n)) and sorts
+    the first page into the chunks. The rest waits in a heap (the "tail") and is
+    sorted into the chunks as ranks further down are asked for - by scrolling,
+    looking a task up, or iterating - so showing the top of a huge list never
+    sorts the whole thing. Everything in the chunks ranks above everything in
+    the tail.
+    """
+
+    LOAD = 500
+    LAZY_MIN = 4 * LOAD #smaller lists are just sorted straight away
+
+    def __init__(self, tasks=()):
+        self._lists = []  # chunks of tasks
+        self._keys = []   # matching chunks of sort keys
+        self._maxes = []  # last key of each chunk
+        self._tree = None # Fenwick tree over chunk lengths (rebuilt lazily)
+        self._tail = []   # heap of (sort key, task) not yet sorted into the chunks
+        self._len = 0
+        self.total_time = 0
+        self._load(tasks)
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def __iter__(self):
+        """Every task in rank order (this sorts whatever hasn't been yet)."""
+        self._settle(self._len)
+        return chain.from_iterable(self._lists)
+
+    def unordered(self):
+        """Every task, in no particular order - for totals and searches that don't need ranking."""
+        return chain(chain.from_iterable(self._lists), (task for _, task in self._tail))
+
+    def top(self, count):
+        """The `count` highest-scoring tasks (only those get sorted)."""
+        self._settle(count)
+        top = []
+        for chunk in self._lists:
+            if len(top) >= count:
+                break
+            top.extend(chunk[:count - len(top)])
+        return top
+
+    def sample(self, count, rng=random):
+        """Up to `count` different tasks picked at random (this doesn't sort anything)."""
+        sorted_count = self._len - len(self._tail)
+        picked = []
+        for pick in rng.sample(range(self._len), min(count, self._len)):
+            if pick < sorted_count:
+                pos, idx = self._locate(pick)
+                picked.append(self._lists[pos][idx])
+            else:
+                picked.append(self._tail[pick - sorted_count][1])
+        return picked
+
+    def __getitem__(self, rank):
+        if rank < 0:
+            rank += self._len
+        if not 0 <= rank < self._len:
+            raise IndexError("task rank out of range")
+        self._settle(rank + 1)
+        pos, idx = self._locate(rank)
+        return self._lists[pos][idx]
+
+    def add(self, task):
+        """Inserts an already-scored task and returns its rank (0-based).
+
+        Returns None if the task ranks below the part of a big list that has been
+        sorted so far - it just joins the unsorted tail."""
+        key = sort_key(task)
+        self._len += 1
+        self.total_time += task.time
+
+        if self._tail and key > self._tail[0][0]:
+            heappush(self._tail, (key, task))
+            return None
+
+        if not self._maxes:
+            self._lists.append([task])
+            self._keys.append([key])
+            self._maxes.append(key)
+            self._tree = None
+            return 0
+
+        pos = bisect_right(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+        keys = self._keys[pos]
+        idx = bisect_right(keys, key)
+        keys.insert(idx, key)
+        self._lists[pos].insert(idx, task)
+        self._maxes[pos] = keys[-1]
+        self._update_tree(pos, 1)
+        rank = self._prefix(pos) + idx
+
+        if len(keys) > 2 * self.LOAD:
+            self._split(pos)
+        return rank
+
+    def remove(self, task):
+        """Removes this task and returns the rank it had, or None if it isn't here."""
+        found = self._find(task)
+        if found is None:
+            return None
+        pos, idx = found
+        rank = self._prefix(pos) + idx
+
+        del self._lists[pos][idx]
+        del self._keys[pos][idx]
+        self._len -= 1
+        self.total_time -= task.time
+
+        if not self._keys[pos]:
+            del self._lists[pos], self._keys[pos], self._maxes[pos]
+            self._tree = None
+        else:
+            self._maxes[pos] = self._keys[pos][-1]
+            self._update_tree(pos, -1)
+            if len(self._keys[pos]) < self.LOAD // 2 and len(self._keys) > 1:
+                self._merge(pos)
+        return rank
+
+    def remove_all(self, tasks):
+        """Removes a batch of tasks in one pass over the list - quicker than remove()
+        for more than a few, and doesn't sort any of the tail. Tasks that aren't
+        here are ignored."""
+        gone = {id(task) for task in tasks}  # Tasks aren't hashable
+        kept = [(key, task) for chunk_keys, chunk in zip(self._keys, self._lists)
+                for key, task in zip(chunk_keys, chunk) if id(task) not in gone]
+        tail = [entry for entry in self._tail if id(entry[1]) not in gone]
+        heapify(tail)
+        self._lists, self._keys, self._maxes = [], [], []
+        for start in range(0, len(kept), self.LOAD):
+            part = kept[start:start + self.LOAD]
+            self._keys.append([key for key, _ in part])
+            self._lists.append([task for _, task in part])
+            self._maxes.append(part[-1][0])
+        self._tree = None
+        self._tail = tail
+        self._len = len(kept) + len(tail)
+        self.total_time = sum(task.time for _, task in kept) + sum(task.time for _, task in tail)
+
+    def index(self, task):
+        """Rank (0-based) of this task, or None if it isn't here."""
+        found = self._find(task)
+        if found is None:
+            return None
+        pos, idx = found
+        return self._prefix(pos) + idx
+
+    def clear(self):
+        self._load(())
+
+    # ---------- internals ----------
+
+    @timed("sort")
+    def _load(self, tasks):
+        self._lists, self._keys, self._maxes = [], [], []
+        self._tree = None
+        self._tail = [((-task.score, task.id), task) for task in tasks]  # sort_key, inlined for speed
+        self._len = len(self._tail)
+        self.total_time = sum(task.time for _, task in self._tail)
+        if self._len < self.LAZY_MIN:
+            self._settle(self._len)
+        else:
+            heapify(self._tail)
+            self._settle(self.LOAD)
+
+    @timed("sort.settle")
+    def _settle(self, count):
+        """Sorts tasks out of the tail until at least the top `count` are in the chunks."""
+        tail = self._tail
+        missing = count - (self._len - len(tail))
+        if missing <= 0 or not tail:
+            return
+        if missing >= len(tail) // 4:
+            # most of what's left is wanted - one sort beats popping it all off the heap
+            batch = sorted(tail, key=itemgetter(0))
+            tail.clear()
+        else:
+            batch = [heappop(tail) for _ in range(min(max(missing, self.LOAD), len(tail)))]
+
+        for start in range(0, len(batch), self.LOAD):
+            part = batch[start:start + self.LOAD]
+            self._keys.append([key for key, _ in part])
+            self._lists.append([task for _, task in part])
+            self._maxes.append(part[-1][0])
+        self._tree = None
+
+    def _find(self, task):
+        """(chunk, index) of this task, or None."""
+        key = sort_key(task)
+        while self._tail and self._tail[0][0] <= key:  # it may still be in the tail
+            self._settle(self._len - len(self._tail) + self.LOAD)
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return None
+        idx = bisect_left(self._keys[pos], key)
+        if self._keys[pos][idx] != key:
+            return None
+        return pos, idx
+
+    def _split(self, pos):
+        half = len(self._keys[pos]) // 2
+        self._lists[pos:pos + 1] = [self._lists[pos][:half], self._lists[pos][half:]]
+        self._keys[pos:pos + 1] = [self._keys[pos][:half], self._keys[pos][half:]]
+        self._maxes[pos:pos + 1] = [self._keys[pos][-1], self._keys[pos + 1][-1]]
+        self._tree = None
+
+    def _merge(self, pos):
+        if pos == len(self._keys) - 1:
+            pos -= 1
+        self._lists[pos] += self._lists.pop(pos + 1)
+        self._keys[pos] += self._keys.pop(pos + 1)
+        del self._maxes[pos + 1]
+        self._maxes[pos] = self._keys[pos][-1]
+        self._tree = None
+        if len(self._keys[pos]) > 2 * self.LOAD:
+            self._split(pos)
+
+    def _build_tree(self):
+        # 1-based Fenwick tree; tree[i] covers chunks (i - lowbit(i), i]
+        tree = [0] + [len(chunk) for chunk in self._lists]
+        for i in range(1, len(tree)):
+            j = i + (i & -i)
+            if j < len(tree):
+                tree[j] += tree[i]
+        self._tree = tree
+        return tree
+
+    def _update_tree(self, pos, delta):
+        tree = self._tree
+        if tree is None:
+            return
+        i = pos + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, pos):
+        """Number of tasks in the chunks before `pos`."""
+        tree = self._tree or self._build_tree()
+        total = 0
+        while pos:
+            total += tree[pos]
+            pos &= pos - 1
+        return total
+
+    def _locate(self, rank):
+        """(chunk, index) of the task at a rank."""
+        tree = self._tree or self._build_tree()
+        pos = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            if pos + step < len(tree) and tree[pos + step] <= rank:
+                pos += step
+                rank -= tree[pos]
+            step >>= 1
+        return pos, rank
+
+
+class TaskStore:
+    """The needs and wants lists shared by the GUI and the command-line helper.
+
+    Each task is scored once, when it goes in, and slotted into place - nothing is
+    re-scored or re-sorted when the lists are shown. Every task also gets a
+    permanent "id" (saved with it) and `index` maps those IDs to the live task, so
+    ticking off, editing or deleting a task never has to search the lists.
+
+    Not to be confused with the numbers shown on screen, which are just positions:
+    they run 1..N over the needs, then carry on over the wants.
+
+    Tasks with a deadline score higher as it nears (see schedule.py): `deadlines`
+    knows when each one is next due a bump, and catch_up() re-slots just those.
+
+    `changes` records every add/edit/complete/clear since the lists were last
+    saved or loaded, so a save only has to write those. It is None when the lists
+    didn't come from the save file (or too much changed), which means the next
+    save has to write everything.
+    """
+
+    MAX_CHANGES = 100_000 #past this, rewriting the whole save is cheaper
+
+    def __init__(self, needs=(), wants=(), multiplier=PRIORITY_MULTIPLIER, dampener=DAMPENER):
+        self.needs = SortedTaskList()
+        self.wants = SortedTaskList()
+        self.index = {}  # task id -> task
+        self.next_id = 1
+        self.multiplier = multiplier
+        self.dampener = dampener
+        self.changes = None
+        self.deadlines = Deadlines()
+        self._search = None  # a TaskIndex once the store has been searched (see find)
+        self.replace(needs, wants)
+
+    def __len__(self):
+        return len(self.needs) + len(self.wants)
+
+    def __contains__(self, task_id):
+        return task_id in self.index
+
+    def list_for(self, kind):
+        return self.needs if kind == "need" else self.wants
+
+    def get(self, task_id):
+        """Returns the task with this ID, or None if there's no such task."""
+        return self.index.get(task_id)
+
+    @timed("store.add")
+    def add(self, task, kind):
+        """Scores a task, files it under need/want and returns its rank in that list.
+
+        New tasks get the next free ID; a task that already has one (an edited task)
+        keeps it."""
+        now = clock.time()
+        self._register(task, kind, now)
+        task.score = self._score(task, now)
+        self._record(("add", kind, task.state()))
+        return self.list_for(kind).add(task)
+
+    def extend(self, tasks, kind):
+        """Adds a batch of tasks (a bulk import, a round of CLI input) in one go.
+
+        The batch is scored in a single score_batch pass; big batches are merged
+        with one sort rather than being slotted in one at a time."""
+        tasks = list(tasks)
+        now = clock.time()
+        for task in tasks:
+            self._register(task, kind, now)
+            self._record(("add", kind, task.state()))
+        self._score_all(tasks, now)
+        sorted_tasks = self.list_for(kind)
+        if len(tasks) > len(sorted_tasks) // 8:
+            sorted_tasks._load(list(sorted_tasks.unordered()) + tasks)
+        else:
+            for task in tasks:
+                sorted_tasks.add(task)
+
+    @timed("store.remove")
+    def remove(self, task_id):
+        """Removes (ticks off) a task by ID; returns (kind, rank, task), or None if it was already gone."""
+        task = self.index.pop(task_id, None)
+        if task is None:
+            return None
+        if self._search is not None:
+            self._search.remove(task)
+        self._record(("complete", task_id))
+        if len(self.deadlines) > 2 * len(self.index) + 64:
+            self.deadlines.reset(self.index.values(), clock.time())  # mostly entries for tasks that have gone
+        return task.kind, self.list_for(task.kind).remove(task), task
+
+    def remove_many(self, task_ids):
+        """Removes a batch of tasks by ID (undoing an import) and returns how many there were.
+
+        Like extend, a big batch is taken out in one pass over the list rather
+        than one task at a time."""
+        removed = []
+        for task_id in task_ids:
+            task = self.index.pop(task_id, None)
+            if task is not None:
+                removed.append(task)
+                self._record(("complete", task_id))
+                if self._search is not None:
+                    self._search.remove(task)
+        for kind in ("need", "want"):
+            sorted_tasks = self.list_for(kind)
+            gone = [task for task in removed if task.kind == kind]
+            if len(gone) > len(sorted_tasks) // 32:
+                sorted_tasks.remove_all(gone)
+            else:
+                for task in gone:
+                    sorted_tasks.remove(task)
+        if len(self.deadlines) > 2 * len(self.index) + 64:
+            self.deadlines.reset(self.index.values(), clock.time())
+        return len(removed)
+
+    def complete(self, task_id, now=None):
+        """Ticks a task off: removes it and, if it repeats, adds its next occurrence.
+
+        Returns (kind, rank, task, next occurrence or None), or None if it was already gone."""
+        removed = self.remove(task_id)
+        if removed is None:
+            return None
+        kind, rank, task = removed
+        following = None
+        if task.repeat and task.due is not None:
+            due = next_due(task.due, task.repeat, clock.time() if now is None else now)
+            following = Task(task.name, task.time, task.priority, due=due, repeat=task.repeat)
+            self.add(following, kind)
+        return kind, rank, task, following
+
+    def catch_up(self, now=None):
+        """Re-scores the tasks whose deadlines have come closer since they were scored,
+        and moves them up their lists. Returns them.
+
+        Only looks at the tasks that are due a change (see schedule.Deadlines), so it
+        can run whenever next_deadline() comes round."""
+        now = clock.time() if now is None else now
+        moved = self.deadlines.pop_due(self.index, now)
+        for task in moved:
+            tasks = self.list_for(task.kind)
+            tasks.remove(task)  # found by its old score
+            task.score = self._score(task, now)
+            tasks.add(task)
+        return moved
+
+    def next_deadline(self):
+        """When catch_up next has something to do (seconds since the epoch), or None."""
+        return self.deadlines.next_time()
+
+    @timed("store.edit")
+    def edit(self, task_id, new_task, kind):
+        """Swaps the task with this ID for `new_task`, which keeps the same ID.
+
+        Returns (old kind, old rank, old task, new rank), or None if the task is gone."""
+        old_task = self.index.pop(task_id, None)
+        if old_task is None:
+            return None
+        if self._search is not None:
+            self._search.remove(old_task)
+        old_rank = self.list_for(old_task.kind).remove(old_task)
+        new_task.id = task_id
+        now = clock.time()
+        self._register(new_task, kind, now)
+        new_task.score = self._score(new_task, now)
+        self._record(("edit", task_id, kind, new_task.state()))
+        return old_task.kind, old_rank, old_task, self.list_for(kind).add(new_task)
+
+    @timed("store.find")
+    def find(self, text="", kind=None, priority=None, min_time=None, max_time=None):
+        """The tasks matching a search (see TaskIndex.search), needs first, in score order.
+
+        The search index is built by the first call and kept up to date from then on."""
+        if self._search is None:
+            self._search = TaskIndex(self.index.values())
+        found = self._search.search(text, kind, priority, min_time, max_time)
+        # by (type, -score, id) - as stable sorts on one attribute each, which beat a tuple key on a big result
+        found.sort(key=attrgetter("id"))
+        found.sort(key=attrgetter("score"), reverse=True)
+        found.sort(key=attrgetter("kind"))  # "need" < "want"
+        return found
+
+    def position_of(self, task_id):
+        """The (1-based) number a task is shown with, or None."""
+        task = self.index.get(task_id)
+        if task is None:
+            return None
+        rank = self.list_for(task.kind).index(task)
+        return rank + 1 if task.kind == "need" else len(self.needs) + rank + 1
+
+    def task_at(self, position):
+        """Returns (task, kind, rank) for a displayed (1-based) task number."""
+        if position <= len(self.needs):
+            return self.needs[position - 1], "need", position - 1
+        rank = position - len(self.needs) - 1
+        return self.wants[rank], "want", rank
+
+    def replace(self, needs, wants):
+        """Swaps in whole new lists (start-up, import).
+
+        Tasks from older saves have no ID yet, so they are numbered here in list order.
+        The old lists are left as they were (see snapshot)."""
+        assign_missing_ids(needs, wants)  # after this every ID is unique
+        for kind, tasks in (("need", needs), ("want", wants)):
+            for task in tasks:
+                task.kind = kind
+        self.index = {task.id: task for task in chain(needs, wants)}
+        self.next_id = max(self.index, default=0) + 1
+        self._search = None  # rebuilt if it's needed again
+        now = clock.time()
+        self.deadlines.reset(self.index.values(), now)
+        self._score_all(needs, now)
+        self._score_all(wants, now)
+        self.needs = SortedTaskList(needs)
+        self.wants = SortedTaskList(wants)
+        self.changes = None
+
+    def snapshot(self):
+        """The lists as they are, to restore() later - O(1).
+
+        Nothing is copied: clear() and replace() swap in new lists rather than
+        emptying these, so a snapshot taken just before either stays as it was."""
+        return self.needs, self.wants, self.index, (self.multiplier, self.dampener)
+
+    def restore(self, snapshot):
+        """Puts back the lists from a snapshot(), as they were when it was taken.
+
+        Only tasks whose score has moved since (new weights, a nearer deadline)
+        are re-slotted, so putting back a big list is instant."""
+        self.needs, self.wants, self.index, weights = snapshot
+        self.next_id = max(self.next_id, max(self.index, default=0) + 1)  # IDs are never handed out twice
+        self._search = None
+        now = clock.time()
+        self.deadlines.reset(self.index.values(), now)
+        if weights != (self.multiplier, self.dampener):
+            self.set_weights(self.multiplier, self.dampener)
+        else:
+            for task in [task for task in self.index.values() if task.due is not None]:
+                score = self._score(task, now)
+                if score != task.score:
+                    tasks = self.list_for(task.kind)
+                    tasks.remove(task)  # found by its old score
+                    task.score = score
+                    tasks.add(task)
+        self.changes = None  # the next save writes everything
+
+    def rebase(self, merged):
+        """Swaps in the lists of a save that was merged with another program's (see
+        storage.SaveFile.write), then re-applies the changes made since that save
+        was prepared.
+
+        Tasks the merge gave new IDs are renumbered here too, including the Task
+        objects other code may still be holding on to."""
+        pending = self.changes
+        if pending is None:
+            return  # too much has changed to replay - the next save writes everything anyway
+        live = dict(self.index)
+        moved = dict(merged["renumbered"])
+        for old_id, new_id in moved.items():
+            if old_id in live:
+                live[old_id].id = new_id
+        self.replace(merged["needs_list"], merged["wants_list"])
+        self.mark_saved()
+        for change in pending:
+            action = change[0]
+            if action == "add":
+                _, kind, state = change
+                task = Task.from_state(state)
+                self.add(task, kind)
+                if task.id != state[0]:  # the merge took its ID
+                    moved[state[0]] = task.id
+                    if state[0] in live:
+                        live[state[0]].id = task.id
+            elif action == "edit":
+                _, task_id, kind, state = change
+                self.edit(moved.get(task_id, task_id), Task.from_state(state), kind)
+            elif action == "complete":
+                self.remove(moved.get(change[1], change[1]))
+            elif action == "clear":
+                self.remove_many([moved.get(task_id, task_id) for task_id in change[1]])
+
+    def set_weights(self, multiplier=PRIORITY_MULTIPLIER, dampener=DAMPENER):
+        """Re-scores and re-sorts every task with a new multiplier/dampener."""
+        self.multiplier = multiplier
+        self.dampener = dampener
+        for sorted_tasks in (self.needs, self.wants):
+            tasks = list(sorted_tasks.unordered())
+            self._score_all(tasks)
+            sorted_tasks._load(tasks)
+
+    def _register(self, task, kind, now):
+        """Gives a task an ID (unless it has its own, unused one) and files it in the index."""
+        if task.id is None or task.id in self.index:
+            task.id = self.next_id
+        self.next_id = max(self.next_id, task.id + 1)
+        task.kind = kind
+        self.index[task.id] = task
+        if self._search is not None:
+            self._search.add(task)
+        if task.due is not None:
+            self.deadlines.add(task, now)
+
+    def _record(self, change):
+        if self.changes is not None:
+            self.changes.append(change)
+            if len(self.changes) > self.MAX_CHANGES:
+                self.changes = None
+
+    def _score(self, task, now):
+        score = priority_score(task, self.multiplier, self.dampener)
+        return score if task.due is None else round(score * urgency(task.due, now), 3)
+
+    def _score_all(self, tasks, now=None):
+        scores, _ = score_batch([task.time for task in tasks], [task.priority for task in tasks],
+                                self.multiplier, self.dampener)
+        for task, score in zip(tasks, scores):
+            task.score = score
+        now = clock.time() if now is None else now
+        for task in [task for task in tasks if task.due is not None]:
+            task.score = round(task.score * urgency(task.due, now), 3)
+
+    def clear(self):
+        cleared = tuple(self.index)  # a merge then only drops these, not tasks another program added since
+        self.needs = SortedTaskList()  # new lists, so a snapshot() of the old ones can be restored
+        self.wants = SortedTaskList()
+        self.index = {}
+        self.deadlines.reset((), 0)
+        self._search = None
+        self._record(("clear", cleared))
+
+    def mark_saved(self):
+        """Call once the lists match the save file (just loaded from it, or just saved)."""
+        self.changes = []
+
+    def as_lists(self, ordered=True):
+        """Plain (needs, wants) lists, for saving - in score order unless `ordered` is False."""
+        if not ordered:
+            return list(self.needs.unordered()), list(self.wants.unordered())
+        return list(self.needs), list(self.wants)
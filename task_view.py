@@ -0,0 +1,268 @@
+import time
+
+from instrument import timed
+from schedule import describe_due, repeat_name
+
+
+def convert_minutes_to_h_m(total_minutes):
+    """Converts total minutes into a string format: X hours Y minutes."""
+    if total_minutes < 60:
+        return f"{total_minutes} mins"
+
+    hours = total_minutes // 60
+    minutes = total_minutes % 60
+
+    h_label = "hour" if hours == 1 else "hours"
+    m_label = "min" if minutes == 1 else "mins"
+
+    if minutes == 0:
+        return f"{hours} {h_label}"
+    else:
+        return f"{hours} {h_label}, {minutes} {m_label}"
+
+
+def format_task_line(task, now=None):
+    """Text shown for a task row (the ID lives in the gutter)."""
+    priority_mark = " (!)" if task.priority else ""
+    if task.due is None:
+        return f" {task.name} ~ {task.time} mins{priority_mark}"
+    repeat = f", {repeat_name(task.repeat)}" if task.repeat else ""
+    due = describe_due(task.due, time.time() if now is None else now)
+    return f" {task.name} ~ {task.time} mins{priority_mark}  [{due}{repeat}]"
+
+
+class TaskListView:
+    """Draws the task list on a Canvas, with items only for the rows in view.
+
+    Rows (0-based, all ROW_HEIGHT pixels tall):
+        0                 "You need to do:"
+        1 .. N            need rows (or one placeholder row when N == 0)
+        blank row, then   "You want to do:"
+        ...               want rows (or one placeholder row when M == 0)
+
+    While a filter is set (see show_filter) only the matching tasks are listed,
+    under one heading, still numbered by their place in the full list.
+
+    Each row has an ID label on the left and the task text next to it. As every
+    row is the same height, the rows in view follow straight from the scroll
+    position; their tasks are read from the sorted lists by rank, and a small
+    pool of canvas items is reused for them. Nothing is created per task, so
+    adding, removing and scrolling cost the same with 100 tasks or 100k.
+    """
+
+    ROW_HEIGHT = 24
+    BUFFER_ROWS = 10 #extra rows drawn above and below the view
+    ID_X = 8
+    TEXT_X = 56
+
+    NEED_PLACEHOLDER = " No Need tasks added."
+    WANT_PLACEHOLDER = "  No Want tasks added."
+    FILTER_PLACEHOLDER = " No tasks match."
+
+    def __init__(self, canvas, summary_label, font="{Bahnschrift SemiLight} 12"):
+        self.canvas = canvas
+        self.summary_label = summary_label
+        self.fonts = {"plain": font, "heading": font + " underline", "planned": font,
+                      "completed": "{Yu Gothic} 11 bold", "overdue": font}
+        self.colours = {"plain": ("grey25", "black"), "heading": ("grey25", "black"),
+                        "planned": ("#0C8F96", "#0C8F96"), "completed": ("green", "green"),
+                        "overdue": ("#AA1730", "#AA1730")}
+
+        self.needs = self.wants = ()
+        self.need_count = 0
+        self.want_count = 0
+        self.total_need_time = 0
+        self.total_want_time = 0
+        self.completed = set()  # permanent IDs of ticked-off tasks waiting to be removed
+        self.planned = set()  # permanent IDs of the tasks in the current time plan
+        self._filter = None  # function returning the tasks to list, while filtering
+        self._matches = None  # its last result (None once the lists have changed)
+
+        self._slots = []  # (id item, text item) pairs, reused for whichever rows are in view
+        self._redraw_pending = False
+        self._scroll_height = None
+
+        self.canvas.config(yscrollincrement=self.ROW_HEIGHT)
+        self.canvas.bind("<Configure>", lambda event: self.refresh())
+
+    # ---------- changes to the lists ----------
+
+    @timed("render.full")
+    def render(self, needs, wants):
+        """Shows a new pair of lists (initial load, import, clear).
+
+        The view keeps the lists themselves and reads rows from them by rank, so
+        they must be the store's own SortedTaskLists (TaskStore.needs/wants). Only the
+        rows scrolled to are ever ranked, so showing a huge list stays quick."""
+        self.needs = needs
+        self.wants = wants
+        self.need_count = len(needs)
+        self.want_count = len(wants)
+        self.total_need_time = needs.total_time
+        self.total_want_time = wants.total_time
+        self.completed.clear()
+        self._matches = None  # the plan highlight (planned) is kept - see show_plan
+        self._update_summary()
+        self.refresh()
+
+    def insert_row(self, kind, rank, task):
+        """Called after `task` was added at position `rank` (0-based) of its list."""
+        if kind == "need":
+            self.need_count += 1
+            self.total_need_time += task.time
+        else:
+            self.want_count += 1
+            self.total_want_time += task.time
+        self._matches = None
+        self._update_summary()
+        self.refresh()
+
+    def delete_row(self, kind, rank, task):
+        """Called after `task` was removed from position `rank` (0-based) of its list."""
+        if kind == "need":
+            self.need_count -= 1
+            self.total_need_time -= task.time
+        else:
+            self.want_count -= 1
+            self.total_want_time -= task.time
+        self.completed.discard(task.id)
+        self.planned.discard(task.id)
+        self._matches = None
+        self._update_summary()
+        self.refresh()
+
+    def mark_completed(self, task_id):
+        """Ticks a row off (green + check mark) while it waits to be removed."""
+        kind, rank = self.locate(task_id)
+        task = (self.needs if kind == "need" else self.wants)[rank]
+        self.completed.add(task.id)
+        self.refresh()
+
+    def show_plan(self, task_ids):
+        """Highlights the tasks in a time plan (pass an empty list to clear it)."""
+        self.planned = set(task_ids)
+        self.refresh()
+
+    def show_filter(self, find):
+        """Lists only the tasks find() returns (e.g. a TaskStore.find search), re-running
+        it whenever the lists change. Pass None to show every task again."""
+        self._filter = find
+        self._matches = None
+        self.canvas.yview_moveto(0)
+        self.refresh()
+
+    # ---------- ID <-> row lookups ----------
+
+    @property
+    def task_count(self):
+        return self.need_count + self.want_count
+
+    def locate(self, task_id):
+        """Maps a displayed (1-based) task ID onto ("need"/"want", rank within that list)."""
+        if task_id <= self.need_count:
+            return "need", task_id - 1
+        return "want", task_id - self.need_count - 1
+
+    def row_count(self):
+        if self._filter is not None:
+            return 1 + max(len(self.matches()), 1)
+        return 1 + max(self.need_count, 1) + 2 + max(self.want_count, 1)
+
+    def matches(self):
+        """The tasks the filter lets through (only call while filtering)."""
+        if self._matches is None:
+            self._matches = self._filter()
+        return self._matches
+
+    def row(self, row):
+        """(ID label, text, style) for a row; style is "plain", "heading", "planned" or "completed"."""
+        if self._filter is not None:
+            return self._filtered_row(row)
+        need_rows = max(self.need_count, 1)
+        if row == 0:
+            return "", "You need to do:", "heading"
+        if row <= need_rows:
+            if not self.need_count:
+                return "", self.NEED_PLACEHOLDER, "plain"
+            return self._task_row(self.needs[row - 1], row)
+        if row == need_rows + 1:
+            return "", "", "plain"
+        if row == need_rows + 2:
+            return "", "You want to do:", "heading"
+        if not self.want_count:
+            return "", self.WANT_PLACEHOLDER, "plain"
+        rank = row - need_rows - 3
+        return self._task_row(self.wants[rank], self.need_count + rank + 1)
+
+    # ---------- drawing ----------
+
+    def refresh(self):
+        """Redraws the rows in view once Tk is idle (so a burst of changes draws once)."""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.canvas.after_idle(self._redraw)
+
+    @timed("render.rows")
+    def _redraw(self):
+        self._redraw_pending = False
+        canvas = self.canvas
+
+        height = self.row_count() * self.ROW_HEIGHT
+        if height != self._scroll_height:
+            canvas.config(scrollregion=(0, 0, 0, height))
+            self._scroll_height = height
+
+        top = canvas.canvasy(0)
+        first = max(0, int(top // self.ROW_HEIGHT) - self.BUFFER_ROWS)
+        last = min(self.row_count(), int((top + canvas.winfo_height()) // self.ROW_HEIGHT) + 1 + self.BUFFER_ROWS)
+
+        while len(self._slots) < last - first:
+            self._slots.append((canvas.create_text(self.ID_X, 0, anchor="nw", fill="grey25"),
+                                canvas.create_text(self.TEXT_X, 0, anchor="nw")))
+
+        for slot, row in enumerate(range(first, last)):
+            id_item, text_item = self._slots[slot]
+            label, text, style = self.row(row)
+            y = row * self.ROW_HEIGHT
+            font = self.fonts[style]
+            id_colour, text_colour = self.colours[style]
+            canvas.coords(id_item, self.ID_X, y)
+            canvas.itemconfig(id_item, text=label, state="normal", font=font, fill=id_colour)
+            canvas.coords(text_item, self.TEXT_X, y)
+            canvas.itemconfig(text_item, text=text, state="normal", font=font, fill=text_colour)
+        for id_item, text_item in self._slots[max(last - first, 0):]:
+            canvas.itemconfig(id_item, state="hidden")
+            canvas.itemconfig(text_item, state="hidden")
+
+    # ---------- internals ----------
+
+    def _filtered_row(self, row):
+        matches = self.matches()
+        if row == 0:
+            return "", f"Matching tasks ({len(matches)}):", "heading"
+        if not matches:
+            return "", self.FILTER_PLACEHOLDER, "plain"
+        task = matches[row - 1]
+        if task.kind == "need":
+            display_id = self.needs.index(task) + 1
+        else:
+            display_id = self.need_count + self.wants.index(task) + 1
+        return self._task_row(task, display_id)
+
+    def _task_row(self, task, display_id):
+        text = format_task_line(task)
+        if task.id in self.completed:
+            return f"{display_id}.", "✅ " + text, "completed"
+        if task.id in self.planned:
+            return f"{display_id}.", text + "  ◀ plan", "planned"
+        if task.due is not None and task.due <= time.time():
+            return f"{display_id}.", text, "overdue"
+        return f"{display_id}.", text, "plain"
+
+    def _update_summary(self):
+        total_time_h_m = convert_minutes_to_h_m(self.total_need_time + self.total_want_time)
+        need_time_h_m = convert_minutes_to_h_m(self.total_need_time)
+        want_time_h_m = convert_minutes_to_h_m(self.total_want_time)
+
+        summary_text = f"Estimated Time: Needs: {need_time_h_m} | Wants: {want_time_h_m} | Total: {total_time_h_m}"
+        self.summary_label.config(text=summary_text)
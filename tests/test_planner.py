@@ -0,0 +1,67 @@
+import os
+import random
+import sys
+import unittest
+from itertools import combinations
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import planner
+from planner import plan_tasks
+from task_store import Task, TaskStore
+
+
+def best_score(tasks, budget):
+    """The best plan's score, by trying every set of tasks."""
+    best = 0.0
+    for size in range(1, len(tasks) + 1):
+        for chosen in combinations(tasks, size):
+            if sum(task.time for task in chosen) <= budget:
+                best = max(best, sum(task.score for task in chosen))
+    return round(best, 3)
+
+
+class PlannerTest(unittest.TestCase):
+    def random_tasks(self, rng):
+        # few different times, so there are interchangeable tasks to bundle
+        tasks = [Task(f"Task {i}", rng.choice([1, 2, 3, 5, 8, 13, 30]), rng.random() < 0.4)
+                 for i in range(rng.randint(0, 11))]
+        return list(TaskStore(tasks).index.values())  # scored
+
+    def check_plan(self, plan, tasks, budget):
+        self.assertLessEqual(plan.minutes, budget)
+        self.assertEqual(plan.minutes, sum(task.time for task in plan.tasks))
+        self.assertEqual(len({id(task) for task in plan.tasks}), len(plan.tasks))
+        self.assertTrue(all(any(task is other for other in tasks) for task in plan.tasks))
+        self.assertEqual([task.score for task in plan.tasks], sorted((task.score for task in plan.tasks), reverse=True))
+
+    def test_matches_brute_force(self):
+        rng = random.Random(11)
+        for _ in range(300):
+            tasks = self.random_tasks(rng)
+            budget = rng.randint(0, 40)
+            plan = plan_tasks(tasks, budget)
+            self.assertTrue(plan.exact)
+            self.check_plan(plan, tasks, budget)
+            self.assertAlmostEqual(plan.score, best_score(tasks, budget), places=3)
+
+    def test_greedy_plan_fits_and_gets_at_least_half(self):
+        rng = random.Random(12)
+        with mock.patch.object(planner, "DP_MAX_CELLS", -1):
+            for _ in range(200):
+                tasks = self.random_tasks(rng)
+                budget = rng.randint(1, 40)
+                plan = plan_tasks(tasks, budget)
+                self.assertFalse(plan.exact)
+                self.check_plan(plan, tasks, budget)
+                self.assertGreaterEqual(plan.score + 1e-9, best_score(tasks, budget) / 2)
+
+    def test_nothing_fits(self):
+        tasks = list(TaskStore([Task("Long", 120)]).index.values())
+        self.assertEqual(plan_tasks(tasks, 60).tasks, [])
+        self.assertEqual(plan_tasks(tasks, 0), planner.Plan([], 0, 0.0, True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schedule import DAY, next_due
+
+
+@unittest.skipUnless(hasattr(time, "tzset"), "needs time.tzset to pin the time zone")
+class NextDueTest(unittest.TestCase):
+    def setUp(self):
+        self.old_tz = os.environ.get("TZ")
+        os.environ["TZ"] = "Europe/London"  # clocks go forward on 29 March 2026, back on 25 October
+        time.tzset()
+
+    def tearDown(self):
+        if self.old_tz is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = self.old_tz
+        time.tzset()
+
+    def at(self, *when):
+        return int(datetime(*when).timestamp())
+
+    def test_next_occurrence_is_one_repeat_on(self):
+        due = self.at(2026, 6, 1, 18, 0)
+        self.assertEqual(next_due(due, 1, due - 60), self.at(2026, 6, 2, 18, 0))
+        self.assertEqual(next_due(due, 7, due + 60), self.at(2026, 6, 8, 18, 0))
+
+    def test_missed_occurrences_are_skipped(self):
+        due = self.at(2026, 6, 1, 18, 0)
+        self.assertEqual(next_due(due, 1, self.at(2026, 6, 4, 12, 0)), self.at(2026, 6, 4, 18, 0))
+        self.assertEqual(next_due(due, 7, self.at(2026, 7, 1, 9, 0)), self.at(2026, 7, 6, 18, 0))
+        self.assertEqual(next_due(due, 3, due + 300 * DAY + 1), due + 303 * DAY)
+
+    def test_always_after_now(self):
+        due = self.at(2026, 6, 1, 18, 0)
+        self.assertEqual(next_due(due, 1, self.at(2026, 6, 2, 18, 0)), self.at(2026, 6, 3, 18, 0))
+        for now in range(due, due + 10 * DAY, 5437):
+            following = next_due(due, 2, now)
+            self.assertGreater(following, now)
+            self.assertLessEqual(following, now + 2 * DAY)
+
+    def test_keeps_the_time_of_day_across_clock_changes(self):
+        spring = next_due(self.at(2026, 3, 28, 18, 0), 1, self.at(2026, 3, 28, 19, 0))
+        self.assertEqual(datetime.fromtimestamp(spring), datetime(2026, 3, 29, 18, 0))
+        autumn = next_due(self.at(2026, 10, 20, 8, 30), 7, self.at(2026, 10, 26, 9, 0))
+        self.assertEqual(datetime.fromtimestamp(autumn), datetime(2026, 10, 27, 8, 30))
+
+
+if __name__ == "__main__":
+    unittest.main()
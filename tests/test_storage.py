@@ -0,0 +1,167 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import open_save_file, replay
+from task_store import Task, TaskStore
+
+
+def contents(store_or_data):
+    if isinstance(store_or_data, TaskStore):
+        tasks = store_or_data.index.values()
+    else:
+        tasks = store_or_data["needs_list"] + store_or_data["wants_list"]
+        for task in store_or_data["needs_list"]:
+            task.kind = "need"
+        for task in store_or_data["wants_list"]:
+            task.kind = "want"
+    return sorted((task.id, task.name, task.time, bool(task.priority), task.kind, task.due, task.repeat)
+                  for task in tasks)
+
+
+class SaveTests:
+    """Run for each kind of save file; EXTENSION is set by the subclasses below."""
+    EXTENSION = None
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "ProductivitySaveData" + self.EXTENSION)
+        store = TaskStore([Task("Laundry", 45), Task("Tax return", 90, True), Task("Bins", 5)],
+                          [Task("Read", 30), Task("Guitar", 20, True)])
+        open_save_file(self.path).save(store, "01/06/2026")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def open_session(self):
+        save_file = open_save_file(self.path)
+        data = save_file.load()
+        store = TaskStore(data["needs_list"], data["wants_list"])
+        store.mark_saved()
+        return save_file, store
+
+    def load(self):
+        return open_save_file(self.path).load()
+
+    def check_saved(self, store):
+        self.assertEqual(contents(self.load()), contents(store))
+
+    def test_saves_replay_to_the_same_lists(self):
+        save_file, store = self.open_session()
+        snapshot = self.snapshot_bytes()
+        rounds = [
+            lambda: store.add(Task("Dentist", 30, True), "need"),
+            lambda: store.edit(store.find("read")[0].id, Task("Read a novel", 60), "need"),
+            lambda: store.complete(store.find("bins")[0].id),
+            lambda: store.add(Task("Water plants", 5, due=1_800_000_000, repeat=7), "want"),
+            lambda: store.clear(),
+            lambda: store.extend([Task(f"Task {number}", number + 1) for number in range(20)], "want"),
+        ]
+        for change in rounds:
+            change()
+            self.assertIsNone(save_file.save(store, "02/06/2026"))
+            self.check_saved(store)
+        self.assertEqual(self.load()["date"], "02/06/2026")
+        if snapshot is not None:
+            self.assertEqual(self.snapshot_bytes(), snapshot)  # only the journal was written to
+
+    def test_sessions_saving_in_turn_are_merged(self):
+        first_file, first = self.open_session()
+        second_file, second = self.open_session()
+        first.add(Task("Dentist", 30, True), "need")
+        first.edit(first.find("laundry")[0].id, Task("Laundry and ironing", 75), "need")
+        first.complete(first.find("guitar")[0].id)
+        self.assertIsNone(first_file.save(first))
+
+        mine = Task("Film", 120)
+        second.add(mine, "want")  # under the same ID as the first session's Dentist
+        second.edit(second.find("tax")[0].id, Task("Tax return", 120, True), "need")
+        second.complete(second.find("bins")[0].id)
+        merged = second_file.save(second)
+        self.assertIsNotNone(merged)
+        self.assertEqual(merged["saves"], 1)
+
+        self.check_saved(second)
+        self.assertEqual(sorted(task.name for task in second.index.values()),
+                         ["Dentist", "Film", "Laundry and ironing", "Read", "Tax return"])
+        self.assertEqual(second.get(mine.id).name, "Film")  # the task object was renumbered along with it
+        self.assertEqual(second.find("tax")[0].time, 120)
+
+        # and the first session picks up the second's changes in turn
+        first.add(Task("Bike repair", 60), "want")
+        self.assertIsNotNone(first_file.save(first))
+        self.check_saved(first)
+        self.assertEqual(len(first), 6)
+
+    def test_tick_off_wins_over_an_edit(self):
+        first_file, first = self.open_session()
+        second_file, second = self.open_session()
+        first.complete(first.find("laundry")[0].id)
+        first_file.save(first)
+        second.edit(second.find("laundry")[0].id, Task("Laundry and ironing", 75), "need")
+        second_file.save(second)
+        self.check_saved(second)
+        self.assertEqual(second.find("laundry"), [])
+
+    def test_clear_keeps_what_another_session_added(self):
+        first_file, first = self.open_session()
+        second_file, second = self.open_session()
+        first.add(Task("Dentist", 30, True), "need")
+        first_file.save(first)
+        second.clear()
+        second_file.save(second)
+        self.check_saved(second)
+        self.assertEqual([task.name for task in second.index.values()], ["Dentist"])
+
+    def snapshot_bytes(self):
+        return None
+
+
+class FileSaveTests(SaveTests):
+    def snapshot_bytes(self):
+        with open(self.path, "rb") as file:
+            return file.read()
+
+    def test_cut_off_save_is_ignored(self):
+        save_file, store = self.open_session()
+        store.add(Task("Dentist", 30, True), "need")
+        save_file.save(store)
+        with open(self.path + ".journal", "ab") as file:
+            file.write(b"\x20\x00\x00\x00half a record")  # a save that crashed part way through
+        self.check_saved(store)
+
+
+class PickleSaveTest(FileSaveTests, unittest.TestCase):
+    EXTENSION = ".pkl"
+
+
+class BinarySaveTest(FileSaveTests, unittest.TestCase):
+    EXTENSION = ".tmh"
+
+
+class SqliteSaveTest(SaveTests, unittest.TestCase):
+    EXTENSION = ".db"
+
+
+class ReplayTest(unittest.TestCase):
+    def test_old_clear_record_clears_everything(self):
+        needs = {1: Task("Laundry", 45, task_id=1)}
+        wants = {2: Task("Read", 30, task_id=2)}
+        date = replay(needs, wants, [("add", "want", Task("Film", 120, task_id=3).state()), ("clear",),
+                                     ("add", "need", Task("Bins", 5, task_id=4).state()), ("saved", "03/06/2026", 7)])
+        self.assertEqual(list(needs), [4])
+        self.assertEqual(wants, {})
+        self.assertEqual(date, "03/06/2026")
+
+    def test_new_clear_record_only_clears_its_tasks(self):
+        needs = {1: Task("Laundry", 45, task_id=1)}
+        wants = {2: Task("Read", 30, task_id=2), 3: Task("Film", 120, task_id=3)}
+        replay(needs, wants, [("clear", (1, 2)), ("complete", 99)])
+        self.assertEqual((list(needs), list(wants)), ([], [3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_store import Task, TaskStore
+
+WORDS = ["email", "call", "report", "laundry", "team emails", "em", "weekly report", "budget"]
+QUERIES = ["", "e", "em", "ema", "email", "EMAIL rep", "call", "weekly report", "zzz", "em l"]
+
+
+def brute_force(store, text="", kind=None, priority=None, min_time=None, max_time=None):
+    words = text.lower().split()
+    low = 1 if min_time is None else min_time
+    high = float("inf") if max_time is None else max_time
+    return sorted(task.id for task in store.index.values()
+                  if all(word in task.name.lower() for word in words) and kind in (None, task.kind)
+                  and priority in (None, bool(task.priority)) and low <= task.time <= high)
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(7)
+        self.store = TaskStore([self.random_task() for _ in range(600)], [self.random_task() for _ in range(600)])
+        self.store.find()  # builds the index, so everything after this has to update it
+
+    def random_task(self):
+        return Task(f"{self.rng.choice(WORDS)} {self.rng.randrange(100)}", self.rng.randint(1, 300),
+                    self.rng.random() < 0.3)
+
+    def check_searches(self):
+        rng = self.rng
+        for _ in range(300):
+            query = (rng.choice(QUERIES), rng.choice([None, "need", "want"]), rng.choice([None, True, False]),
+                     rng.choice([None, 10, 100]), rng.choice([None, 29, 150, 300]))
+            self.assertEqual(sorted(task.id for task in self.store.find(*query)), brute_force(self.store, *query),
+                             query)
+
+    def test_matches_brute_force(self):
+        self.check_searches()
+
+    def test_stays_current_on_edit_and_complete(self):
+        store, rng = self.store, self.rng
+        for task_id in rng.sample(list(store.index), 200):
+            store.edit(task_id, self.random_task(), rng.choice(["need", "want"]))
+        for task_id in rng.sample(list(store.index), 200):
+            store.complete(task_id)
+        for _ in range(100):
+            store.add(self.random_task(), rng.choice(["need", "want"]))
+        store.remove_many(rng.sample(list(store.index), 100))
+        self.check_searches()
+
+    def test_edited_task_is_found_by_its_new_name_only(self):
+        store = self.store
+        task_id = next(iter(store.index))
+        store.edit(task_id, Task("Quarterly taxes", 45, True), "want")
+        self.assertEqual([task.id for task in store.find("taxes", "want", True, 45, 45)], [task_id])
+        store.edit(task_id, Task("Water plants", 5), "need")
+        self.assertEqual(store.find("taxes"), [])
+        self.assertEqual([task.id for task in store.find("plants", "need", False, None, 5)], [task_id])
+        store.complete(task_id)
+        self.assertEqual(store.find("plants"), [])
+
+    def test_results_come_in_list_order(self):
+        found = self.store.find("e")
+        self.assertEqual(found, sorted(found, key=lambda task: (task.kind != "need", -task.score, task.id)))
+
+    def test_undone_clear_is_searched_again(self):
+        store = self.store
+        before = store.snapshot()
+        store.clear()
+        self.assertEqual(store.find("email"), [])
+        store.restore(before)
+        self.check_searches()
+
+
+if __name__ == "__main__":
+    unittest.main()
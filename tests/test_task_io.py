@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_io import import_tasks, parse_task, read_chunks
+from task_store import TaskStore
+
+
+def write_lines(folder, lines):
+    path = os.path.join(folder, "tasks.jsonl")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+    return path
+
+
+class ReadChunksTest(unittest.TestCase):
+    def test_list_and_object_values_are_skipped_not_fatal(self):
+        lines = ['{"name": "Laundry", "time": 45}',
+                 '{"name": "Bins", "time": 5, "priority": [1]}',
+                 '{"name": "Tax", "time": 60, "type": {}}',
+                 '{"name": "Read", "time": 30, "type": "want"}']
+        with tempfile.TemporaryDirectory() as folder:
+            [(batches, skipped, errors)] = read_chunks(write_lines(folder, lines))
+
+        self.assertEqual([task.name for task in batches["need"]], ["Laundry"])
+        self.assertEqual([task.name for task in batches["want"]], ["Read"])
+        self.assertEqual(skipped, 2)
+        self.assertEqual(errors, ["line 2: priority must be yes or no", "line 3: type must be need or want"])
+
+    def test_parse_task_raises_value_error_for_unhashable_values(self):
+        with self.assertRaises(ValueError):
+            parse_task("Bins", 5, priority=[1])
+        with self.assertRaises(ValueError):
+            parse_task("Bins", 5, kind={})
+
+    def test_file_is_read_in_chunks_of_the_given_size(self):
+        lines = [f'{{"name": "Task {i}", "time": {i + 1}}}' for i in range(5)] + ['{"name": "", "time": 5}']
+        with tempfile.TemporaryDirectory() as folder:
+            chunks = list(read_chunks(write_lines(folder, lines), rows=2))
+
+        self.assertEqual([len(batches["need"]) for batches, _, _ in chunks], [2, 2, 1])
+        self.assertEqual([skipped for _, skipped, _ in chunks], [0, 0, 1])
+
+    def test_import_tasks_adds_every_chunk(self):
+        lines = [f'{{"name": "Task {i}", "time": {i % 300 + 1}, "type": "{"want" if i % 3 else "need"}"}}'
+                 for i in range(25000)] + ['{"name": "Bad", "time": 0}']
+        store = TaskStore()
+        with tempfile.TemporaryDirectory() as folder:
+            result = import_tasks(store, write_lines(folder, lines))
+
+        self.assertEqual((result.added, result.skipped), (25000, 1))
+        self.assertEqual(len(store), 25000)
+        self.assertEqual([task.score for task in store.wants], sorted((task.score for task in store.wants), reverse=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
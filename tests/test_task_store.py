@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_store import SortedTaskList, Task, sort_key
+
+
+def scored_tasks(count, rng, first_id=1):
+    tasks = []
+    for task_id in range(first_id, first_id + count):
+        task = Task(f"Task {task_id}", rng.randint(1, 300), rng.random() < 0.3, task_id)
+        task.score = rng.choice([0.5, 0.25, round(rng.random(), 3)])  # plenty of ties, broken by ID
+        tasks.append(task)
+    return tasks
+
+
+class SortedTaskListTest(unittest.TestCase):
+    def check(self, sorted_tasks, tasks):
+        expected = sorted(tasks, key=sort_key)
+        self.assertEqual(len(sorted_tasks), len(expected))
+        self.assertEqual(sorted_tasks.total_time, sum(task.time for task in expected))
+        self.assertEqual([task.id for task in sorted_tasks], [task.id for task in expected])
+        for rank, task in enumerate(expected):
+            self.assertIs(sorted_tasks[rank], task)
+            self.assertEqual(sorted_tasks.index(task), rank)
+
+    def test_matches_sorted_through_adds_and_removes(self):
+        rng = random.Random(1)
+        for size in (0, 1, 50, SortedTaskList.LAZY_MIN + 700):  # the last one is ranked lazily
+            tasks = scored_tasks(size, rng)
+            sorted_tasks = SortedTaskList(tasks)
+            next_id = size + 1
+            for _ in range(300):
+                if tasks and rng.random() < 0.4:
+                    task = tasks.pop(rng.randrange(len(tasks)))
+                    self.assertEqual(sorted_tasks.remove(task), sorted(tasks + [task], key=sort_key).index(task))
+                else:
+                    [task] = scored_tasks(1, rng, next_id)
+                    next_id += 1
+                    tasks.append(task)
+                    sorted_tasks.add(task)
+            self.check(sorted_tasks, tasks)
+
+    def test_lazy_list_answers_ranks_before_it_is_all_sorted(self):
+        rng = random.Random(2)
+        tasks = scored_tasks(20000, rng)
+        expected = sorted(tasks, key=sort_key)
+        sorted_tasks = SortedTaskList(tasks)
+        self.assertEqual([task.id for task in sorted_tasks.top(25)], [task.id for task in expected[:25]])
+        for rank in rng.sample(range(len(expected)), 50):
+            self.assertIs(sorted_tasks[rank], expected[rank])
+        self.assertEqual(sorted_tasks[-1], expected[-1])
+        with self.assertRaises(IndexError):
+            sorted_tasks[len(expected)]
+
+    def test_remove_all_keeps_the_order(self):
+        rng = random.Random(3)
+        tasks = scored_tasks(SortedTaskList.LAZY_MIN * 2, rng)
+        sorted_tasks = SortedTaskList(tasks)
+        sorted_tasks.top(10)  # some sorted into chunks, the rest still in the tail
+        gone = rng.sample(tasks, 1500)
+        sorted_tasks.remove_all(gone + [scored_tasks(1, rng, 10**6)[0]])  # one that was never there
+        gone_ids = {task.id for task in gone}
+        self.check(sorted_tasks, [task for task in tasks if task.id not in gone_ids])
+
+    def test_missing_task_has_no_rank(self):
+        rng = random.Random(4)
+        sorted_tasks = SortedTaskList(scored_tasks(10, rng))
+        [stranger] = scored_tasks(1, rng, 99)
+        self.assertIsNone(sorted_tasks.index(stranger))
+        self.assertIsNone(sorted_tasks.remove(stranger))
+        self.assertEqual(len(sorted_tasks), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
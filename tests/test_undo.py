@@ -0,0 +1,123 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schedule import DAY
+from task_store import Task, TaskStore
+from undo import Added, Completed, Edited, Replaced, UndoHistory
+
+
+def contents(store):
+    return sorted((task.id, task.name, task.time, bool(task.priority), task.kind, task.due, task.repeat)
+                  for task in store.index.values())
+
+
+class UndoRedoTest(unittest.TestCase):
+    def setUp(self):
+        self.store = TaskStore([Task("Laundry", 45), Task("Tax return", 90, True)],
+                               [Task("Read", 30), Task("Guitar", 20, True)])
+        self.history = UndoHistory()
+
+    def round_trip(self, change):
+        """Makes a change, then checks undo and redo put the lists back either side of it, twice over."""
+        before = contents(self.store)
+        command = change()
+        after = contents(self.store)
+        self.assertNotEqual(before, after)
+        self.history.record(command)
+        for _ in range(2):
+            self.assertIs(self.history.undo(self.store), command)
+            self.assertEqual(contents(self.store), before)
+            self.assertIs(self.history.redo(self.store), command)
+            self.assertEqual(contents(self.store), after)
+
+    def test_added(self):
+        def add():
+            added = [(Task("Bins", 5), "need"), (Task("Film", 120), "want"), (Task("Dentist", 30, True), "need")]
+            for task, kind in added:
+                self.store.add(task, kind)
+            return Added(added)
+        self.round_trip(add)
+
+    def test_completed(self):
+        task_id = self.store.find("laundry")[0].id
+        def complete():
+            kind, _, task, following = self.store.complete(task_id)
+            return Completed(task, kind, following)
+        self.round_trip(complete)
+
+    def test_completed_repeating_task_takes_its_next_occurrence_too(self):
+        task = Task("Water plants", 5, due=1_800_000_000, repeat=3)
+        self.store.add(task, "need")
+        def complete():
+            kind, _, done, following = self.store.complete(task.id, now=1_800_000_000 + DAY)
+            self.assertEqual(following.due, 1_800_000_000 + 3 * DAY)
+            return Completed(done, kind, following)
+        self.round_trip(complete)
+
+    def test_edited(self):
+        task = self.store.find("read")[0]
+        def edit():
+            old_task, old_kind = task, task.kind
+            new_task = Task("Read a novel", 60, True)
+            self.store.edit(task.id, new_task, "need")  # moves lists as well
+            return Edited(old_task, old_kind, new_task, "need")
+        self.round_trip(edit)
+
+    def test_replaced_by_a_clear(self):
+        def clear():
+            before = self.store.snapshot()
+            self.store.clear()
+            return Replaced(before, self.store.snapshot(), "clear")
+        self.round_trip(clear)
+
+    def test_several_changes_undo_in_reverse_order(self):
+        states = [contents(self.store)]
+        task = Task("Bins", 5)
+        self.store.add(task, "need")
+        self.history.record(Added([(task, "need")]))
+        states.append(contents(self.store))
+        kind, _, done, following = self.store.complete(self.store.find("tax")[0].id)
+        self.history.record(Completed(done, kind, following))
+        states.append(contents(self.store))
+        before = self.store.snapshot()
+        self.store.clear()
+        self.history.record(Replaced(before, self.store.snapshot(), "clear"))
+        states.append(contents(self.store))
+
+        for state in reversed(states[:-1]):
+            self.history.undo(self.store)
+            self.assertEqual(contents(self.store), state)
+        self.assertIsNone(self.history.undo(self.store))
+        for state in states[1:]:
+            self.history.redo(self.store)
+            self.assertEqual(contents(self.store), state)
+        self.assertIsNone(self.history.redo(self.store))
+
+    def test_new_change_drops_what_was_undone(self):
+        task = Task("Bins", 5)
+        self.store.add(task, "need")
+        self.history.record(Added([(task, "need")]))
+        self.history.undo(self.store)
+        other = Task("Film", 120)
+        self.store.add(other, "want")
+        self.history.record(Added([(other, "want")]))
+        self.assertFalse(self.history.can_redo())
+        self.assertIsNone(self.history.redo(self.store))
+
+    def test_only_the_last_changes_are_kept(self):
+        history = UndoHistory(depth=3)
+        for number in range(5):
+            task = Task(f"Task {number}", 5)
+            self.store.add(task, "need")
+            history.record(Added([(task, "need")]))
+        for _ in range(3):
+            self.assertIsNotNone(history.undo(self.store))
+        self.assertFalse(history.can_undo())
+        self.assertEqual(sorted(task.name for task in self.store.find("task")), ["Task 0", "Task 1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Undo and redo for the changes made to a TaskStore in the GUI.
+
+Every change is kept as a small command that can undo and redo itself - it
+holds the tasks it touched, never a copy of the lists, so the memory used is
+proportional to what changed:
+    Added       tasks added by hand or from a file
+    Completed   a task ticked off (and the next one, if it repeats)
+    Edited      a task before and after an edit
+    Replaced    the lists before and after a clear or an import of a save
+
+A Replaced holds the store's old lists themselves: clear() and replace() swap
+in new lists rather than emptying the old ones (see TaskStore.snapshot), so
+undoing a clear of 10,000 tasks just swaps them back rather than re-adding
+them one at a time.
+
+UndoHistory keeps the last MAX_UNDO changes; older ones are forgotten (and the
+tasks they held freed). Anything else changing the lists - a merge with
+another program's save, switching lists, loading - starts the history again,
+since the old commands would no longer line up with what's there.
+
+Undoing a tick-off puts the task back, but it stays in the completion
+history (that log is only ever appended to - see history.py).
+"""
+from collections import deque
+
+MAX_UNDO = 100 #changes that can be undone
+
+
+class Added:
+    def __init__(self, tasks):
+        self.tasks = list(tasks)  # (task, kind)
+        self.label = (f"add '{self.tasks[0][0].name}'" if len(self.tasks) == 1
+                      else f"import of {len(self.tasks)} tasks")
+
+    def undo(self, store):
+        store.remove_many([task.id for task, _ in self.tasks])
+
+    def redo(self, store):
+        for kind in ("need", "want"):
+            store.extend([task for task, of_kind in self.tasks if of_kind == kind], kind)  # they keep their IDs
+
+
+class Completed:
+    def __init__(self, task, kind, following=None):
+        self.task, self.kind, self.following = task, kind, following
+        self.label = f"tick off '{task.name}'"
+
+    def undo(self, store):
+        if self.following is not None:
+            store.remove(self.following.id)
+        store.add(self.task, self.kind)
+
+    def redo(self, store):
+        # not store.complete - that would work out a new next occurrence
+        store.remove(self.task.id)
+        if self.following is not None:
+            store.add(self.following, self.kind)
+
+
+class Edited:
+    def __init__(self, old_task, old_kind, new_task, new_kind):
+        self.old_task, self.old_kind = old_task, old_kind
+        self.new_task, self.new_kind = new_task, new_kind
+        self.label = f"edit of '{old_task.name}'"
+
+    def undo(self, store):
+        store.edit(self.new_task.id, self.old_task, self.old_kind)
+
+    def redo(self, store):
+        store.edit(self.old_task.id, self.new_task, self.new_kind)
+
+
+class Replaced:
+    def __init__(self, before, after, label):
+        self.before, self.after = before, after  # TaskStore.snapshot()s - the lists themselves, not copies
+        self.label = label
+
+    def undo(self, store):
+        store.restore(self.before)
+
+    def redo(self, store):
+        store.restore(self.after)
+
+
+class UndoHistory:
+    def __init__(self, depth=MAX_UNDO):
+        self._done = deque(maxlen=depth)
+        self._undone = []
+
+    def record(self, command):
+        """Remembers a change just made. Anything undone before it can't be redone any more."""
+        self._done.append(command)
+        self._undone.clear()
+
+    def can_undo(self):
+        return bool(self._done)
+
+    def can_redo(self):
+        return bool(self._undone)
+
+    def undo(self, store):
+        """Undoes the last change; returns it, or None if there's nothing to undo."""
+        if not self._done:
+            return None
+        command = self._done.pop()
+        command.undo(store)
+        self._undone.append(command)
+        return command
+
+    def redo(self, store):
+        """Makes the last undone change again; returns it, or None."""
+        if not self._undone:
+            return None
+        command = self._undone.pop()
+        command.redo(store)
+        self._done.append(command)
+        return command
+
+    def clear(self):
+        self._done.clear()
+        self._undone.clear()